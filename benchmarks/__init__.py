@@ -0,0 +1,20 @@
+"""
+VNE Benchmarks
+Microbenchmarks of the embedding algorithms and core primitives
+
+Run from the repository root:
+    python -m benchmarks                                  # Full suite, JSON to benchmark_results.json
+    python -m benchmarks --sizes 10 100 --topologies ER BA
+    python -m benchmarks --only noderank embed --output before.json
+    python -m benchmarks --compare before.json            # Report changes against an earlier run
+
+Every benchmark runs on each (topology, size) case: ER, BA and grid
+substrates are generated at each size, the German and Italian networks
+have fixed sizes and run once. The JSON output records per-call timing
+statistics for each benchmark together with the environment, so runs from
+different releases can be compared.
+"""
+
+from .suite import BENCHMARKS, DEFAULT_SIZES, TOPOLOGIES, BenchmarkCase, build_cases, run_suite
+
+__all__ = ['BENCHMARKS', 'DEFAULT_SIZES', 'TOPOLOGIES', 'BenchmarkCase', 'build_cases', 'run_suite']
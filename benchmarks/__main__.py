@@ -0,0 +1,136 @@
+"""
+VNE Benchmarks - command line entry point (python -m benchmarks --help)
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Make the repository root importable when run as a script (python benchmarks/__main__.py)
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.suite import ALGORITHMS, BENCHMARKS, DEFAULT_SIZES, TOPOLOGIES, build_cases, run_suite
+
+# Version of the JSON layout below; bump when fields change meaning
+SCHEMA_VERSION = 1
+
+
+def environment():
+    """Interpreter, platform, library versions and git revision of this run."""
+    import networkx
+    import numpy
+    import scipy
+
+    try:
+        revision = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=project_root, capture_output=True,
+                                  text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'numpy': numpy.__version__,
+        'scipy': scipy.__version__,
+        'networkx': networkx.__version__,
+        'git_revision': revision,
+    }
+
+
+def result_key(result):
+    return result['benchmark'], result['variant'], result['topology'], result['nodes']
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Print the median change of every benchmark present in both runs and
+    return the keys that got slower by more than `threshold` (a fraction).
+    """
+    previous = {result_key(r): r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    print(f"\nComparison with {baseline.get('created', 'baseline')} (regression threshold {threshold:.0%})")
+    for result in current['results']:
+        key = result_key(result)
+        if 'error' in result or key not in previous:
+            continue
+        before, after = previous[key]['median_s'], result['median_s']
+        change = after / before - 1 if before > 0 else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        elif change < -threshold:
+            flag = '  faster'
+        benchmark, variant, topology, nodes = key
+        print(f"  {topology}-{nodes:<9} {benchmark:<22} {variant or '':<14} "
+              f"{before * 1e3:10.3f} -> {after * 1e3:10.3f} ms  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.strip())
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('--topologies', nargs='+', choices=TOPOLOGIES, default=list(TOPOLOGIES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='substrate sizes for the generated topologies (default: %(default)s)')
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--requests', type=int, default=100, help='VNRs in each case workload')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='seconds of timed calls per microbenchmark (default: %(default)s)')
+    parser.add_argument('--max-calls', type=int, default=1000)
+    parser.add_argument('--simulation-runs', type=int, default=3, help='timed runs per full simulation')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file to write')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier JSON output to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='median slowdown counted as a regression by --compare (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    config = {
+        'benchmarks': args.only,
+        'topologies': args.topologies,
+        'sizes': args.sizes,
+        'algorithms': args.algorithms,
+        'requests': args.requests,
+        'seed': args.seed,
+        'min_time': args.min_time,
+        'max_calls': args.max_calls,
+        'simulation_runs': args.simulation_runs,
+    }
+
+    print("VNE BENCHMARKS")
+    print("=" * 80)
+    cases = build_cases(args.topologies, args.sizes, args.requests, args.seed)
+    results = run_suite(cases, args.only, args.algorithms, args.min_time, args.max_calls, args.simulation_runs)
+
+    output = {
+        'schema': SCHEMA_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'config': config,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nSaved: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), output, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+VNE Benchmark Suite
+Substrate/workload fixtures, per-call timing and the benchmark definitions
+"""
+
+import functools
+import itertools
+import random
+import statistics
+import time
+
+from src.algorithms.greedy import simple_greedy_algorithm
+from src.algorithms.noderank import compute_noderank
+from src.algorithms.rw_bfs import rw_bfs_algorithm
+from src.algorithms.rw_maxmatch import rw_maxmatch_algorithm
+from src.algorithms.yu_baseline import create_chunks, yu2008_algorithm
+from src.networks.resource_ledger import ResourceLedger
+from src.networks.substrate_networks import create_german_network, create_italian_network
+from src.networks.substrate_state import working_substrate
+from src.networks.vne_generators import generate_substrate_network, stream_vnrs
+from src.simulation.parallel_runner import run_algorithm
+from src.simulation.simulation import allocate_resources, deallocate_resources, validate_link_mapping
+
+TOPOLOGIES = ('ER', 'BA', 'grid', 'German', 'Italian')
+DEFAULT_SIZES = (10, 100, 500, 2000)
+
+# Generated substrates keep roughly this mean degree at every size, so
+# larger cases measure more nodes rather than denser graphs
+MEAN_DEGREE = 6
+
+# Same names as the experiment scripts, plus non-default algorithm options
+ALGORITHMS = {
+    'Simple_Greedy': simple_greedy_algorithm,
+    'RW_BFS': rw_bfs_algorithm,
+    'RW_MaxMatch': rw_maxmatch_algorithm,
+    'RW_MaxMatch_matching': functools.partial(rw_maxmatch_algorithm, node_mapper='matching'),
+    'Yu2008': yu2008_algorithm,
+}
+
+_FIXED_TOPOLOGIES = {
+    'German': create_german_network,
+    'Italian': create_italian_network,
+}
+
+
+class BenchmarkCase:
+    """One substrate plus the VNR workload every benchmark of the case uses."""
+
+    def __init__(self, topology, size, seed, substrate, vnrs):
+        self.topology = topology
+        self.size = size
+        self.seed = seed
+        self.substrate = substrate
+        self.vnrs = vnrs
+
+    @property
+    def label(self):
+        return f"{self.topology}-{self.substrate.number_of_nodes()}"
+
+    def describe(self):
+        return {
+            'topology': self.topology,
+            'size': self.size,
+            'nodes': self.substrate.number_of_nodes(),
+            'edges': self.substrate.number_of_edges(),
+        }
+
+
+def build_substrate(topology, size, seed=42):
+    """Substrate for a case; the German and Italian networks ignore `size`."""
+    if topology in _FIXED_TOPOLOGIES:
+        return _FIXED_TOPOLOGIES[topology]()
+
+    random.seed(seed)
+    if topology == 'ER':
+        return generate_substrate_network(size, 'erdos_renyi', edge_prob=min(0.15, MEAN_DEGREE / max(size - 1, 1)))
+    if topology == 'BA':
+        return generate_substrate_network(size, 'barabasi_albert', m=max(1, min(MEAN_DEGREE // 2, size - 1)))
+    if topology == 'grid':
+        return generate_substrate_network(size, 'grid')
+    raise ValueError(f"Unknown benchmark topology: {topology}")
+
+
+def build_cases(topologies=TOPOLOGIES, sizes=DEFAULT_SIZES, requests=100, seed=42):
+    """Yield one BenchmarkCase per (topology, size); fixed networks appear once."""
+    for topology in topologies:
+        for size in ((None,) if topology in _FIXED_TOPOLOGIES else sizes):
+            substrate = build_substrate(topology, size, seed)
+            vnrs = list(stream_vnrs(list(substrate.nodes()), count=requests, rng=random.Random(seed)))
+            yield BenchmarkCase(topology, size, seed, substrate, vnrs)
+
+
+def time_calls(func, setup=None, min_time=0.2, min_calls=3, max_calls=1000, warmup=1):
+    """
+    Per-call wall times of func(setup()) in seconds.
+
+    Calls are repeated until they add up to `min_time` (at least `min_calls`,
+    at most `max_calls`). setup() runs outside the timed region, so it can
+    reset state or pick the next input; without it func() is called bare.
+    """
+    for _ in range(warmup):
+        if setup:
+            func(setup())
+        else:
+            func()
+
+    times = []
+    total = 0.0
+    while len(times) < max_calls and (len(times) < min_calls or total < min_time):
+        if setup:
+            argument = setup()
+            start = time.perf_counter()
+            func(argument)
+        else:
+            start = time.perf_counter()
+            func()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+    return times
+
+
+def timing_stats(times):
+    ordered = sorted(times)
+    return {
+        'calls': len(times),
+        'min_s': ordered[0],
+        'median_s': statistics.median(ordered),
+        'mean_s': statistics.fmean(ordered),
+        'p95_s': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        'stdev_s': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'total_s': sum(ordered),
+    }
+
+
+# -- benchmarks ---------------------------------------------------------
+# Each takes (case, options) and yields (variant, times, extra) tuples
+
+def bench_noderank(case, options):
+    """compute_noderank on the full-capacity substrate (no cache)."""
+    substrate = working_substrate(case.substrate)
+    yield None, time_calls(lambda: compute_noderank(substrate), **options['timing']), {}
+
+
+def bench_embed(case, options):
+    """One embed call per algorithm, cycling through the workload on a full-capacity substrate."""
+    for alg_name in options['algorithms']:
+        algorithm = ALGORITHMS[alg_name]
+        substrate = working_substrate(case.substrate)
+        vnrs = itertools.cycle(case.vnrs)
+        accepted = []
+
+        if alg_name == 'Yu2008':
+            # Yu2008 embeds chunks and allocates internally; each call gets a one-VNR chunk on a reset substrate
+            def setup():
+                working_substrate(case.substrate)
+                return create_chunks([next(vnrs)])
+
+            def embed(chunks):
+                accepted.append(yu2008_algorithm(substrate, chunks)[0]['success'])
+        else:
+            setup = vnrs.__next__
+
+            def embed(vnr, algorithm=algorithm):
+                accepted.append(algorithm(substrate, vnr)[2])
+
+        times = time_calls(embed, setup, **options['timing'])
+        yield alg_name, times, {'acceptance': sum(accepted) / len(accepted)}
+
+
+def bench_validate_link_mapping(case, options):
+    """validate_link_mapping on link mappings found by the greedy algorithm."""
+    substrate = working_substrate(case.substrate)
+    mappings = _greedy_mappings(substrate, case.vnrs)
+    if not mappings:
+        return
+    inputs = itertools.cycle((link_mapping, vnr) for _, link_mapping, vnr in mappings)
+    times = time_calls(lambda args: validate_link_mapping(substrate, *args), inputs.__next__, **options['timing'])
+    yield None, times, {'mappings': len(mappings)}
+
+
+def bench_allocate_deallocate(case, options):
+    """Allocate then release one embedding, via allocate/deallocate_resources and via the ResourceLedger."""
+    substrate = working_substrate(case.substrate)
+    mappings = _greedy_mappings(substrate, case.vnrs)
+    if not mappings:
+        return
+    inputs = itertools.cycle(mappings)
+
+    def functions(args):
+        allocate_resources(substrate, *args)
+        deallocate_resources(substrate, *args)
+
+    ledger = ResourceLedger(substrate)
+
+    def transaction(args):
+        reservation = ledger.begin()
+        reservation.allocate(*args)
+        reservation.commit()
+        reservation.release()
+
+    for variant, func in (('functions', functions), ('ledger', transaction)):
+        yield variant, time_calls(func, inputs.__next__, **options['timing']), {'mappings': len(mappings)}
+
+
+def bench_simulation(case, options):
+    """A full simulation of the case's workload per algorithm (run_algorithm, quiet)."""
+    for alg_name in options['algorithms']:
+        algorithm = ALGORITHMS[alg_name]
+        outcome = []
+
+        def simulate():
+            outcome[:] = run_algorithm(alg_name, algorithm, case.substrate, case.vnrs, verbosity='quiet')
+
+        times = time_calls(simulate, min_time=0, min_calls=options['simulation_runs'], warmup=0)
+        accepted = sum(1 for record in outcome if record['success'])
+        yield alg_name, times, {'requests': len(outcome), 'acceptance': accepted / len(outcome) if outcome else 0.0}
+
+
+def _greedy_mappings(substrate, vnrs):
+    # (node_mapping, link_mapping, vnr) of every workload VNR the greedy algorithm embeds on its own
+    mappings = []
+    for vnr in vnrs:
+        node_mapping, link_mapping, success = simple_greedy_algorithm(substrate, vnr)
+        if success:
+            mappings.append((node_mapping, link_mapping, vnr))
+    return mappings
+
+
+BENCHMARKS = {
+    'noderank': bench_noderank,
+    'embed': bench_embed,
+    'validate_link_mapping': bench_validate_link_mapping,
+    'allocate_deallocate': bench_allocate_deallocate,
+    'simulation': bench_simulation,
+}
+
+
+def run_suite(cases, benchmarks=tuple(BENCHMARKS), algorithms=tuple(ALGORITHMS), min_time=0.2, max_calls=1000,
+              simulation_runs=3, report=print):
+    """
+    Run the selected benchmarks on every case and return a list of result
+    dicts (case description, benchmark, variant, timing statistics, extra
+    counters). A benchmark that raises is recorded with its error.
+    """
+    options = {
+        'algorithms': algorithms,
+        'simulation_runs': simulation_runs,
+        'timing': {'min_time': min_time, 'max_calls': max_calls},
+    }
+    results = []
+    for case in cases:
+        for name in benchmarks:
+            entry = {**case.describe(), 'benchmark': name}
+            try:
+                for variant, times, extra in BENCHMARKS[name](case, options):
+                    stats = timing_stats(times)
+                    results.append({**entry, 'variant': variant, **stats, 'extra': extra})
+                    if report:
+                        report(f"  {case.label:<14} {name:<22} {variant or '':<14} "
+                               f"median {stats['median_s'] * 1e3:10.3f} ms  ({stats['calls']} calls)")
+            except Exception as e:
+                results.append({**entry, 'variant': None, 'error': f"{type(e).__name__}: {e}"})
+                if report:
+                    report(f"  {case.label:<14} {name:<22} ERROR: {e}")
+    return results
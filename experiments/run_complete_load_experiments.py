@@ -47,8 +47,8 @@ if str(project_root) not in sys.path:
 # Import unified load experiment runner (now in same directory)
 from unified_load_experiments import UnifiedLoadExperiments
 
-def main():
-    """Main execution function."""
+def main(workers=None, shared_substrates=None):
+    """Main execution function (arguments as for UnifiedLoadExperiments)."""
     print("COMPLETE LOAD TESTING EXPERIMENTS RUNNER")
     print("=" * 60)
     print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -56,7 +56,7 @@ def main():
     
     try:
         # Create and run unified load experiments
-        experiment = UnifiedLoadExperiments()
+        experiment = UnifiedLoadExperiments(workers, shared_substrates)
         all_results = experiment.run_all_load_experiments()
         
         # Summary
@@ -156,12 +156,12 @@ def generate_vnr_queue_figure(output_dir):
     else:
         print(f"  Warning: Could not find {source}")
 
-def run_all_topology_experiments():
+def run_all_topology_experiments(workers=None, shared_substrates=None):
     """Run all 6 topology experiments with fixed visualizations."""
     print("Running all topology experiments...")
 
     # Create and run unified experiments
-    experiment = UnifiedTopologyExperiments()
+    experiment = UnifiedTopologyExperiments(workers, shared_substrates)
 
     # Change output directory to topology_experiment/ (script already in experiments/ folder)
     experiment.output_base_dir = Path("topology_experiment")
@@ -175,8 +175,8 @@ def run_all_topology_experiments():
     
     return results
 
-def main():
-    """Main execution function."""
+def main(workers=None, shared_substrates=None):
+    """Main execution function (arguments as for UnifiedTopologyExperiments)."""
     print("COMPLETE TOPOLOGY EXPERIMENTS RUNNER")
     print("=" * 60)
     print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -202,7 +202,7 @@ def main():
         print()
         
         # Step 3: Run all topology experiments (also in topology_experiment directory)
-        all_results = run_all_topology_experiments()
+        all_results = run_all_topology_experiments(workers, shared_substrates)
         print()
         
         # Summary
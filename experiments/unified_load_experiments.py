@@ -31,7 +31,6 @@ import matplotlib.pyplot as plt
 import networkx as nx
 from pathlib import Path
 from datetime import datetime
-import copy
 
 # Add src to path - works from both project root and experiments/ directory
 script_dir = Path(__file__).parent.absolute()
@@ -42,20 +41,23 @@ if str(src_path) not in sys.path:
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from src.networks.substrate_networks import create_german_network
+from src.networks.substrate_state import working_substrate
+from src.networks.substrate_networks import create_german_network, shared_network
 from src.networks.vne_generators import generate_vnr
 from src.algorithms.greedy import simple_greedy_algorithm
 from src.algorithms.rw_bfs import rw_bfs_algorithm  
 from src.algorithms.rw_maxmatch import rw_maxmatch_algorithm
-from src.algorithms.yu_baseline import yu2008_algorithm, create_chunks
-from src.simulation.simulation import vne_simulation
+from src.algorithms.yu_baseline import yu2008_algorithm
+from src.simulation.parallel_runner import ExperimentJob, resolve_workers, run_jobs
+from src.simulation.results import SimulationResults
+from src.metrics.utilization import utilization_timeline
 from src.metrics.metrics import calculate_acceptance_ratio
 from src.visualization.simulation_plots import _extract_timeline_data, _calculate_cumulative_acceptance
 
 class UnifiedLoadExperiments:
     """Unified experiment runner for load testing scenarios."""
     
-    def __init__(self):
+    def __init__(self, workers=None, shared_substrates=None):
         self.output_base_dir = Path("load_testing_experiment")
         self.output_base_dir.mkdir(parents=True, exist_ok=True)
         
@@ -70,6 +72,14 @@ class UnifiedLoadExperiments:
             'Yu2008': yu2008_algorithm
         }
         
+        self.workers = resolve_workers(workers)
+        
+        # Seed set before every algorithm run, matching the substrate seed
+        self.seed = 100
+        
+        # Optional dict of networks shared with other experiments in this process (see shared_network)
+        self.shared_substrates = shared_substrates
+        
         # Load scenarios matching original VNE load testing methodology
         # CRITICAL: This follows standard VNE literature approach - increasing VNR count + demand
         self.load_scenarios = {
@@ -105,7 +115,7 @@ class UnifiedLoadExperiments:
         
         # Use seed 100 for consistency with topology experiments
         random.seed(100)
-        self.substrate_network = create_german_network()
+        self.substrate_network = shared_network(self.shared_substrates, 'German', create_german_network)
         
         nodes = len(self.substrate_network.nodes())
         edges = len(self.substrate_network.edges())
@@ -190,6 +200,13 @@ class UnifiedLoadExperiments:
     
     def run_single_load_experiment(self, scenario_name, scenario_config):
         """Run experiment for one load scenario: 4 algorithms, 3 output figures."""
+        exp_dir, vnr_queue = self._prepare_load_scenario(scenario_name, scenario_config)
+        jobs = self._create_algorithm_jobs(scenario_name, vnr_queue)
+        outcomes = {job.alg_name: outcome for job, outcome in zip(jobs, run_jobs(jobs, self.workers))}
+        return self._complete_load_experiment(scenario_name, scenario_config, exp_dir, vnr_queue, outcomes)
+    
+    def _prepare_load_scenario(self, scenario_name, scenario_config):
+        """Create the experiment directory and VNR queue (with figure) for one scenario."""
         print(f"\n{'='*50}")
         print(f"RUNNING {scenario_name.upper().replace('_', ' ')} EXPERIMENT")
         print(f"{'='*50}")
@@ -214,58 +231,27 @@ class UnifiedLoadExperiments:
             shutil.copy2(vnr_source, exp_dir / f"{scenario_name}_vnrs.png")
             print(f"  Generated VNR visualization: {exp_dir / f'{scenario_name}_vnrs.png'}")
         
-        # Run algorithms
+        return exp_dir, vnr_queue
+    
+    def _create_algorithm_jobs(self, scenario_name, vnr_queue):
+        """One job per algorithm; each runs on its own copy of the shared substrate."""
+        return [ExperimentJob(scenario_name, alg_name, algorithm, self.substrate_network, vnr_queue, seed=self.seed)
+                for alg_name, algorithm in self.algorithms.items()]
+    
+    def _complete_load_experiment(self, scenario_name, scenario_config, exp_dir, vnr_queue, outcomes):
+        """Compute metrics from the algorithm outcomes, then write figures and JSON."""
         all_results = {}
         
-        for alg_name, algorithm in self.algorithms.items():
-            print(f"\n  Running {alg_name}...")
-            
-            # Create fresh substrate copy for each algorithm
-            substrate_copy = copy.deepcopy(self.substrate_network)
+        for alg_name, outcome in outcomes.items():
+            print(f"\n  {alg_name}:")
             
             try:
-                if alg_name == 'Yu2008':
-                    # Yu2008 uses chunked approach and needs cpu_available attribute
-                    self._initialize_substrate_resources(substrate_copy)
-                    vnr_chunks = create_chunks(vnr_queue)
-                    results = algorithm(substrate_copy, vnr_chunks)
-                    
-                    # CRITICAL: Sort by arrival_time for proper timeline visualization
-                    results = sorted(results, key=lambda x: x['arrival_time'])
-                else:
-                    # Other algorithms use standard VNE simulation
-                    results = vne_simulation(substrate_copy, vnr_queue, algorithm)
-                
-                # Calculate metrics using topology experiment pattern
-                enhanced_results = []
-                from src.metrics.metrics import calculate_revenue, calculate_cost
-                
-                for result in results:
-                    if result.get('success', False):
-                        try:
-                            vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == result['vnr_id'])
-                            revenue = calculate_revenue(vnr)
-                            cost = calculate_cost(vnr, result['node_mapping'], result['link_mapping'])
-                            enhanced_results.append({**result, 'revenue': revenue, 'cost': cost})
-                        except:
-                            enhanced_results.append({**result, 'revenue': 0, 'cost': 0})
-                    else:
-                        enhanced_results.append({**result, 'revenue': 0, 'cost': 0})
+                if outcome['status'] != 'SUCCESS':
+                    raise RuntimeError(outcome['error'])
+                results = outcome['results']
                 
-                # Calculate summary metrics
-                total = len(enhanced_results)
-                successful = len([r for r in enhanced_results if r.get('success', False)])
-                total_revenue = sum(r['revenue'] for r in enhanced_results if r.get('success', False))
-                total_cost = sum(r['cost'] for r in enhanced_results)
-                
-                metrics = {
-                    'total_requests': total,
-                    'successful_requests': successful,
-                    'acceptance_ratio': successful / total if total > 0 else 0,
-                    'total_revenue': total_revenue,
-                    'total_cost': total_cost,
-                    'revenue_cost_ratio': total_revenue / total_cost if total_cost > 0 else 0
-                }
+                # Calculate metrics using topology experiment pattern (revenue and cost per accepted VNR)
+                metrics = SimulationResults.from_records(results, vnr_queue).metrics()
                 all_results[alg_name] = {
                     'results': results,
                     'metrics': metrics,
@@ -393,28 +379,19 @@ class UnifiedLoadExperiments:
             
             if successful_results:
                 try:
-                    # Create substrate copy with proper resource tracking
-                    substrate_copy = self.substrate_network.copy()
-                    
-                    # Initialize available resources properly
-                    for node in substrate_copy.nodes():
-                        substrate_copy.nodes[node]['cpu_available'] = substrate_copy.nodes[node]['cpu']
-                    for edge in substrate_copy.edges():
-                        substrate_copy.edges[edge]['bandwidth_available'] = substrate_copy.edges[edge]['bandwidth']
+                    substrate_copy = working_substrate(self.substrate_network)
                     
-                    # Find peak utilization snapshot (working approach from experiment_runner.py)
-                    peak_embeddings = self._find_peak_utilization_snapshot(successful_results, vnr_queue)
-                    active_embeddings = peak_embeddings['active_embeddings']
+                    timeline = utilization_timeline(substrate_copy, successful_results, vnr_queue)
                     
-                    if active_embeddings:
+                    if timeline.peak_count:
                         # Use the working components directly without file saving
                         plt.sca(ax)
                         pos = nx.spring_layout(substrate_copy, seed=42)
                         
-                        from src.visualization.resource_plots import _calculate_utilization_from_embeddings, _draw_resource_network
+                        from src.visualization.resource_plots import _draw_resource_network
                         
-                        # Calculate utilization using the working function
-                        node_utilization, edge_utilization = _calculate_utilization_from_embeddings(substrate_copy, active_embeddings)
+                        # Utilization at the peak (most active VNRs)
+                        node_utilization, edge_utilization = timeline.peak_utilization()
 
                         # ADDED: Extract and save DETAILED utilization metrics
                         import numpy as np
@@ -424,8 +401,8 @@ class UnifiedLoadExperiments:
                         # Save detailed per-node and per-edge data for spatial analysis
                         utilization_metrics[alg_name] = {
                             # Peak snapshot info
-                            'peak_time': peak_embeddings['peak_time'],
-                            'peak_active_vnrs': peak_embeddings['active_count'],
+                            'peak_time': timeline.peak_time,
+                            'peak_active_vnrs': timeline.peak_count,
 
                             # DETAILED per-node utilization (for bottleneck identification)
                             'node_utilization': {str(node): float(util) for node, util in node_utilization.items()},
@@ -445,13 +422,16 @@ class UnifiedLoadExperiments:
                                 'num_nodes_over_50pct': int(sum(1 for v in node_values if v > 0.5)),
                                 'num_nodes_unused': int(sum(1 for v in node_values if v == 0)),
                                 'num_edges_utilized': len(edge_values)
-                            }
+                            },
+
+                            # Time-weighted averages, peaks and percentiles over the whole run
+                            'timeline': timeline.summary()
                         }
 
                         # Draw the network using the working function
                         _draw_resource_network(substrate_copy, pos, node_utilization, edge_utilization, edge_labels=True)
                         
-                        ax.set_title(f'{alg_name.replace("_", " ")} Peak Resource Utilization\\n(T={peak_embeddings["peak_time"]}, {peak_embeddings["active_count"]} active VNRs)', 
+                        ax.set_title(f'{alg_name.replace("_", " ")} Peak Resource Utilization\\n(T={timeline.peak_time}, {timeline.peak_count} active VNRs)', 
                                     fontweight='bold', fontsize=10)
                         ax.axis('off')
                         
@@ -584,57 +564,6 @@ class UnifiedLoadExperiments:
         plt.close()
         print(f"    Saved: {filename}")
     
-    def _find_peak_utilization_snapshot(self, results, vnr_queue):
-        """Find time point with maximum concurrent active VNRs."""
-        # Track events: arrivals and departures
-        events = []
-        
-        for result in results:
-            if result['success']:
-                vnr_id = result['vnr_id']
-
-                # CRITICAL FIX: Use embedding_time for Yu2008 (accounts for retries)
-                embedding_time = result.get('embedding_time', result['arrival_time'])
-
-                # Find VNR object for lifetime
-                vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == vnr_id)
-                departure_time = embedding_time + vnr.graph['lifetime']
-
-                events.append((embedding_time, 'arrival', result))
-                events.append((departure_time, 'departure', result))
-        
-        # Sort events by time - CRITICAL: Departures before arrivals at same time
-        events.sort(key=lambda x: (x[0], x[1] != 'departure'))  # False < True, so 'departure' comes first
-        
-        # Track active embeddings over time
-        active_embeddings = {}
-        max_active_count = 0
-        peak_time = 0
-        peak_active = {}
-        
-        for time, event_type, result in events:
-            vnr_id = result['vnr_id']
-            
-            if event_type == 'arrival':
-                # Find corresponding VNR
-                vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == vnr_id)
-                active_embeddings[vnr_id] = (result['node_mapping'], result['link_mapping'], vnr)
-            elif event_type == 'departure':
-                if vnr_id in active_embeddings:
-                    del active_embeddings[vnr_id]
-            
-            # Check if this is peak utilization
-            if len(active_embeddings) > max_active_count:
-                max_active_count = len(active_embeddings)
-                peak_time = time
-                peak_active = active_embeddings.copy()
-        
-        return {
-            'peak_time': peak_time,
-            'active_count': max_active_count,
-            'active_embeddings': peak_active
-        }
-    
     def _save_load_results(self, scenario_name, scenario_config, all_results, output_dir, utilization_data=None):
         """Save experiment results and metadata including utilization."""
 
@@ -692,11 +621,25 @@ class UnifiedLoadExperiments:
         self.generate_substrate()
         print()
         
-        # Run all scenarios
+        # Prepare every scenario, then run all (scenario × algorithm) jobs in one batch
+        prepared = {}
+        jobs = []
+        for scenario_name, scenario_config in self.load_scenarios.items():
+            prepared[scenario_name] = self._prepare_load_scenario(scenario_name, scenario_config)
+            jobs.extend(self._create_algorithm_jobs(scenario_name, prepared[scenario_name][1]))
+        
+        print(f"\nRunning {len(jobs)} algorithm runs ({self.workers} worker(s))...")
+        outcomes = dict(zip((job.key for job in jobs), run_jobs(jobs, self.workers)))
+        
         all_scenario_results = {}
         
         for scenario_name, scenario_config in self.load_scenarios.items():
-            results = self.run_single_load_experiment(scenario_name, scenario_config)
+            print(f"\n{scenario_name.upper().replace('_', ' ')} RESULTS")
+            exp_dir, vnr_queue = prepared[scenario_name]
+            scenario_outcomes = {alg_name: outcomes[(scenario_name, alg_name, self.seed)]
+                                 for alg_name in self.algorithms}
+            results = self._complete_load_experiment(scenario_name, scenario_config, exp_dir, vnr_queue,
+                                                     scenario_outcomes)
             all_scenario_results[scenario_name] = results
             print()
         
@@ -715,13 +658,6 @@ class UnifiedLoadExperiments:
         print("Total output: 1 substrate + 9 experiment figures + 6 data files")
         
         return all_scenario_results
-    
-    def _initialize_substrate_resources(self, substrate):
-        """Initialize substrate resource attributes for algorithms."""
-        for node in substrate.nodes():
-            substrate.nodes[node]['cpu_available'] = substrate.nodes[node]['cpu']
-        for edge in substrate.edges():
-            substrate.edges[edge]['bandwidth_available'] = substrate.edges[edge]['bandwidth']
 
 def main():
     """Main execution function."""
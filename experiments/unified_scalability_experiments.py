@@ -30,21 +30,24 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 # Import required modules - EXACT COPY from working topology experiments
+from src.networks.substrate_state import working_substrate
 from src.networks.substrate_networks import create_german_network, create_italian_network
 from src.networks.vne_generators import generate_substrate_network
 from src.networks.vnr_creation import create_vnr_queue
 from src.algorithms.greedy import simple_greedy_algorithm
 from src.algorithms.rw_bfs import rw_bfs_algorithm  
 from src.algorithms.rw_maxmatch import rw_maxmatch_algorithm
-from src.algorithms.yu_baseline import yu2008_algorithm, create_chunks
-from src.simulation.simulation import vne_simulation
-from src.metrics.metrics import calculate_acceptance_ratio, calculate_metrics_summary
+from src.algorithms.yu_baseline import yu2008_algorithm
+from src.simulation.parallel_runner import ExperimentJob, resolve_workers, run_jobs
+from src.simulation.results import SimulationResults
+from src.metrics.utilization import utilization_timeline
+from src.metrics.metrics import calculate_acceptance_ratio
 
 
 class UnifiedScalabilityExperiments:
     """Unified scalability experiment runner - exact copy of working topology patterns."""
     
-    def __init__(self):
+    def __init__(self, workers=None):
         self.output_base_dir = Path("scalability_experiment")
         self.output_base_dir.mkdir(parents=True, exist_ok=True)
         
@@ -90,6 +93,11 @@ class UnifiedScalabilityExperiments:
             'RW_MaxMatch': rw_maxmatch_algorithm,
             'Yu2008': yu2008_algorithm
         }
+        
+        self.workers = resolve_workers(workers)
+        
+        # Seed set before every algorithm run, matching the substrate seed
+        self.seed = 100
     
     def _create_substrate_network(self, config):
         """Create substrate network with specified configuration."""
@@ -117,6 +125,13 @@ class UnifiedScalabilityExperiments:
     
     def run_single_network_experiment(self, network_name, config, vnr_queue):
         """Run complete experiment for single network size - EXACT COPY of topology pattern."""
+        substrate, exp_dir = self._prepare_network(network_name, config)
+        jobs = self._create_algorithm_jobs(network_name, config, substrate, vnr_queue)
+        outcomes = {job.alg_name: outcome for job, outcome in zip(jobs, run_jobs(jobs, self.workers))}
+        return self._complete_network_experiment(network_name, config, substrate, exp_dir, outcomes)
+    
+    def _prepare_network(self, network_name, config):
+        """Create the substrate network and experiment directory for one network size."""
         print(f"\n=== Running {network_name} Experiment ===")
         
         # Create substrate network
@@ -127,34 +142,34 @@ class UnifiedScalabilityExperiments:
         exp_dir = self.output_base_dir / f"{network_name}_experiment"
         exp_dir.mkdir(exist_ok=True)
         
-        # Run all algorithms - EXACT COPY from topology experiments
+        return substrate, exp_dir
+    
+    def _create_algorithm_jobs(self, network_name, config, substrate, vnr_queue):
+        """One job per algorithm, each limited to the network's timeout_minutes."""
+        timeout = config['timeout_minutes'] * 60 if config.get('timeout_minutes') else None
+        return [ExperimentJob(network_name, alg_name, alg_func, substrate, vnr_queue, seed=self.seed,
+                              timeout=timeout)
+                for alg_name, alg_func in self.algorithms.items()]
+    
+    def _complete_network_experiment(self, network_name, config, substrate, exp_dir, outcomes):
+        """Collect algorithm outcomes, then write figures and JSON for one network size."""
         results = {}
-        for alg_name, alg_func in self.algorithms.items():
-            print(f"  Running {alg_name}...")
+        for alg_name, outcome in outcomes.items():
+            print(f"  {alg_name}:")
             
-            try:
-                if alg_name == "Yu2008":
-                    # Special handling for Yu2008 chunked algorithm - EXACT COPY
-                    substrate_working = substrate.copy()
-                    self._initialize_substrate_resources(substrate_working)
-                    chunks = create_chunks(vnr_queue, time_window=25)
-                    alg_results = alg_func(substrate_working, chunks, time_window=25)
-                    
-                    # CRITICAL: Sort by arrival_time for proper timeline visualization
-                    alg_results = sorted(alg_results, key=lambda x: x['arrival_time'])
-                else:
-                    # Standard simulation - EXACT COPY
-                    alg_results = vne_simulation(substrate.copy(), vnr_queue, alg_func)
-                
+            if outcome['status'] in ('SUCCESS', 'TIMEOUT'):
+                # Timed-out runs keep the VNRs processed before the deadline
+                alg_results = outcome['results']
                 results[alg_name] = alg_results
+                if outcome['status'] == 'TIMEOUT':
+                    print(f"    TIMEOUT: {outcome['error']} - {len(alg_results)} VNRs processed")
                 
                 # Calculate basic metrics - EXACT COPY
                 successes = len([r for r in alg_results if r.get('success', False)])
-                acceptance_ratio = successes / len(alg_results)
+                acceptance_ratio = successes / len(alg_results) if alg_results else 0
                 print(f"    Results: {successes}/{len(alg_results)} success ({acceptance_ratio:.1%})")
-                
-            except Exception as e:
-                print(f"    ERROR: {e}")
+            else:
+                print(f"    ERROR: {outcome['error']}")
                 results[alg_name] = []
         
         # Generate substrate network visualization
@@ -166,82 +181,11 @@ class UnifiedScalabilityExperiments:
         self._generate_metrics_comparison(network_name, results, exp_dir)
 
         # Save JSON results - EXACT COPY from topology
-        self._save_results_json(network_name, results, exp_dir, utilization_data)
+        self._save_results_json(network_name, results, exp_dir, utilization_data, outcomes)
         
         print(f"[OK] Completed {network_name} experiment")
         return results
     
-    def _initialize_substrate_resources(self, substrate):
-        """Initialize substrate available resources for Yu2008 - EXACT COPY."""
-        for node in substrate.nodes():
-            substrate.nodes[node]['cpu_available'] = substrate.nodes[node]['cpu']
-        for edge in substrate.edges():
-            substrate.edges[edge]['bandwidth_available'] = substrate.edges[edge]['bandwidth']
-    
-    def _find_peak_utilization_snapshot(self, results, vnr_queue):
-        """Find the time point with maximum active VNRs for realistic utilization visualization - EXACT COPY"""
-        # Create timeline of all arrival and departure events
-        events = []
-        
-        for result in results:
-            if result['success']:
-                vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == result['vnr_id'])
-
-                # CRITICAL FIX: Use embedding_time for Yu2008 (accounts for retries)
-                embedding_time = result.get('embedding_time', vnr.graph['arrival_time'])
-                departure_time = embedding_time + vnr.graph['lifetime']
-
-                events.append({
-                    'time': embedding_time,
-                    'type': 'ARRIVAL',
-                    'vnr_id': result['vnr_id'],
-                    'result': result,
-                    'vnr': vnr
-                })
-                events.append({
-                    'time': departure_time,
-                    'type': 'DEPARTURE',
-                    'vnr_id': result['vnr_id']
-                })
-        
-        # Sort events by time - CRITICAL: Departures before arrivals at same time
-        events.sort(key=lambda x: (x['time'], x['type'] != 'DEPARTURE'))  # False < True, so DEPARTURE comes first
-        
-        # Track active VNRs at each time point
-        active_vnrs = {}
-        max_active_count = 0
-        peak_time = 0
-        peak_embeddings = []
-        
-        for event in events:
-            if event['type'] == 'ARRIVAL':
-                active_vnrs[event['vnr_id']] = event
-            else:  # DEPARTURE
-                if event['vnr_id'] in active_vnrs:
-                    del active_vnrs[event['vnr_id']]
-            
-            # Check if this is the new peak
-            if len(active_vnrs) > max_active_count:
-                max_active_count = len(active_vnrs)
-                peak_time = event['time']
-                peak_embeddings = [info['result'] for info in active_vnrs.values()]
-        
-        # Convert peak_embeddings list to dictionary format expected by _calculate_utilization_from_embeddings
-        active_embeddings_dict = {}
-        for result in peak_embeddings:
-            vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == result['vnr_id'])
-            active_embeddings_dict[result['vnr_id']] = (
-                result['node_mapping'], 
-                result['link_mapping'], 
-                vnr
-            )
-        
-        return {
-            'time': peak_time,
-            'count': max_active_count,
-            'active_embeddings': active_embeddings_dict
-        }
-    
     def _generate_substrate_visualization(self, network_name, config, substrate, output_dir):
         """Generate substrate network visualization with custom seed for clarity."""
         print(f"    Generating substrate visualization...")
@@ -357,36 +301,27 @@ class UnifiedScalabilityExperiments:
                 
                 if successful_results:
                     try:
-                        # Create substrate copy with proper resource tracking
-                        substrate_copy = substrate.copy()
-                        
-                        # Initialize available resources properly
-                        for node in substrate_copy.nodes():
-                            substrate_copy.nodes[node]['cpu_available'] = substrate_copy.nodes[node]['cpu']
-                        for edge in substrate_copy.edges():
-                            substrate_copy.edges[edge]['bandwidth_available'] = substrate_copy.edges[edge]['bandwidth']
+                        substrate_copy = working_substrate(substrate)
                         
-                        # Find peak utilization snapshot (working approach from experiment_runner.py)
-                        peak_embeddings = self._find_peak_utilization_snapshot(successful_results, vnr_queue)
-                        active_embeddings = peak_embeddings['active_embeddings']
+                        timeline = utilization_timeline(substrate_copy, successful_results, vnr_queue)
                         
-                        if active_embeddings:
+                        if timeline.peak_count:
                             # Use the working components directly without file saving
                             plt.sca(ax)
                             pos = nx.spring_layout(substrate_copy, seed=config['viz_seed'])
                             
-                            from src.visualization.resource_plots import _calculate_utilization_from_embeddings, _draw_resource_network
+                            from src.visualization.resource_plots import _draw_resource_network
                             
-                            # Calculate utilization using the working function
-                            node_utilization, edge_utilization = _calculate_utilization_from_embeddings(substrate_copy, active_embeddings)
+                            # Utilization at the peak (most active VNRs)
+                            node_utilization, edge_utilization = timeline.peak_utilization()
 
                             # ADDED: Extract and save DETAILED utilization metrics
                             node_values = list(node_utilization.values())
                             edge_values = [v for v in edge_utilization.values() if v > 0]
 
                             utilization_metrics[alg_name] = {
-                                'peak_time': peak_embeddings['time'],
-                                'peak_active_vnrs': peak_embeddings['count'],
+                                'peak_time': timeline.peak_time,
+                                'peak_active_vnrs': timeline.peak_count,
                                 'node_utilization': {str(node): float(util) for node, util in node_utilization.items()},
                                 'edge_utilization': {f"{e[0]}-{e[1]}": float(util) for e, util in edge_utilization.items() if util > 0},
                                 'summary': {
@@ -400,13 +335,16 @@ class UnifiedScalabilityExperiments:
                                     'num_nodes_over_50pct': int(sum(1 for v in node_values if v > 0.5)),
                                     'num_nodes_unused': int(sum(1 for v in node_values if v == 0)),
                                     'num_edges_utilized': len(edge_values)
-                                }
+                                },
+
+                                # Time-weighted averages, peaks and percentiles over the whole run
+                                'timeline': timeline.summary()
                             }
 
                             # Draw the network using the working function
                             _draw_resource_network(substrate_copy, pos, node_utilization, edge_utilization, edge_labels=True)
                             
-                            ax.set_title(f'{alg_name.replace("_", " ")} Peak Resource Utilization\\n(T={peak_embeddings["time"]}, {peak_embeddings["count"]} active VNRs)', 
+                            ax.set_title(f'{alg_name.replace("_", " ")} Peak Resource Utilization\\n(T={timeline.peak_time}, {timeline.peak_count} active VNRs)', 
                                         fontweight='bold', fontsize=10)
                             ax.axis('off')
                             
@@ -480,40 +418,14 @@ class UnifiedScalabilityExperiments:
         print(f"    Generating metrics comparison...")
         
         # Calculate enhanced metrics like the working code does
-        from src.metrics.metrics import calculate_revenue, calculate_cost
         vnr_queue = create_vnr_queue()
         
         plot_data = {}
         for alg_name, alg_results in results.items():
             if alg_results:
-                # Calculate comprehensive metrics like the working experiment
-                enhanced_results = []
-                for result in alg_results:
-                    if result.get('success', False):
-                        vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == result['vnr_id'])
-                        revenue = calculate_revenue(vnr)
-                        cost = calculate_cost(vnr, result['node_mapping'], result['link_mapping'])
-                        enhanced_results.append({**result, 'revenue': revenue, 'cost': cost})
-                    else:
-                        enhanced_results.append({**result, 'revenue': 0, 'cost': 0})
-                
-                # Calculate summary metrics
-                total = len(enhanced_results)
-                successful = len([r for r in enhanced_results if r.get('success', False)])
-                total_revenue = sum(r['revenue'] for r in enhanced_results)
-                total_cost = sum(r['cost'] for r in enhanced_results)
-                acceptance_ratio = successful / total if total > 0 else 0
-                revenue_cost_ratio = total_revenue / total_cost if total_cost > 0 else 0
-                
+                # Calculate comprehensive metrics (revenue and cost per accepted VNR)
                 plot_data[alg_name] = {
-                    'metrics': {
-                        'total_requests': total,
-                        'successful_requests': successful,
-                        'acceptance_ratio': acceptance_ratio,
-                        'total_revenue': total_revenue,
-                        'total_cost': total_cost,
-                        'revenue_cost_ratio': revenue_cost_ratio
-                    }
+                    'metrics': SimulationResults.from_records(alg_results, vnr_queue).metrics()
                 }
         
         # EXACT code from experiment_runner.py comprehensive comparison
@@ -565,38 +477,40 @@ class UnifiedScalabilityExperiments:
             
             print(f"      Saved: {output_path}")
     
-    def _save_results_json(self, network_name, results, output_dir, utilization_data=None):
+    def _save_results_json(self, network_name, results, output_dir, utilization_data=None, outcomes=None):
         """Save JSON results - EXACT COPY from topology experiments."""
 
         # Calculate comprehensive metrics for each algorithm
-        from src.metrics.metrics import calculate_revenue, calculate_cost
         vnr_queue = create_vnr_queue()
 
         summary_data = {}
         for alg_name, alg_results in results.items():
+            outcome = outcomes.get(alg_name, {}) if outcomes else {}
+            timed_out = outcome.get('status') == 'TIMEOUT'
+            
             if alg_results:  # Only process if we have results
-                # Enhance results with revenue/cost like the metrics comparison function does
-                enhanced_results = []
-                for result in alg_results:
-                    if result.get('success', False):
-                        vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == result['vnr_id'])
-                        revenue = calculate_revenue(vnr)
-                        cost = calculate_cost(vnr, result['node_mapping'], result['link_mapping'])
-                        enhanced_results.append({**result, 'revenue': revenue, 'cost': cost})
-                    else:
-                        enhanced_results.append({**result, 'revenue': 0, 'cost': 0})
-
-                metrics = calculate_metrics_summary(enhanced_results)
+                # Revenue/cost per accepted VNR, rounded like calculate_metrics_summary
+                metrics = SimulationResults.from_records(alg_results, vnr_queue).metrics_summary()
                 result_entry = {
                     'metrics': metrics,
-                    'status': 'SUCCESS'
+                    'status': 'TIMEOUT' if timed_out else 'SUCCESS'
                 }
+                if timed_out:
+                    # Partial results: metrics cover only the VNRs processed before the deadline
+                    result_entry['error'] = outcome['error']
+                    result_entry['processed_requests'] = len(alg_results)
 
                 # ADDED: Include utilization data if available
                 if utilization_data and alg_name in utilization_data:
                     result_entry['utilization'] = utilization_data[alg_name]
 
                 summary_data[alg_name] = result_entry
+            elif timed_out:
+                summary_data[alg_name] = {
+                    'status': 'TIMEOUT',
+                    'error': outcome['error'],
+                    'processed_requests': 0
+                }
             else:
                 summary_data[alg_name] = {
                     'status': 'FAILED',
@@ -652,9 +566,32 @@ class UnifiedScalabilityExperiments:
             '16_nodes': self.network_configs['16_nodes'],
             '20_nodes': self.network_configs['20_nodes']
         }
+        # Prepare every network, then run all (network × algorithm) jobs in one batch
+        prepared = {}
+        failed = {}
+        jobs = []
+        for network_name, config in test_configs.items():
+            try:
+                prepared[network_name] = self._prepare_network(network_name, config)
+                jobs.extend(self._create_algorithm_jobs(network_name, config, prepared[network_name][0], vnr_queue))
+            except Exception as e:
+                print(f"Failed {network_name} experiment: {str(e)}")
+                failed[network_name] = {'status': 'EXPERIMENT_FAILED', 'error': str(e)}
+        
+        print(f"\nRunning {len(jobs)} algorithm runs ({self.workers} worker(s))...")
+        outcomes = dict(zip((job.key for job in jobs), run_jobs(jobs, self.workers)))
+        
         for network_name, config in test_configs.items():
+            if network_name in failed:
+                all_results[network_name] = failed[network_name]
+                continue
+            print(f"\n=== {network_name} Results ===")
+            substrate, exp_dir = prepared[network_name]
+            network_outcomes = {alg_name: outcomes[(network_name, alg_name, self.seed)]
+                                for alg_name in self.algorithms}
             try:
-                results = self.run_single_network_experiment(network_name, config, vnr_queue)
+                results = self._complete_network_experiment(network_name, config, substrate, exp_dir,
+                                                             network_outcomes)
                 all_results[network_name] = results
             except Exception as e:
                 print(f"Failed {network_name} experiment: {str(e)}")
@@ -666,9 +603,9 @@ class UnifiedScalabilityExperiments:
         return all_results
 
 
-def main():
+def main(workers=None):
     """Main entry point."""
-    scalability_exp = UnifiedScalabilityExperiments()
+    scalability_exp = UnifiedScalabilityExperiments(workers)
     return scalability_exp.run_all_experiments()
 
 
@@ -39,20 +39,23 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 # Import required modules
-from src.networks.substrate_networks import create_german_network, create_italian_network
+from src.networks.substrate_state import working_substrate
+from src.networks.substrate_networks import create_german_network, create_italian_network, shared_network
 from src.networks.vne_generators import generate_substrate_network
 from src.networks.vnr_creation import create_vnr_queue
 from src.algorithms.greedy import simple_greedy_algorithm
 from src.algorithms.rw_bfs import rw_bfs_algorithm  
 from src.algorithms.rw_maxmatch import rw_maxmatch_algorithm
-from src.algorithms.yu_baseline import yu2008_algorithm, create_chunks
-from src.simulation.simulation import vne_simulation
+from src.algorithms.yu_baseline import yu2008_algorithm
+from src.simulation.parallel_runner import ExperimentJob, resolve_workers, run_jobs
+from src.simulation.results import SimulationResults
+from src.metrics.utilization import utilization_timeline
 from src.metrics.metrics import calculate_acceptance_ratio, calculate_metrics_summary
 
 class UnifiedTopologyExperiments:
     """Unified experiment runner for all 6 topologies."""
     
-    def __init__(self):
+    def __init__(self, workers=None, shared_substrates=None):
         self.output_base_dir = Path("topology_experiment")
         self.output_base_dir.mkdir(exist_ok=True)
         
@@ -74,6 +77,14 @@ class UnifiedTopologyExperiments:
             'Yu2008': yu2008_algorithm
         }
         
+        self.workers = resolve_workers(workers)
+        
+        # Seed set before every algorithm run, matching the substrate seed
+        self.seed = 100
+        
+        # Optional dict of networks shared with other experiments in this process (see shared_network)
+        self.shared_substrates = shared_substrates
+        
         self.substrates = {}
         self.vnr_queue = None
         
@@ -89,7 +100,7 @@ class UnifiedTopologyExperiments:
             print(f"  Generating {name}...")
             
             if config['type'] == 'hardcoded':
-                substrate = config['generator']()
+                substrate = shared_network(self.shared_substrates, name, config['generator'])
             else:
                 # Use same generation logic as substrate figure
                 substrate = generate_substrate_network(
@@ -105,6 +116,13 @@ class UnifiedTopologyExperiments:
     
     def run_single_topology_experiment(self, topology_name, substrate):
         """Run experiment for one topology: 4 algorithms, 3 output figures."""
+        exp_dir, vnr_queue = self._prepare_topology(topology_name)
+        jobs = self._create_algorithm_jobs(topology_name, substrate, vnr_queue)
+        outcomes = {job.alg_name: outcome for job, outcome in zip(jobs, run_jobs(jobs, self.workers))}
+        return self._complete_topology_experiment(topology_name, substrate, exp_dir, outcomes)
+    
+    def _prepare_topology(self, topology_name):
+        """Create the experiment directory and VNR queue for one topology."""
         print(f"\n{'='*50}")
         print(f"RUNNING {topology_name.upper()} EXPERIMENT")
         print(f"{'='*50}")
@@ -117,34 +135,29 @@ class UnifiedTopologyExperiments:
         vnr_queue = create_vnr_queue()
         print(f"Using standard VNR queue: {len(vnr_queue)} VNRs")
         
-        # Run all algorithms
+        return exp_dir, vnr_queue
+    
+    def _create_algorithm_jobs(self, topology_name, substrate, vnr_queue):
+        """One job per algorithm; each runs on its own copy of the substrate."""
+        return [ExperimentJob(topology_name, alg_name, alg_func, substrate, vnr_queue, seed=self.seed)
+                for alg_name, alg_func in self.algorithms.items()]
+    
+    def _complete_topology_experiment(self, topology_name, substrate, exp_dir, outcomes):
+        """Collect algorithm outcomes, then write figures and JSON for one topology."""
         results = {}
-        for alg_name, alg_func in self.algorithms.items():
-            print(f"  Running {alg_name}...")
+        for alg_name, outcome in outcomes.items():
+            print(f"  {alg_name}:")
             
-            try:
-                if alg_name == "Yu2008":
-                    # Special handling for Yu2008 chunked algorithm
-                    substrate_working = substrate.copy()
-                    self._initialize_substrate_resources(substrate_working)
-                    chunks = create_chunks(vnr_queue, time_window=25)
-                    alg_results = alg_func(substrate_working, chunks, time_window=25)
-                    
-                    # CRITICAL: Sort by arrival_time for proper timeline visualization
-                    alg_results = sorted(alg_results, key=lambda x: x['arrival_time'])
-                else:
-                    # Standard simulation
-                    alg_results = vne_simulation(substrate.copy(), vnr_queue, alg_func)
-                
+            if outcome['status'] == 'SUCCESS':
+                alg_results = outcome['results']
                 results[alg_name] = alg_results
                 
                 # Calculate basic metrics
                 successes = len([r for r in alg_results if r.get('success', False)])
-                acceptance_ratio = successes / len(alg_results)
+                acceptance_ratio = successes / len(alg_results) if alg_results else 0
                 print(f"    Results: {successes}/{len(alg_results)} success ({acceptance_ratio:.1%})")
-                
-            except Exception as e:
-                print(f"    ERROR: {e}")
+            else:
+                print(f"    ERROR: {outcome['error']}")
                 results[alg_name] = []
         
         # Generate 3 figures for this topology
@@ -158,13 +171,6 @@ class UnifiedTopologyExperiments:
         print(f"[OK] Completed {topology_name} experiment")
         return results
     
-    def _initialize_substrate_resources(self, substrate):
-        """Initialize substrate available resources for Yu2008."""
-        for node in substrate.nodes():
-            substrate.nodes[node]['cpu_available'] = substrate.nodes[node]['cpu']
-        for edge in substrate.edges():
-            substrate.edges[edge]['bandwidth_available'] = substrate.edges[edge]['bandwidth']
-    
     def _generate_timeline_comparison(self, topology_name, results, output_dir):
         """Generate timeline comparison using the ACTUAL working plot_simulation_timeline function."""
         print(f"    Generating timeline comparison...")
@@ -262,28 +268,19 @@ class UnifiedTopologyExperiments:
                 
                 if successful_results:
                     try:
-                        # Create substrate copy with proper resource tracking
-                        substrate_copy = substrate.copy()
+                        substrate_copy = working_substrate(substrate)
                         
-                        # Initialize available resources properly
-                        for node in substrate_copy.nodes():
-                            substrate_copy.nodes[node]['cpu_available'] = substrate_copy.nodes[node]['cpu']
-                        for edge in substrate_copy.edges():
-                            substrate_copy.edges[edge]['bandwidth_available'] = substrate_copy.edges[edge]['bandwidth']
+                        timeline = utilization_timeline(substrate_copy, successful_results, vnr_queue)
                         
-                        # Find peak utilization snapshot (working approach from experiment_runner.py)
-                        peak_embeddings = self._find_peak_utilization_snapshot(successful_results, vnr_queue)
-                        active_embeddings = peak_embeddings['active_embeddings']
-                        
-                        if active_embeddings:
+                        if timeline.peak_count:
                             # Use the working components directly without file saving
                             plt.sca(ax)
                             pos = nx.spring_layout(substrate_copy, seed=42)
                             
-                            from src.visualization.resource_plots import _calculate_utilization_from_embeddings, _draw_resource_network
+                            from src.visualization.resource_plots import _draw_resource_network
                             
-                            # Calculate utilization using the working function
-                            node_utilization, edge_utilization = _calculate_utilization_from_embeddings(substrate_copy, active_embeddings)
+                            # Utilization at the peak (most active VNRs)
+                            node_utilization, edge_utilization = timeline.peak_utilization()
 
                             # ADDED: Extract and save DETAILED utilization metrics
                             node_values = list(node_utilization.values())
@@ -292,8 +289,8 @@ class UnifiedTopologyExperiments:
                             # Save detailed per-node and per-edge data for spatial analysis
                             utilization_metrics[alg_name] = {
                                 # Peak snapshot info
-                                'peak_time': peak_embeddings['time'],
-                                'peak_active_vnrs': peak_embeddings['count'],
+                                'peak_time': timeline.peak_time,
+                                'peak_active_vnrs': timeline.peak_count,
 
                                 # DETAILED per-node utilization (for bottleneck identification)
                                 'node_utilization': {str(node): float(util) for node, util in node_utilization.items()},
@@ -313,13 +310,16 @@ class UnifiedTopologyExperiments:
                                     'num_nodes_over_50pct': int(sum(1 for v in node_values if v > 0.5)),
                                     'num_nodes_unused': int(sum(1 for v in node_values if v == 0)),
                                     'num_edges_utilized': len(edge_values)
-                                }
+                                },
+
+                                # Time-weighted averages, peaks and percentiles over the whole run
+                                'timeline': timeline.summary()
                             }
 
                             # Draw the network using the working function
                             _draw_resource_network(substrate_copy, pos, node_utilization, edge_utilization, edge_labels=True)
                             
-                            ax.set_title(f'{alg_name.replace("_", " ")} Peak Resource Utilization\\n(T={peak_embeddings["time"]}, {peak_embeddings["count"]} active VNRs)', 
+                            ax.set_title(f'{alg_name.replace("_", " ")} Peak Resource Utilization\\n(T={timeline.peak_time}, {timeline.peak_count} active VNRs)', 
                                         fontweight='bold', fontsize=10)
                             ax.axis('off')
                             
@@ -393,40 +393,14 @@ class UnifiedTopologyExperiments:
         print(f"    Generating metrics comparison...")
         
         # Calculate enhanced metrics like the working code does
-        from src.metrics.metrics import calculate_revenue, calculate_cost
         vnr_queue = create_vnr_queue()
         
         plot_data = {}
         for alg_name, alg_results in results.items():
             if alg_results:
-                # Calculate comprehensive metrics like the working experiment
-                enhanced_results = []
-                for result in alg_results:
-                    if result.get('success', False):
-                        vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == result['vnr_id'])
-                        revenue = calculate_revenue(vnr)
-                        cost = calculate_cost(vnr, result['node_mapping'], result['link_mapping'])
-                        enhanced_results.append({**result, 'revenue': revenue, 'cost': cost})
-                    else:
-                        enhanced_results.append({**result, 'revenue': 0, 'cost': 0})
-                
-                # Calculate summary metrics
-                total = len(enhanced_results)
-                successful = len([r for r in enhanced_results if r.get('success', False)])
-                total_revenue = sum(r['revenue'] for r in enhanced_results)
-                total_cost = sum(r['cost'] for r in enhanced_results)
-                acceptance_ratio = successful / total if total > 0 else 0
-                revenue_cost_ratio = total_revenue / total_cost if total_cost > 0 else 0
-                
+                # Calculate comprehensive metrics (revenue and cost per accepted VNR)
                 plot_data[alg_name] = {
-                    'metrics': {
-                        'total_requests': total,
-                        'successful_requests': successful,
-                        'acceptance_ratio': acceptance_ratio,
-                        'total_revenue': total_revenue,
-                        'total_cost': total_cost,
-                        'revenue_cost_ratio': revenue_cost_ratio
-                    }
+                    'metrics': SimulationResults.from_records(alg_results, vnr_queue).metrics()
                 }
         
         # EXACT code from experiment_runner.py comprehensive comparison
@@ -483,7 +457,6 @@ class UnifiedTopologyExperiments:
         print(f"    Saving JSON results...")
         
         # Calculate enhanced metrics for summary
-        from src.metrics.metrics import calculate_revenue, calculate_cost
         vnr_queue = create_vnr_queue()
         
         # Create metadata
@@ -501,37 +474,9 @@ class UnifiedTopologyExperiments:
         serializable_results = {}
         for alg_name, alg_results in results.items():
             if alg_results:
-                # Calculate summary metrics like experiment_runner.py
-                enhanced_results = []
-                for result in alg_results:
-                    if result.get('success', False):
-                        try:
-                            vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == result['vnr_id'])
-                            revenue = calculate_revenue(vnr)
-                            cost = calculate_cost(vnr, result['node_mapping'], result['link_mapping'])
-                            enhanced_results.append({**result, 'revenue': revenue, 'cost': cost})
-                        except:
-                            enhanced_results.append({**result, 'revenue': 0, 'cost': 0})
-                    else:
-                        enhanced_results.append({**result, 'revenue': 0, 'cost': 0})
-                
-                # Calculate summary metrics
-                total = len(enhanced_results)
-                successful = len([r for r in enhanced_results if r.get('success', False)])
-                total_revenue = sum(r['revenue'] for r in enhanced_results)
-                total_cost = sum(r['cost'] for r in enhanced_results)
-                acceptance_ratio = successful / total if total > 0 else 0
-                revenue_cost_ratio = total_revenue / total_cost if total_cost > 0 else 0
-                
+                # Calculate summary metrics (revenue and cost per accepted VNR)
                 result_entry = {
-                    'metrics': {
-                        'total_requests': total,
-                        'successful_requests': successful,
-                        'acceptance_ratio': acceptance_ratio,
-                        'total_revenue': total_revenue,
-                        'total_cost': total_cost,
-                        'revenue_cost_ratio': revenue_cost_ratio
-                    },
+                    'metrics': SimulationResults.from_records(alg_results, vnr_queue).metrics(),
                     'status': 'SUCCESS'
                 }
 
@@ -551,76 +496,6 @@ class UnifiedTopologyExperiments:
         
         print(f"      Saved: {output_dir / 'results_summary.json'}")
     
-    def _find_peak_utilization_snapshot(self, results, vnr_queue):
-        """Find the time point with maximum active VNRs for realistic utilization visualization"""
-        # Create timeline of all arrival and departure events
-        events = []
-
-        for result in results:
-            if result['success']:
-                vnr = next(v for v in vnr_queue if v.graph['vnr_id'] == result['vnr_id'])
-
-                # CRITICAL FIX: Use embedding_time for Yu2008 (accounts for retries)
-                # Other algorithms use arrival_time (embedded immediately)
-                embedding_time = result.get('embedding_time', vnr.graph['arrival_time'])
-                departure_time = embedding_time + vnr.graph['lifetime']
-
-                events.append({
-                    'time': embedding_time,
-                    'type': 'ARRIVAL',
-                    'vnr_id': result['vnr_id'],
-                    'result': result,
-                    'vnr': vnr
-                })
-                events.append({
-                    'time': departure_time,
-                    'type': 'DEPARTURE',
-                    'vnr_id': result['vnr_id']
-                })
-        
-        # Sort events by time - CRITICAL: Departures before arrivals at same time
-        events.sort(key=lambda x: (x['time'], x['type'] != 'DEPARTURE'))  # False < True, so DEPARTURE comes first
-        
-        # Track active VNRs and find peak
-        active_vnrs = {}
-        max_active = 0
-        peak_time = 0
-        peak_active = {}
-        
-        for event in events:
-            if event['type'] == 'ARRIVAL':
-                active_vnrs[event['vnr_id']] = {
-                    'result': event['result'],
-                    'vnr': event['vnr']
-                }
-            else:  # DEPARTURE
-                if event['vnr_id'] in active_vnrs:
-                    del active_vnrs[event['vnr_id']]
-            
-            # Check if this is a new peak
-            if len(active_vnrs) > max_active:
-                max_active = len(active_vnrs)
-                peak_time = event['time']
-                peak_active = active_vnrs.copy()
-        
-        # Convert to format expected by resource visualization
-        active_embeddings = {}
-        for vnr_id, data in peak_active.items():
-            result = data['result']
-            vnr = data['vnr']
-            if 'node_mapping' in result and 'link_mapping' in result:
-                active_embeddings[vnr_id] = (
-                    result['node_mapping'],
-                    result['link_mapping'],
-                    vnr
-                )
-        
-        return {
-            'time': peak_time,
-            'count': len(active_embeddings),
-            'active_embeddings': active_embeddings
-        }
-    
     def run_all_experiments(self):
         """Run experiments for all 6 topologies."""
         print("UNIFIED TOPOLOGY EXPERIMENTS")
@@ -630,10 +505,25 @@ class UnifiedTopologyExperiments:
         # Generate substrates (same as substrate figure)
         self.generate_substrates()
         
-        # Run experiment for each topology
+        # Prepare every topology, then run all (topology × algorithm) jobs in one batch
+        prepared = {}
+        jobs = []
+        for topology_name, substrate in self.substrates.items():
+            prepared[topology_name] = self._prepare_topology(topology_name)
+            jobs.extend(self._create_algorithm_jobs(topology_name, substrate, prepared[topology_name][1]))
+        
+        print(f"\nRunning {len(jobs)} algorithm runs ({self.workers} worker(s))...")
+        outcomes = dict(zip((job.key for job in jobs), run_jobs(jobs, self.workers)))
+        
+        # Complete the experiment for each topology
         all_results = {}
         for topology_name, substrate in self.substrates.items():
-            topology_results = self.run_single_topology_experiment(topology_name, substrate)
+            print(f"\n{topology_name.upper()} RESULTS")
+            exp_dir, _ = prepared[topology_name]
+            topology_outcomes = {alg_name: outcomes[(topology_name, alg_name, self.seed)]
+                                 for alg_name in self.algorithms}
+            topology_results = self._complete_topology_experiment(topology_name, substrate, exp_dir,
+                                                                  topology_outcomes)
             all_results[topology_name] = topology_results
         
         print(f"\n{'='*60}")
@@ -13,32 +13,60 @@ Usage:
     python main.py load              # Run load testing experiments  
     python main.py scalability      # Run scalability experiments
     python main.py all              # Run all experiments (LONG!)
+    python main.py all --workers 0  # Run algorithm jobs in parallel (0 = one worker per CPU)
+    python main.py all --isolate    # Run each experiment in its own Python process
+
+Experiments run in this process by default, so imports and the caches
+kept per substrate network (working copies, NodeRank, candidate paths)
+carry over from one experiment to the next.
 """
 
+import importlib
+import os
 import sys
 import subprocess
 import time
 from pathlib import Path
 
+# Experiment runners import each other as top-level modules from this directory
+EXPERIMENTS_DIR = Path(__file__).resolve().parent / 'experiments'
+
 class VNEExperimentCLI:
     """Main CLI interface for VNE algorithm comparison experiments."""
     
     def __init__(self):
+        # Worker processes per experiment script, passed on as VNE_WORKERS (None = script default)
+        self.workers = None
+        
+        # Run each experiment script in a fresh interpreter instead of in this process
+        self.isolate = False
+        
+        # Networks shared by the in-process experiments (see shared_network), kept for the session
+        self.shared_substrates = {}
+        
+        # 'module' is the in-process entry point: its main() takes workers (and
+        # shared_substrates when 'shares_substrates' is set)
         self.experiments = {
             'topology': {
                 'script': 'experiments/run_complete_topology_experiments.py',
+                'module': 'run_complete_topology_experiments',
+                'shares_substrates': True,
                 'description': 'Topology Experiments - Test algorithms across 6 different network topologies',
                 'output': 'experiments/topology_experiment/',
                 'files': '32 files (2 analysis + 18 experiment figures + 12 JSON data files)'
             },
             'load': {
                 'script': 'experiments/run_complete_load_experiments.py', 
+                'module': 'run_complete_load_experiments',
+                'shares_substrates': True,
                 'description': 'Load Testing Experiments - Test algorithms under increasing VNR demand',
                 'output': 'experiments/load_testing_experiment/',
                 'files': '18 files (12 experiment figures + 6 JSON data files)'
             },
             'scalability': {
                 'script': 'experiments/unified_scalability_experiments.py',
+                'module': 'unified_scalability_experiments',
+                'shares_substrates': False,
                 'description': 'Scalability Experiments - Test algorithms across different network sizes',
                 'output': 'experiments/scalability_experiment/',
                 'files': '25 files (1 VNR analysis + 16 experiment figures + 8 JSON data files)'
@@ -77,19 +105,18 @@ class VNEExperimentCLI:
         description = self.experiments[experiment_type]['description']
         
         print(f"Starting {description}...")
-        print(f"Script: {script}")
+        print(f"Script: {script}" + (" (separate process)" if self.isolate else ""))
         print("-" * 60)
         
         start_time = time.time()
         
         try:
-            # Run the experiment script
-            result = subprocess.run([sys.executable, script], 
-                                  capture_output=False, 
-                                  text=True,
-                                  cwd=Path.cwd())
+            if self.isolate:
+                succeeded = self._run_script(script)
+            else:
+                succeeded = self._run_in_process(experiment_type)
             
-            if result.returncode == 0:
+            if succeeded:
                 elapsed = time.time() - start_time
                 print("-" * 60)
                 print(f"✅ {description} completed successfully!")
@@ -97,13 +124,43 @@ class VNEExperimentCLI:
                 print(f"Results saved to: {self.experiments[experiment_type]['output']}")
                 return True
             else:
-                print(f"{description} failed with return code {result.returncode}")
+                print(f"{description} failed")
                 return False
                 
         except Exception as e:
             print(f"Error running {description}: {e}")
             return False
     
+    def _run_script(self, script):
+        """Run an experiment script in a new interpreter; True if it exits with code 0."""
+        env = os.environ.copy()
+        if self.workers is not None:
+            env['VNE_WORKERS'] = str(self.workers)
+        
+        result = subprocess.run([sys.executable, script], 
+                              capture_output=False, 
+                              text=True,
+                              cwd=Path.cwd(),
+                              env=env)
+        if result.returncode != 0:
+            print(f"Script exited with return code {result.returncode}")
+        return result.returncode == 0
+    
+    def _run_in_process(self, experiment_type):
+        """Import an experiment runner and call its main(); True unless it reports failure."""
+        if str(EXPERIMENTS_DIR) not in sys.path:
+            sys.path.insert(0, str(EXPERIMENTS_DIR))
+        
+        info = self.experiments[experiment_type]
+        runner = importlib.import_module(info['module'])
+        if info['shares_substrates']:
+            status = runner.main(self.workers, self.shared_substrates)
+        else:
+            status = runner.main(self.workers)
+        
+        # Runner mains return an exit code, except the scalability runner, which returns its results
+        return not isinstance(status, int) or status == 0
+    
     def run_all_experiments(self):
         """Run all experiments in sequence."""
         print("RUNNING ALL EXPERIMENTS")
@@ -162,6 +219,18 @@ class VNEExperimentCLI:
     
     def run_cli(self, args):
         """Run CLI mode with arguments."""
+        args = list(args)
+        if '--workers' in args:
+            index = args.index('--workers')
+            if index + 1 >= len(args):
+                print("Error: --workers needs a value (number of processes, 0 = one per CPU)")
+                return
+            self.workers = args[index + 1]
+            del args[index:index + 2]
+        if '--isolate' in args:
+            self.isolate = True
+            args.remove('--isolate')
+        
         if len(args) == 0:
             self.interactive_mode()
             return
@@ -0,0 +1,45 @@
+import numpy as np
+
+from ..networks.substrate_state import get_substrate_state
+
+
+def candidate_mask(substrate, vnr):
+    """
+    Substrate nodes able to host each virtual node, as one boolean matrix.
+
+    Returns (vnr_nodes, substrate_nodes, mask) where mask[i, j] is True when
+    substrate node j has at least the residual CPU virtual node i needs and
+    at least as much residual bandwidth on its adjacent links as all of
+    node i's virtual links together. With an attached SubstrateState both
+    vectors come straight from its arrays.
+    """
+    substrate_nodes, cpu_available, adjacent_bandwidth = substrate_resources(substrate)
+    vnr_nodes, cpu_req, bw_req = request_demands(vnr)
+    mask = (cpu_available >= cpu_req[:, None]) & (adjacent_bandwidth >= bw_req[:, None])
+    return vnr_nodes, substrate_nodes, mask
+
+
+def substrate_resources(substrate):
+    """(nodes, residual CPU, residual bandwidth summed over adjacent links) of a substrate."""
+    state = get_substrate_state(substrate)
+    if state is not None:
+        return state.nodes, state.cpu_available, state.adjacent_bandwidth()
+
+    nodes = list(substrate.nodes())
+    cpu_available = np.array([substrate.nodes[n].get('cpu_available', 0) for n in nodes], dtype=float)
+    adjacent_bandwidth = np.array([sum(substrate.edges[n, neighbor].get('bandwidth_available', 0)
+                                       for neighbor in substrate.neighbors(n)) for n in nodes], dtype=float)
+    return nodes, cpu_available, adjacent_bandwidth
+
+
+def request_demands(vnr):
+    """(nodes, CPU demand, bandwidth demand summed over incident virtual links) of a VNR."""
+    nodes = list(vnr.nodes())
+    position = {node: i for i, node in enumerate(nodes)}
+    cpu_req = np.array([vnr.nodes[node].get('cpu_req', 0) for node in nodes], dtype=float)
+    bw_req = np.zeros(len(nodes))
+    for v_edge in vnr.edges():
+        bandwidth = vnr.edges[v_edge].get('bandwidth_req', 0)
+        bw_req[position[v_edge[0]]] += bandwidth
+        bw_req[position[v_edge[1]]] += bandwidth
+    return nodes, cpu_req, bw_req
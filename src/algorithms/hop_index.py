@@ -0,0 +1,72 @@
+import weakref
+
+import networkx as nx
+import numpy as np
+from scipy.sparse.csgraph import shortest_path
+
+from ..networks.substrate_state import get_substrate_state
+
+# Substrates up to this many nodes get a dense all-pairs matrix (uint16, ~8 MB at 2,000 nodes)
+DENSE_NODE_LIMIT = 2000
+
+_UNREACHABLE = np.iinfo(np.uint16).max
+
+# SubstrateState -> HopDistanceIndex; topology is static for the lifetime of a state
+_substrate_indexes = weakref.WeakKeyDictionary()
+
+
+class HopDistanceIndex:
+    """
+    Hop distances between substrate nodes, answered in O(1).
+
+    Small substrates store a dense all-pairs matrix computed with one BFS per
+    node. Large substrates keep a table of bounded-radius BFS balls filled on
+    first use of each source, so only distances up to `radius` are known;
+    anything further is reported as unreachable.
+    """
+
+    def __init__(self, substrate, radius, dense=None):
+        self.radius = radius
+        self.nodes = list(substrate.nodes())
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.dense = len(self.nodes) <= DENSE_NODE_LIMIT if dense is None else dense
+
+        if self.dense:
+            adjacency = nx.to_scipy_sparse_array(substrate, nodelist=self.nodes, weight=None, format='csr')
+            distances = shortest_path(adjacency, directed=False, unweighted=True)
+            distances[np.isinf(distances)] = _UNREACHABLE
+            self.matrix = distances.astype(np.uint16)
+        else:
+            self._substrate = substrate
+            self._balls = {}
+
+    def distance(self, u, v):
+        """Hop count between u and v, or None if unreachable (or beyond radius)."""
+        if self.dense:
+            hops = self.matrix[self.node_index[u], self.node_index[v]]
+            return None if hops == _UNREACHABLE else int(hops)
+
+        ball = self._balls.get(u)
+        if ball is None:
+            ball = nx.single_source_shortest_path_length(self._substrate, u, cutoff=self.radius)
+            self._balls[u] = ball
+        return ball.get(v)
+
+    def within(self, u, v, max_hops):
+        """True if v is reachable from u in at most max_hops hops."""
+        hops = self.distance(u, v)
+        return hops is not None and hops <= max_hops
+
+
+def hop_distance_index(substrate, radius):
+    # Reuse one index per attached SubstrateState; plain graphs get a lazy
+    # bounded-radius table so a single call never pays for all-pairs BFS
+    state = get_substrate_state(substrate)
+    if state is None:
+        return HopDistanceIndex(substrate, radius, dense=False)
+
+    index = _substrate_indexes.get(state)
+    if index is None or (not index.dense and index.radius < radius):
+        index = HopDistanceIndex(substrate, radius)
+        _substrate_indexes[state] = index
+    return index
@@ -1,58 +1,191 @@
+import weakref
+
+import numpy as np
+import scipy.sparse as sp
+
+from ..networks.substrate_state import get_substrate_state
+from ..networks.virtual_request import VirtualRequest
+from ..simulation.instrumentation import current_stats
+
+# SubstrateState -> NodeRankCache; entries go away with their substrate state
+_substrate_caches = weakref.WeakKeyDictionary()
+
+
 def compute_noderank(graph, max_iterations=100, epsilon=0.0001, p_jump=0.15, p_forward=0.85):
-    # Step 1: Calculate H(u) = CPU(u) × Σ BW(l) for each node (Equation 6)
-    H = {}
-    for node in graph.nodes():
-        cpu = (graph.nodes[node].get('cpu_available', 0) or 
-               graph.nodes[node].get('cpu_req', 0) or 
-               graph.nodes[node].get('cpu', 0))
-        total_bandwidth = sum((graph.edges[node, neighbor].get('bandwidth_available', 0) or 
-                              graph.edges[node, neighbor].get('bandwidth_req', 0) or 
-                              graph.edges[node, neighbor].get('bandwidth', 0)) 
-                             for neighbor in graph.neighbors(node))
-        H[node] = cpu * total_bandwidth
-
-    # Step 2: Initialize NR^(0)(u) = H(u) / Σ H(v) (Equation 7)
-    total_H = sum(H.values())
-    if total_H == 0:
+    nodes, H, adjacency = noderank_inputs(graph)
+
+    node_rank, iterations = noderank_power_iteration(H, adjacency, max_iterations=max_iterations, epsilon=epsilon,
+                                                     p_jump=p_jump, p_forward=p_forward)
+    stats = current_stats()
+    if stats is not None:
+        stats.count('noderank_iterations', iterations)
+    if node_rank is None:
         # No resources available - embedding will definitely fail
         return None
-    else:
-        node_rank = {node: H[node] / total_H for node in graph.nodes()}
 
-    # Step 3: Iterative refinement (Algorithm 1)
-    for iteration in range(max_iterations):
-        new_rank = {}
+    return dict(zip(nodes, node_rank.tolist()))
+
+
+def noderank_inputs(graph):
+    # Step 1: Calculate H(u) = CPU(u) × Σ BW(l) for each node (Equation 6)
+    # Residual resources are preferred, then VNR requirements, then capacities
+    if isinstance(graph, VirtualRequest):
+        return _request_noderank_inputs(graph)
+
+    nodes = list(graph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+
+    cpu = np.array([(attrs.get('cpu_available', 0) or
+                     attrs.get('cpu_req', 0) or
+                     attrs.get('cpu', 0))
+                    for _, attrs in graph.nodes(data=True)], dtype=float)
+
+    bandwidth = np.array([(attrs.get('bandwidth_available', 0) or
+                           attrs.get('bandwidth_req', 0) or
+                           attrs.get('bandwidth', 0))
+                          for _, _, attrs in graph.edges(data=True)], dtype=float)
+
+    edge_pairs = [(index[u], index[v]) for u, v in graph.edges()]
+    adjacency, incidence = _topology_matrices(len(nodes), edge_pairs)
+
+    return nodes, cpu * (incidence @ bandwidth), adjacency
+
+
+def _request_noderank_inputs(request):
+    # A VirtualRequest already holds its requirements as arrays and its
+    # adjacency in CSR form, so nothing is read attribute by attribute
+    node_count = len(request)
+    entries = len(request.indices)
+    adjacency = sp.csr_matrix((np.ones(entries), request.indices, request.indptr), shape=(node_count, node_count))
+    incidence = sp.csr_matrix((np.ones(entries), request.edge_ids, request.indptr),
+                              shape=(node_count, request.number_of_edges()))
+    H = request.cpu.astype(float) * (incidence @ request.bandwidth.astype(float))
+    return request.nodes(), H, adjacency
 
-        # Update each node's rank using Equation 10
-        for v in graph.nodes():
 
-            # Part 1: Global influence - Σ_{u∈V} p^J_uv · p^J_u · NR^(t)(u)
-            # where p^J_uv = H(v) / Σ_{w∈V} H(w) (Equation 8)
-            jump_prob_to_v = H[v] / total_H
-            global_influence = jump_prob_to_v * p_jump * sum(node_rank.values())
+def _topology_matrices(node_count, edge_pairs):
+    # Symmetric adjacency A (n × n) and node-edge incidence B (n × m) as CSR
+    # matrices; a self-loop contributes a single entry to each, as in nbr1(u)
+    rows, cols, edge_rows, edge_ids = [], [], [], []
+    for edge_id, (u, v) in enumerate(edge_pairs):
+        rows.append(u)
+        cols.append(v)
+        edge_rows.append(u)
+        edge_ids.append(edge_id)
+        if u != v:
+            rows.append(v)
+            cols.append(u)
+            edge_rows.append(v)
+            edge_ids.append(edge_id)
 
-            # Part 2: Local influence - Σ_{u∈nbr1(v)} p^F_uv · p^F_u · NR^(t)(u)
-            # where p^F_uv = H(v) / Σ_{w∈nbr1(u)} H(w) (Equation 9)
-            local_influence = 0
-            neighbors_of_v = list(graph.neighbors(v))
+    adjacency = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(node_count, node_count))
+    incidence = sp.csr_matrix((np.ones(len(edge_rows)), (edge_rows, edge_ids)), shape=(node_count, len(edge_pairs)))
+    return adjacency, incidence
 
-            for u in neighbors_of_v:
-                neighbors_of_u = list(graph.neighbors(u))
-                total_neighbor_H = sum(H[w] for w in neighbors_of_u)
 
-                if total_neighbor_H > 0:
-                    # p^F_uv = H(v) / Σ_{w∈nbr1(u)} H(w)
-                    forward_prob = H[v] / total_neighbor_H
-                    local_influence += forward_prob * p_forward * node_rank[u]
+def noderank_power_iteration(H, adjacency, start=None, max_iterations=100, epsilon=0.0001,
+                             p_jump=0.15, p_forward=0.85):
+    # Returns (rank vector, iterations run), or (None, 0) if Σ H is zero
+    total_H = H.sum()
+    if total_H == 0:
+        return None, 0
+
+    # Step 2: Initialize NR^(0)(u) = H(u) / Σ H(v) (Equation 7), unless warm-started
+    node_rank = H / total_H if start is None else start
+
+    # p^J_uv = H(v) / Σ_{w∈V} H(w) (Equation 8)
+    jump_prob = H / total_H
 
-            # Combine both influences (Equation 10)
-            new_rank[v] = global_influence + local_influence
+    # p^F_uv = H(v) / Σ_{w∈nbr1(u)} H(w) (Equation 9); nodes with Σ = 0 forward nothing
+    neighbor_H = adjacency @ H
+    inv_neighbor_H = np.divide(1.0, neighbor_H, out=np.zeros_like(neighbor_H), where=neighbor_H > 0)
+
+    # Step 3: Iterative refinement (Algorithm 1), one sparse mat-vec per iteration
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        # Global influence + local influence (Equation 10)
+        global_influence = jump_prob * (p_jump * node_rank.sum())
+        local_influence = H * (p_forward * (adjacency @ (node_rank * inv_neighbor_H)))
+        new_rank = global_influence + local_influence
 
         # Step 4: Check convergence (Algorithm 1, step 6)
-        total_diff = sum(abs(new_rank[node] - node_rank[node]) for node in graph.nodes())
-        if total_diff < epsilon:
+        if np.abs(new_rank - node_rank).sum() < epsilon:
             break
 
         node_rank = new_rank
 
-    return node_rank
+    return node_rank, iterations
+
+
+def compute_substrate_noderank(substrate, max_iterations=100, epsilon=0.0001, p_jump=0.15, p_forward=0.85):
+    # NodeRank cached per attached SubstrateState: unchanged state returns the
+    # previous ranks, changed state warm-starts (see NodeRankCache). Within the
+    # epsilon of compute_noderank, but not identical to it, so near-tied nodes
+    # can rank in a different order depending on the allocation history
+    state = get_substrate_state(substrate)
+    if state is None:
+        return compute_noderank(substrate, max_iterations, epsilon, p_jump, p_forward)
+
+    params = (max_iterations, epsilon, p_jump, p_forward)
+    cache = _substrate_caches.get(state)
+    if cache is None or cache.params != params:
+        cache = NodeRankCache(state, params)
+        _substrate_caches[state] = cache
+
+    return cache.ranks_for(state)
+
+
+class NodeRankCache:
+    """
+    Substrate NodeRank memoised against SubstrateState.version.
+
+    The adjacency and incidence matrices depend only on topology and are built
+    once. When the state version moves, H is rebuilt from the residual arrays
+    and the power iteration restarts from the previous rank vector, which
+    needs far fewer iterations than the uniform H / ΣH start when only a
+    few nodes changed. A new state epoch (reset or restore) starts cold.
+
+    A warm run stops at a different point within epsilon than a cold run
+    on the same residual state would. Ranks therefore match
+    compute_noderank only to about epsilon (up to ~4e-5 observed), and
+    the order of near-tied candidates in RW_BFS and RW_MaxMatch depends
+    on the allocation history since the last reset.
+    """
+
+    def __init__(self, state, params):
+        self.params = params
+        edge_pairs = [(state.node_index[u], state.node_index[v]) for u, v in state.edges]
+        self.adjacency, self.incidence = _topology_matrices(len(state.nodes), edge_pairs)
+
+        self.version = None
+        self.epoch = None
+        self.rank = None
+        self.ranks = None
+        self.iterations = 0
+
+    def ranks_for(self, state):
+        stats = current_stats()
+        if state.version == self.version:
+            if stats is not None:
+                stats.count('noderank_cache_hits')
+            return self.ranks
+
+        # Residual resources, falling back to capacity where exhausted (as in compute_noderank)
+        cpu = np.where(state.cpu_available != 0, state.cpu_available, state.cpu)
+        bandwidth = np.where(state.bandwidth_available != 0, state.bandwidth_available, state.bandwidth)
+        H = cpu * (self.incidence @ bandwidth)
+
+        # Warm start only while the state evolves by allocations; after a reset or
+        # restore the run starts cold, as on a fresh state
+        start = None if self.rank is None or self.epoch != state.epoch else self.rank / self.rank.sum()
+        max_iterations, epsilon, p_jump, p_forward = self.params
+        rank, self.iterations = noderank_power_iteration(H, self.adjacency, start, max_iterations, epsilon,
+                                                         p_jump, p_forward)
+        if stats is not None:
+            stats.count('noderank_iterations', self.iterations)
+
+        self.version = state.version
+        self.epoch = state.epoch
+        self.rank = rank
+        self.ranks = None if rank is None else dict(zip(state.nodes, rank.tolist()))
+        return self.ranks
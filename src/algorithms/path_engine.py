@@ -0,0 +1,319 @@
+import itertools
+import weakref
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+
+from ..networks.substrate_state import get_substrate_state
+from ..simulation.instrumentation import current_stats
+
+# Path metric -> networkx edge weight; edges without a 'cost' attribute count as 1
+PATH_METRICS = {
+    'hops': None,
+    'cost': 'cost',
+}
+
+# Unconstrained candidate paths cached per (source, target, metric)
+CANDIDATE_PATHS = 3
+
+# Estimated bytes of cached candidates per substrate before least recently used pairs are evicted
+PATH_CACHE_BUDGET = 16 * 1024 * 1024
+
+# Rough per-path cost: list + edge-id array headers, then one node and one edge id per hop
+_PATH_OVERHEAD_BYTES = 200
+_PATH_HOP_BYTES = 16
+
+# SubstrateState -> CandidatePathCache; topology is static for the lifetime of a state
+_substrate_path_caches = weakref.WeakKeyDictionary()
+
+
+def feasible_view(substrate, bw_req=None):
+    # Read-only view of the substrate restricted to edges with at least bw_req
+    # residual bandwidth; bw_req=None keeps every edge
+    if bw_req is None:
+        return substrate
+
+    state = get_substrate_state(substrate)
+    if state is not None:
+        feasible = (state.bandwidth_available >= bw_req).tolist()
+        edge_index = state.edge_index
+        return nx.subgraph_view(substrate, filter_edge=lambda u, v: feasible[edge_index[(u, v)]])
+
+    return nx.subgraph_view(
+        substrate, filter_edge=lambda u, v: substrate.edges[u, v].get('bandwidth_available', 0) >= bw_req)
+
+
+def shortest_feasible_path(substrate, source, target, bw_req=None, metric='hops'):
+    # Shortest path that only uses edges able to carry bw_req, or None.
+    # With an attached state the cached candidates are tried first and the
+    # constrained search only runs when none of them has enough bandwidth
+    weight = _path_weight(metric)
+    stats = current_stats()
+    if stats is not None:
+        stats.count('path_searches')
+
+    state = get_substrate_state(substrate)
+    if state is not None:
+        path, exhaustive = candidate_path_cache(substrate).lookup(substrate, source, target, bw_req, metric)
+        if path is not None or exhaustive:
+            return path
+
+    try:
+        path = nx.shortest_path(feasible_view(substrate, bw_req), source, target, weight=weight)
+    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        return None
+    if stats is not None:
+        stats.count('paths_enumerated')
+    return path
+
+
+def first_feasible_candidate(substrate, source, target, bw_req=None, metric='hops', k=CANDIDATE_PATHS):
+    # First of the k shortest unconstrained paths with at least bw_req residual
+    # bandwidth on every edge, or None even if a longer detour would fit; the
+    # bounded link mapping of the Yu2008 and RW_MaxMatch baselines. With an
+    # attached state whose candidate cache holds k paths it is one lookup
+    stats = current_stats()
+    if stats is not None:
+        stats.count('path_searches')
+
+    state = get_substrate_state(substrate)
+    if state is not None:
+        cache = candidate_path_cache(substrate)
+        if cache.k == k:
+            return cache.lookup(substrate, source, target, bw_req, metric)[0]
+
+    try:
+        for path in itertools.islice(nx.shortest_simple_paths(substrate, source, target, weight=_path_weight(metric)),
+                                     k):
+            if stats is not None:
+                stats.count('paths_enumerated')
+                stats.count('bandwidth_checks')
+            if bw_req is None or all(substrate.edges[path[i], path[i + 1]].get('bandwidth_available', 0) >= bw_req
+                                     for i in range(len(path) - 1)):
+                return path
+    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        pass
+    return None
+
+
+def bounded_feasible_path(substrate, source, target, bw_req=None, max_hops=None):
+    # Fewest-hop path over edges with at least bw_req residual bandwidth, or
+    # None if there is none within max_hops hops (None = no limit). BFS runs
+    # from both ends, always growing the smaller frontier by one level, so the
+    # work stays within radius ~max_hops/2 of each end however large the
+    # substrate is; the first meeting found is a shortest path
+    stats = current_stats()
+    if stats is not None:
+        stats.count('path_searches')
+    if source == target:
+        return [source]
+
+    adjacency = substrate.adj
+    forward, backward = {source: None}, {target: None}  # node -> predecessor towards that end
+    forward_frontier, backward_frontier = [source], [target]
+    hops = 0
+    while forward_frontier and backward_frontier and (max_hops is None or hops < max_hops):
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+
+        next_frontier = []
+        for u in frontier:
+            for v, attrs in adjacency[u].items():
+                if v in parents or (bw_req is not None and attrs.get('bandwidth_available', 0) < bw_req):
+                    continue
+                parents[v] = u
+                if v in others:
+                    if stats is not None:
+                        stats.count('paths_enumerated')
+                    return _join_paths(forward, backward, v)
+                next_frontier.append(v)
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+        hops += 1
+    return None
+
+
+def _join_paths(forward, backward, meeting):
+    # source ... meeting ... target from the two BFS predecessor maps
+    path = []
+    node = meeting
+    while node is not None:
+        path.append(node)
+        node = forward[node]
+    path.reverse()
+    node = backward[meeting]
+    while node is not None:
+        path.append(node)
+        node = backward[node]
+    return path
+
+
+def k_shortest_feasible_paths(substrate, source, target, bw_req=None, metric='hops'):
+    # Lazily yield loop-free feasible paths in increasing length (Yen's algorithm);
+    # callers take as many as they need with itertools.islice
+    weight = _path_weight(metric)
+    stats = current_stats()
+    try:
+        for path in nx.shortest_simple_paths(feasible_view(substrate, bw_req), source, target, weight=weight):
+            if stats is not None:
+                stats.count('paths_enumerated')
+            yield path
+    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        return
+
+
+def candidate_path_cache(substrate, k=None, memory_budget=None):
+    """
+    Return the CandidatePathCache of an attached substrate, creating it on first use.
+
+    Passing k or memory_budget reconfigures the cache: a different k drops
+    the cached candidates, a smaller budget evicts down to it.
+    """
+    state = get_substrate_state(substrate)
+    if state is None:
+        raise ValueError("Candidate path caching requires a substrate with an attached SubstrateState")
+
+    cache = _substrate_path_caches.get(state)
+    if cache is None:
+        cache = CandidatePathCache(state, k or CANDIDATE_PATHS,
+                                   PATH_CACHE_BUDGET if memory_budget is None else memory_budget)
+        _substrate_path_caches[state] = cache
+    else:
+        cache.configure(k, memory_budget)
+    return cache
+
+
+class CandidatePathCache:
+    """
+    Shortest unconstrained paths of each (source, target, metric) pair.
+
+    Topology does not change while residual bandwidth changes on every
+    embedding, so candidates are computed once and each lookup only filters
+    them by current bandwidth. A new pair starts with its single shortest
+    path; the k shortest (Yen's algorithm) are only computed the first time
+    that path lacks bandwidth. Every candidate keeps its substrate edge
+    indices, making the filter one array gather per path.
+
+    Pairs are evicted least recently used once the estimated size of the
+    cached paths exceeds `memory_budget` bytes.
+    """
+
+    def __init__(self, state, k, memory_budget):
+        self.edge_index = state.edge_index
+        self.bandwidth_available = state.bandwidth_available
+        self.k = k
+        self.memory_budget = memory_budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def configure(self, k=None, memory_budget=None):
+        if k is not None and k != self.k:
+            self.k = k
+            self.clear()
+        if memory_budget is not None:
+            self.memory_budget = memory_budget
+            self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def lookup(self, substrate, source, target, bw_req=None, metric='hops'):
+        """
+        Return (path, exhaustive) for a node pair.
+
+        path is the shortest cached candidate with at least bw_req residual
+        bandwidth on every edge, or None. exhaustive is True when the
+        candidates are every simple path between the pair, in which case
+        None means no feasible path exists at all.
+        """
+        stats = current_stats()
+        key = (source, target, metric)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            try:
+                paths = [nx.shortest_path(substrate, source, target, weight=_path_weight(metric))]
+            except (nx.NetworkXNoPath, nx.NodeNotFound):
+                paths = []
+            if stats is not None:
+                stats.count('paths_enumerated', len(paths))
+            entry = _CandidatePaths()
+            self._entries[key] = entry
+            self._store(entry, paths, expanded=not paths or len(paths[0]) == 1)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        path = self._first_feasible(entry, bw_req, stats)
+        if path is None and not entry.expanded:
+            paths = list(itertools.islice(
+                nx.shortest_simple_paths(substrate, source, target, weight=_path_weight(metric)), self.k))
+            if stats is not None:
+                stats.count('paths_enumerated', len(paths))
+            # Keep the stored shortest path first so a lookup never depends on
+            # whether an earlier lookup expanded the pair
+            first = entry.paths[0]
+            if first in paths:
+                paths.remove(first)
+            else:
+                paths = paths[:self.k - 1]
+            self._store(entry, [first] + paths, expanded=True)
+            path = self._first_feasible(entry, bw_req, stats)
+
+        return path, entry.expanded and len(entry.paths) < self.k
+
+    def _store(self, entry, paths, expanded):
+        edge_index = self.edge_index
+        self.size -= entry.nbytes
+        entry.paths = paths
+        entry.edge_ids = [np.array([edge_index[(path[i], path[i + 1])] for i in range(len(path) - 1)],
+                                   dtype=np.intp)
+                          for path in paths]
+        entry.expanded = expanded
+        entry.nbytes = sum(_PATH_OVERHEAD_BYTES + _PATH_HOP_BYTES * len(path) for path in paths)
+        self.size += entry.nbytes
+        self._evict()
+
+    def _first_feasible(self, entry, bw_req, stats=None):
+        # Candidates are in increasing length, so the first one that fits is a shortest feasible path
+        available = self.bandwidth_available
+        for path, edge_ids in zip(entry.paths, entry.edge_ids):
+            if stats is not None:
+                stats.count('bandwidth_checks')
+            if bw_req is None or not len(edge_ids) or available[edge_ids].min() >= bw_req:
+                return path
+        return None
+
+    def _evict(self):
+        # The most recently used pair is kept even if it alone exceeds the budget
+        while self.size > self.memory_budget and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self.size -= entry.nbytes
+
+
+class _CandidatePaths:
+    __slots__ = ('paths', 'edge_ids', 'expanded', 'nbytes')
+
+    def __init__(self):
+        self.paths = []
+        self.edge_ids = []
+        self.expanded = False
+        self.nbytes = 0
+
+
+def _path_weight(metric):
+    if metric not in PATH_METRICS:
+        raise ValueError(f"Unsupported path metric: {metric}")
+    return PATH_METRICS[metric]
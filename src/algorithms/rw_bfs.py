@@ -1,24 +1,59 @@
+import time
+
 import networkx as nx
-from .noderank import compute_noderank
+import numpy as np
+from ..simulation.instrumentation import current_stats, timed
+from .candidates import candidate_mask
+from .noderank import compute_noderank, compute_substrate_noderank
+from .hop_index import hop_distance_index
+from .path_engine import bounded_feasible_path, shortest_feasible_path
+
+# Candidate checks allowed per request in 'backjump' search
+DEFAULT_MAX_EXPANSIONS = 10000
+
+def rw_bfs_algorithm(substrate, vnr, max_hop=3, max_backtrack=3, path_metric='hops', search='backtrack',
+                     max_expansions=DEFAULT_MAX_EXPANSIONS, time_budget=None, path_radius=None):
+    # search: 'backtrack' (the original search, at most max_backtrack steps
+    # back) or 'backjump' (complete search with conflict-directed backjumping
+    # and a nogood memo, see bfs_embedding_with_backjumping, bounded by
+    # max_expansions candidate checks and time_budget seconds; None = no limit)
+    # path_radius: map virtual links with a bidirectional BFS limited to this
+    # many hops (bounded_feasible_path) instead of an unbounded shortest path
+    # search; only for path_metric='hops'
+    if search not in ('backtrack', 'backjump'):
+        raise ValueError(f"Unknown RW_BFS search: {search}")
+    if path_radius is not None and path_metric != 'hops':
+        raise ValueError("path_radius bounds hop counts and needs path_metric='hops'")
+    stats = current_stats()
 
-def rw_bfs_algorithm(substrate, vnr, max_hop=3, max_backtrack=3):
     # Step 1: Compute NodeRank for both networks
-    substrate_noderank = compute_noderank(substrate)
-    vnr_noderank = compute_noderank(vnr)
+    with timed(stats, 'noderank'):
+        substrate_noderank = compute_substrate_noderank(substrate)
+        vnr_noderank = compute_noderank(vnr)
 
     if substrate_noderank is None or vnr_noderank is None:
         return None, None, False
 
     # Step 2: Construct BFS tree and sort nodes by NodeRank
-    bfs_order, bfs_parents = construct_bfs_tree_order(vnr, vnr_noderank)
+    with timed(stats, 'bfs_order'):
+        bfs_order, bfs_parents = construct_bfs_tree_order(vnr, vnr_noderank)
 
     # Step 3: Build candidate substrate node lists
-    candidate_lists = build_candidate_lists(substrate, vnr, substrate_noderank)
-
-    # Step 4: BFS embedding with backtracking
-    node_mapping, link_mapping, success = bfs_embedding_with_backtracking(
-        substrate, vnr, bfs_order, bfs_parents, candidate_lists, 
-        substrate_noderank, max_hop, max_backtrack)
+    with timed(stats, 'candidate_lists'):
+        candidate_lists = build_candidate_lists(substrate, vnr, substrate_noderank)
+
+    # Step 4: BFS embedding with backtracking (hop checks answered from a precomputed index)
+    with timed(stats, 'hop_index'):
+        hop_index = hop_distance_index(substrate, max_hop)
+    with timed(stats, 'search'):
+        if search == 'backjump':
+            node_mapping, link_mapping, success = bfs_embedding_with_backjumping(
+                substrate, vnr, bfs_order, bfs_parents, candidate_lists, max_hop, hop_index, path_metric,
+                max_expansions, time_budget, path_radius)
+        else:
+            node_mapping, link_mapping, success = bfs_embedding_with_backtracking(
+                substrate, vnr, bfs_order, bfs_parents, candidate_lists,
+                substrate_noderank, max_hop, max_backtrack, hop_index, path_metric, path_radius)
 
     return node_mapping, link_mapping, success
 
@@ -53,41 +88,34 @@ def construct_bfs_tree_order(vnr, vnr_noderank):
 
 
 def build_candidate_lists(substrate, vnr, substrate_noderank):
-    candidate_lists = {}
-
-    for vnr_node in vnr.nodes():
-        cpu_req = vnr.nodes[vnr_node].get('cpu_req', 0)
-        
-        # Calculate total bandwidth requirement for this VNR node
-        total_bw_req = sum(vnr.edges[vnr_node, neighbor].get('bandwidth_req', 0) for neighbor in vnr.neighbors(vnr_node))
-
-        # Find candidate substrate nodes
-        candidates = []
-        for sub_node in substrate.nodes():
-            cpu_available = substrate.nodes[sub_node].get('cpu_available', 0)
+    # Substrate nodes with enough residual CPU and adjacent bandwidth for each
+    # VNR node, by decreasing NodeRank (ties keep substrate order): one mask
+    # over all (VNR node, substrate node) pairs and a single argsort
+    vnr_nodes, substrate_nodes, feasible = candidate_mask(substrate, vnr)
+    rank = np.fromiter((substrate_noderank[n] for n in substrate_nodes), dtype=float, count=len(substrate_nodes))
+    order = np.argsort(-rank, kind='stable')
+    ranked_feasible = feasible[:, order]
 
-            # Calculate total available bandwidth for substrate node
-            total_bw_available = sum(substrate.edges[sub_node, neighbor].get('bandwidth_available', 0) for neighbor in substrate.neighbors(sub_node))
-
-            # Check if substrate node can satisfy requirements
-            if cpu_available >= cpu_req and total_bw_available >= total_bw_req:
-                candidates.append(sub_node)
-
-        # Sort candidates by NodeRank (decreasing order)
-        candidates.sort(key=lambda n: substrate_noderank[n], reverse=True)
-        candidate_lists[vnr_node] = candidates
+    candidate_lists = {}
+    for i, vnr_node in enumerate(vnr_nodes):
+        candidate_lists[vnr_node] = [substrate_nodes[j] for j in order[ranked_feasible[i]].tolist()]
 
     return candidate_lists
 
 
 def bfs_embedding_with_backtracking(substrate, vnr, bfs_order, bfs_parents, 
-                                    candidate_lists, substrate_noderank, max_hop, max_backtrack):
+                                    candidate_lists, substrate_noderank, max_hop, max_backtrack, hop_index=None,
+                                    path_metric='hops', path_radius=None):
     node_mapping = {}
     link_mapping = {}
     backtrack_count = 0
     current_index = 0
+    stats = current_stats()
     # Track which candidates have been tried for each VNR node
     tried_candidates = {vnr_node: set() for vnr_node in bfs_order}
+    # Undo log: link keys added by the match at each BFS position, so a
+    # backtrack removes exactly those instead of rebuilding link_mapping
+    added_links = []
 
     while current_index < len(bfs_order):
         vnr_node = bfs_order[current_index]
@@ -97,13 +125,14 @@ def bfs_embedding_with_backtracking(substrate, vnr, bfs_order, bfs_parents,
 
         # Try to match current VNR node
         match_result = match_vnr_node(substrate, vnr, vnr_node, available_candidates, 
-                                    node_mapping, link_mapping, bfs_parents, max_hop)
+                                    node_mapping, link_mapping, bfs_parents, max_hop, hop_index, path_metric,
+                                    path_radius)
 
         if match_result['success']:
             # Update mappings
             node_mapping[vnr_node] = match_result['substrate_node']
-            if match_result['link_mappings']:
-                link_mapping.update(match_result['link_mappings'])
+            link_mapping.update(match_result['link_mappings'])
+            added_links.append(list(match_result['link_mappings']))
             current_index += 1
         else:
             # No more candidates available for this node
@@ -122,9 +151,12 @@ def bfs_embedding_with_backtracking(substrate, vnr, bfs_order, bfs_parents,
                     del node_mapping[prev_vnr_node]
 
                 # Remove related link mappings
-                link_mapping = {k: v for k, v in link_mapping.items() if prev_vnr_node not in k}
+                for key in added_links.pop():
+                    del link_mapping[key]
 
                 backtrack_count += 1
+                if stats is not None:
+                    stats.count('backtracks')
             else:
                 # Exceeded backtrack limit or at root - fail
                 return None, None, False
@@ -132,13 +164,146 @@ def bfs_embedding_with_backtracking(substrate, vnr, bfs_order, bfs_parents,
     return node_mapping, link_mapping, True
 
 
+def bfs_embedding_with_backjumping(substrate, vnr, bfs_order, bfs_parents, candidate_lists, max_hop,
+                                   hop_index=None, path_metric='hops', max_expansions=DEFAULT_MAX_EXPANSIONS,
+                                   time_budget=None, path_radius=None):
+    # Same candidates, hop limit and link checks as the backtracking search
+    # (candidates within 1 hop of the parent first, then 2, ...), but complete:
+    # - every rejected candidate is blamed on the earlier BFS positions that
+    #   caused it (host taken, parent too far, no feasible path to a mapped
+    #   neighbour); an exhausted position jumps straight back to the latest
+    #   blamed one, skipping positions whose choices cannot fix the failure
+    # - the blamed part of the assignment is stored as a nogood of the exhausted
+    #   position, which then fails at once whenever those hosts reappear
+    # - the search stops after max_expansions candidate checks or time_budget
+    #   seconds (None for no limit); an exhausted budget rejects the request
+    if hop_index is None:
+        hop_index = hop_distance_index(substrate, max_hop)
+    stats = current_stats()
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+    position = {vnr_node: i for i, vnr_node in enumerate(bfs_order)}
+    size = len(bfs_order)
+    node_mapping = {}
+    link_mapping = {}
+    hosts = [None] * size           # substrate node chosen at each position
+    added_links = [None] * size     # link mapping keys added at each position
+    conflicts = [None] * size       # positions blamed for the rejections at each position
+    remaining = [None] * size       # iterator over the untried candidates of each position
+    nogoods = [[] for _ in range(size)]  # per position: ((position, host), ...) it cannot be extended from
+    used = {}                       # substrate node -> position hosting it
+    paths = {}                      # (source, target, bandwidth) -> feasible path or None
+    new_links = {}                  # links of the candidate being checked
+    expansions = 0
+
+    def enter(i):
+        # Start position i afresh: fail at once if a nogood applies, else order its candidates
+        for nogood in nogoods[i]:
+            if all(hosts[p] == host for p, host in nogood):
+                if stats is not None:
+                    stats.count('nogood_hits')
+                conflicts[i] = {p for p, _ in nogood}
+                remaining[i] = iter(())
+                return
+
+        conflicts[i] = set()
+        parent = bfs_parents.get(bfs_order[i])
+        if parent is None:
+            remaining[i] = iter(candidate_lists[bfs_order[i]])
+            return
+
+        # Bucketing by hop distance to the parent's host keeps NodeRank order within a bucket
+        parent_host = hosts[position[parent]]
+        buckets = [[] for _ in range(max_hop)]
+        for sub_node in candidate_lists[bfs_order[i]]:
+            hops = hop_index.distance(sub_node, parent_host)
+            if hops is None or hops > max_hop:
+                conflicts[i].add(position[parent])
+            else:
+                buckets[max(hops, 1) - 1].append(sub_node)
+        remaining[i] = (sub_node for bucket in buckets for sub_node in bucket)
+
+    def blame(i, sub_node):
+        # None if sub_node can host position i (its links are left in new_links), else the blamed positions
+        vnr_node = bfs_order[i]
+        if sub_node in used:
+            return {used[sub_node]}
+        if substrate.nodes[sub_node].get('cpu_available', 0) < vnr.nodes[vnr_node].get('cpu_req', 0):
+            return set()
+        new_links.clear()
+        for neighbor in vnr.neighbors(vnr_node):
+            j = position[neighbor]
+            if j >= i:
+                continue
+            bw_req = vnr.edges[vnr_node, neighbor].get('bandwidth_req', 0)
+            key = (sub_node, hosts[j], bw_req)
+            if key not in paths:
+                paths[key] = link_path(substrate, sub_node, hosts[j], bw_req, path_metric, path_radius)
+            if paths[key] is None:
+                return {j}
+            new_links[(vnr_node, neighbor)] = paths[key]
+        return None
+
+    i = 0
+    enter(0)
+    while i < size:
+        placed = False
+        for sub_node in remaining[i]:
+            expansions += 1
+            if stats is not None:
+                stats.count('candidates_tried')
+            if (max_expansions is not None and expansions > max_expansions) or \
+                    (deadline is not None and time.perf_counter() > deadline):
+                return None, None, False
+
+            culprits = blame(i, sub_node)
+            if culprits is None:
+                hosts[i] = sub_node
+                used[sub_node] = i
+                node_mapping[bfs_order[i]] = sub_node
+                link_mapping.update(new_links)
+                added_links[i] = list(new_links)
+                placed = True
+                break
+            conflicts[i] |= culprits
+
+        if placed:
+            i += 1
+            if i < size:
+                enter(i)
+            continue
+
+        # Position i is exhausted: remember why, then jump back to the latest culprit
+        culprits = conflicts[i]
+        if not culprits:
+            return None, None, False
+        nogoods[i].append(tuple((p, hosts[p]) for p in sorted(culprits)))
+        target = max(culprits)
+        conflicts[target] |= culprits - {target}
+        for p in range(i - 1, target - 1, -1):
+            del used[hosts[p]]
+            del node_mapping[bfs_order[p]]
+            for key in added_links[p]:
+                del link_mapping[key]
+            hosts[p] = None
+        i = target
+        if stats is not None:
+            stats.count('backtracks')
+
+    return node_mapping, link_mapping, True
+
+
 def match_vnr_node(substrate, vnr, vnr_node, candidates, current_node_mapping, 
-                current_link_mapping, bfs_parents, max_hop):
+                current_link_mapping, bfs_parents, max_hop, hop_index=None, path_metric='hops',
+                path_radius=None):
     cpu_req = vnr.nodes[vnr_node].get('cpu_req', 0)
+    stats = current_stats()
 
     # If this is the root node (first node), map to best candidate
     if not current_node_mapping:
         for sub_node in candidates:
+            if stats is not None:
+                stats.count('candidates_tried')
             if substrate.nodes[sub_node].get('cpu_available', 0) >= cpu_req:
                 return {
                     'success': True,
@@ -155,12 +320,14 @@ def match_vnr_node(substrate, vnr, vnr_node, candidates, current_node_mapping,
                 continue
 
             # Check CPU constraint
+            if stats is not None:
+                stats.count('candidates_tried')
             if substrate.nodes[sub_node].get('cpu_available', 0) < cpu_req:
                 continue
 
             # Check hop constraint - find if there's a path within k hops from parent
             hop_constraint_satisfied = check_hop_constraint(substrate, vnr_node, sub_node, 
-                                                            current_node_mapping, bfs_parents, k)
+                                                            current_node_mapping, bfs_parents, k, hop_index)
 
             if hop_constraint_satisfied:
                 # Try to map all edges from this VNR node to already mapped neighbors
@@ -173,28 +340,14 @@ def match_vnr_node(substrate, vnr, vnr_node, candidates, current_node_mapping,
                         neighbor_sub_node = current_node_mapping[neighbor]
                         bw_req = vnr.edges[vnr_node, neighbor].get('bandwidth_req', 0)
 
-                        # Find shortest path
-                        try:
-                            path = nx.shortest_path(substrate, sub_node, neighbor_sub_node)
-
-                            # Check bandwidth availability on path
-                            path_feasible = True
-                            for i in range(len(path) - 1):
-                                edge_bw = substrate.edges[path[i], path[i+1]].get('bandwidth_available', 0)
-                                if edge_bw < bw_req:
-                                    path_feasible = False
-                                    break
-
-                            if path_feasible:
-                                link_mappings[(vnr_node, neighbor)] = path
-                            else:
-                                all_links_mappable = False
-                                break
-
-                        except nx.NetworkXNoPath:
+                        # Find shortest path over links with enough bandwidth
+                        path = link_path(substrate, sub_node, neighbor_sub_node, bw_req, path_metric, path_radius)
+                        if path is None:
                             all_links_mappable = False
                             break
 
+                        link_mappings[(vnr_node, neighbor)] = path
+
                 if all_links_mappable:
                     return {
                         'success': True,
@@ -205,7 +358,7 @@ def match_vnr_node(substrate, vnr, vnr_node, candidates, current_node_mapping,
     return {'success': False}
 
 
-def check_hop_constraint(substrate, vnr_node, sub_node, current_node_mapping, bfs_parents, max_k):
+def check_hop_constraint(substrate, vnr_node, sub_node, current_node_mapping, bfs_parents, max_k, hop_index=None):
     parent_node = bfs_parents.get(vnr_node)
 
     # Root node has no parent - always satisfies constraint
@@ -214,8 +367,17 @@ def check_hop_constraint(substrate, vnr_node, sub_node, current_node_mapping, bf
 
     # Check distance to parent's substrate node
     parent_sub_node = current_node_mapping[parent_node]
+    if hop_index is not None:
+        return hop_index.within(sub_node, parent_sub_node, max_k)
     try:
         distance = nx.shortest_path_length(substrate, sub_node, parent_sub_node)
         return distance <= max_k
     except nx.NetworkXNoPath:
         return False
+
+
+def link_path(substrate, source, target, bw_req, path_metric='hops', path_radius=None):
+    # Substrate path for a virtual link: bounded bidirectional BFS when a radius is set
+    if path_radius is not None:
+        return bounded_feasible_path(substrate, source, target, bw_req, path_radius)
+    return shortest_feasible_path(substrate, source, target, bw_req, path_metric)
@@ -1,22 +1,39 @@
-import networkx as nx
-import itertools
-from .noderank import compute_noderank
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_bipartite_matching, min_weight_full_bipartite_matching
+
+from ..simulation.instrumentation import current_stats, timed
+from .candidates import candidate_mask
+from .noderank import compute_noderank, compute_substrate_noderank
+from .path_engine import CANDIDATE_PATHS, first_feasible_candidate, shortest_feasible_path
+
+def rw_maxmatch_algorithm(substrate, vnr, path_metric='hops', node_mapper='l2s2', path_candidates=CANDIDATE_PATHS):
+    # node_mapper: 'l2s2' (greedy large-to-large scan, Algorithm 2) or
+    # 'matching' (NodeRank-weighted bipartite matching, see
+    # rw_maxmatch_matching_node_mapping)
+    # path_candidates: virtual links only use one of the k shortest substrate
+    # paths (Algorithm 3, k=3); None searches for any feasible detour instead
+    if node_mapper not in NODE_MAPPERS:
+        raise ValueError(f"Unknown RW_MaxMatch node mapper: {node_mapper}")
+    stats = current_stats()
 
-def rw_maxmatch_algorithm(substrate, vnr):
     # Step 1: Compute NodeRank for both networks
-    substrate_noderank = compute_noderank(substrate)
-    vnr_noderank = compute_noderank(vnr)
+    with timed(stats, 'noderank'):
+        substrate_noderank = compute_substrate_noderank(substrate)
+        vnr_noderank = compute_noderank(vnr)
 
     if substrate_noderank is None or vnr_noderank is None:
         return None, None, False
 
     # Step 2: Node mapping (Algorithm 2)
-    node_mapping, success = rw_maxmatch_node_mapping(substrate, vnr, substrate_noderank, vnr_noderank)
+    with timed(stats, 'node_mapping'):
+        node_mapping, success = NODE_MAPPERS[node_mapper](substrate, vnr, substrate_noderank, vnr_noderank)
     if not success:
         return None, None, False
 
     # Step 3: Link mapping (Algorithm 3)
-    link_mapping, success = rw_maxmatch_link_mapping(substrate, vnr, node_mapping)
+    with timed(stats, 'link_mapping'):
+        link_mapping, success = rw_maxmatch_link_mapping(substrate, vnr, node_mapping, path_metric, path_candidates)
 
     return node_mapping, link_mapping, success
 
@@ -30,6 +47,8 @@ def rw_maxmatch_node_mapping(substrate, vnr, substrate_noderank, vnr_noderank):
 
     # Step 3: L2S2 mapping (large-to-large, small-to-small)
     node_mapping = {}
+    used_substrate_nodes = set()
+    stats = current_stats()
 
     for vnr_node in sorted_vnr_nodes:
         cpu_req = vnr.nodes[vnr_node].get('cpu_req', 0)
@@ -38,13 +57,16 @@ def rw_maxmatch_node_mapping(substrate, vnr, substrate_noderank, vnr_noderank):
         # Try substrate nodes in order of their NodeRank
         for substrate_node in sorted_substrate_nodes:
             # Check if already mapped (intra-VNR separation constraint)
-            if substrate_node in node_mapping.values():
+            if substrate_node in used_substrate_nodes:
                 continue
 
             # Check CPU capacity constraint
+            if stats is not None:
+                stats.count('candidates_tried')
             cpu_available = substrate.nodes[substrate_node].get('cpu_available', 0)
             if cpu_available >= cpu_req:
                 node_mapping[vnr_node] = substrate_node
+                used_substrate_nodes.add(substrate_node)
                 mapped = True
                 break
 
@@ -54,7 +76,38 @@ def rw_maxmatch_node_mapping(substrate, vnr, substrate_noderank, vnr_noderank):
     return node_mapping, True
 
 
-def rw_maxmatch_link_mapping(substrate, vnr, node_mapping):
+def rw_maxmatch_matching_node_mapping(substrate, vnr, substrate_noderank, vnr_noderank):
+    # Node mapping as an assignment problem: a virtual node may go to any
+    # substrate node with enough residual CPU and enough residual bandwidth on
+    # its adjacent links for all of its virtual links. Hopcroft–Karp first
+    # checks that every virtual node can get a distinct host; the assignment
+    # then maximises the summed NodeRank products, the large-to-large pairing
+    # of L2S2 without its greedy dead ends.
+    vnr_nodes, substrate_nodes, feasible = candidate_mask(substrate, vnr)
+    stats = current_stats()
+    if stats is not None:
+        stats.count('candidates_tried', feasible.size)
+
+    if len(vnr_nodes) > len(substrate_nodes) or not feasible.any(axis=1).all():
+        return None, False
+    rows, cols = np.nonzero(feasible)
+    shape = feasible.shape
+    pairs = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+    if (maximum_bipartite_matching(pairs, perm_type='column') < 0).any():
+        return None, False
+
+    # Costs in [1, 2]: lowest for the largest rank product (zero would read as a missing edge)
+    vnr_rank = np.array([vnr_noderank[v_node] for v_node in vnr_nodes])
+    substrate_rank = np.array([substrate_noderank[s_node] for s_node in substrate_nodes])
+    product = vnr_rank[rows] * substrate_rank[cols]
+    cost = 2.0 - product / (product.max() or 1.0)
+    vnr_ids, substrate_ids = min_weight_full_bipartite_matching(csr_matrix((cost, (rows, cols)), shape=shape))
+
+    node_mapping = {vnr_nodes[i]: substrate_nodes[j] for i, j in zip(vnr_ids.tolist(), substrate_ids.tolist())}
+    return node_mapping, True
+
+
+def rw_maxmatch_link_mapping(substrate, vnr, node_mapping, path_metric='hops', path_candidates=CANDIDATE_PATHS):
     link_mapping = {}
 
     # Map each virtual link to a substrate path
@@ -64,34 +117,23 @@ def rw_maxmatch_link_mapping(substrate, vnr, node_mapping):
         s_dst = node_mapping[v_dst]
         bw_req = vnr.edges[v_edge].get('bandwidth_req', 0)
 
-        # Try k-shortest paths (starting with k=1)
-        path_found = False
-        for k in range(1, 4):
-            try:
-                # Get only k paths, not ALL paths (critical performance fix)
-                paths = list(itertools.islice(nx.shortest_simple_paths(substrate, s_src, s_dst), k))
-                if len(paths) < k:
-                    break  # No more paths available
-
-                path = paths[k-1]  # Get the k-th shortest path
-
-                # Check if this path has enough bandwidth on all links
-                can_allocate = True
-                for i in range(len(path) - 1):
-                    edge_bw = substrate.edges[path[i], path[i+1]].get('bandwidth_available', 0)
-                    if edge_bw < bw_req:
-                        can_allocate = False
-                        break
-
-                if can_allocate:
-                    link_mapping[v_edge] = path
-                    path_found = True
-                    break  # Found a suitable path, move to next virtual link
-
-            except (nx.NetworkXNoPath, nx.NetworkXError):
-                break  # No more paths to try
-
-        if not path_found:
+        # First of the k-shortest paths that has enough bandwidth on every link
+        path = _link_path(substrate, s_src, s_dst, bw_req, path_metric, path_candidates)
+        if path is None:
             return None, False
 
+        link_mapping[v_edge] = path
+
     return link_mapping, True
+
+
+def _link_path(substrate, source, target, bw_req, path_metric, path_candidates):
+    if path_candidates is None:
+        return shortest_feasible_path(substrate, source, target, bw_req, path_metric)
+    return first_feasible_candidate(substrate, source, target, bw_req, path_metric, path_candidates)
+
+
+NODE_MAPPERS = {
+    'l2s2': rw_maxmatch_node_mapping,
+    'matching': rw_maxmatch_matching_node_mapping,
+}
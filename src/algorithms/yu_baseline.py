@@ -1,9 +1,16 @@
-import networkx as nx
-import itertools
+from ..networks.resource_ledger import ResourceLedger
+from ..networks.substrate_state import get_substrate_state
+from ..networks.virtual_request import VirtualRequest
+from ..simulation.event_scheduler import EventScheduler
+from ..simulation.instrumentation import EmbeddingStats, collect_phase
+from .path_engine import CANDIDATE_PATHS, first_feasible_candidate, shortest_feasible_path
 
 def calculate_revenue(vnr):
     revenue = total_bandwidth = total_cpu = 0
     alpha = 2  # adjustable for balance
+    if isinstance(vnr, VirtualRequest):
+        return vnr.cpu.sum().item() * alpha + vnr.bandwidth.sum().item()
+
     for node in vnr.nodes():
         total_cpu += vnr.nodes[node]['cpu_req']
 
@@ -33,12 +40,20 @@ def create_chunks(vnr_queue, time_window=25):
     return chunks
         
 
-def yu2008_algorithm(substrate, vnr_chunks, time_window=25):
+def yu2008_algorithm(substrate, vnr_chunks, time_window=25, path_metric='hops', instrument=False, results=None,
+                     path_candidates=CANDIDATE_PATHS):
     # Yu 2008 Baseline Algorithm - CHUNKED APPROACH
     # CRITICAL: This algorithm works with time windows/chunks,
     # NOT individual VNRs like the other algorithms.
+    # instrument=True adds each VNR's phase times and counters (see
+    # EmbeddingStats), summed over its attempts, to its result as 'stats'.
+    # If `results` is given, a VNR's record is appended to it at the end of
+    # the chunk that settles it (embedded, or failed without another retry),
+    # so an interrupted run keeps the records of the chunks it finished.
+    # Virtual links only use one of the `path_candidates` shortest substrate
+    # paths (k=3 in the baseline); None searches for any feasible detour
     
-    # Historical mappings for metrics calculation (never deleted)
+    # Historical mappings for metrics calculation (never deleted), vnr_id -> {element: substrate}
     historical_node_mapping = {}
     historical_link_mapping = {}
     
@@ -51,7 +66,13 @@ def yu2008_algorithm(substrate, vnr_chunks, time_window=25):
                 'vnr_object': vnr
             }
 
+    state = get_substrate_state(substrate)
+
     def get_node_rank(node):
+        if state is not None:
+            # Residual bandwidth per node is kept in sync by the ledger, so no neighbor walk
+            index = state.node_index[node]
+            return state.adjacent_bandwidth()[index] * state.cpu_available[index]
         node_total_bandwidth = 0
         for neighbor in substrate.neighbors(node):
             edge = (node, neighbor)
@@ -62,178 +83,149 @@ def yu2008_algorithm(substrate, vnr_chunks, time_window=25):
         return node_total_bandwidth * substrate.nodes[node]['cpu_available']
 
     # Iterate through the chunks
-    node_mapping = {}
-    link_mapping = {}
-    active_embeddings = {}
-    successfully_embedded_vnrs = set()  # Track VNR IDs that were successfully embedded
-    
-    # Track all VNRs processed (for final results)
-    all_processed_vnrs = set()
-    for chunk in vnr_chunks:
-        for vnr in chunk:
-            all_processed_vnrs.add(vnr.graph['vnr_id'])
-    
+    ledger = ResourceLedger(substrate)
+    node_mapping = {}  # vnr_id -> {v_node: s_node} of VNRs being embedded or active
+    link_mapping = {}  # vnr_id -> {v_edge: path}
+    reservations = {}  # vnr_id -> open Transaction between node and link mapping
+    active_embeddings = {}  # vnr_id -> (vnr, committed Transaction)
+    departures = EventScheduler()
+    vnr_stats = {} if instrument else None  # vnr_id -> EmbeddingStats
+    if results is None:
+        results = []
+
     for i, chunk in enumerate(vnr_chunks):
         current_time = (i + 1) * time_window
         failed_vnrs = []
         successfully_mapped_vnrs = []
 
         # Process departures
-        for vnr_id, embedding_info in list(active_embeddings.items()):
-            departure_time = embedding_info['departure_time']
-            vnr = embedding_info['vnr']
-            if departure_time <= current_time:
-
-                # Deallocate already allocated CPU for this VNR
-                for v_node in vnr.nodes():
-                    s_node = node_mapping[(vnr.graph['vnr_id'], v_node)]
-                    substrate.nodes[s_node]['cpu_available'] += vnr.nodes[v_node]['cpu_req']
-                    node_mapping.pop((vnr.graph['vnr_id'], v_node))
+        for _, _, vnr_id in departures.pop_due(current_time):
+            vnr, reservation = active_embeddings.pop(vnr_id)
 
-                # Deallocate already allocated Bandwidth for this VNR
-                for v_mapped_edge in vnr.edges():
-                    if (vnr.graph['vnr_id'], v_mapped_edge) in link_mapping:
-                        mapped_path = link_mapping[(vnr.graph['vnr_id'], v_mapped_edge)]
-                        link_mapping.pop((vnr.graph['vnr_id'], v_mapped_edge))
-                        for j in range(len(mapped_path) - 1):
-                            edge = (mapped_path[j], mapped_path[j + 1])
-                            substrate.edges[edge]['bandwidth_available'] += vnr.edges[v_mapped_edge]['bandwidth_req']
-
-                del active_embeddings[vnr_id]
+            # Return the CPU and bandwidth allocated for this VNR
+            reservation.release()
+            node_mapping.pop(vnr_id)
+            link_mapping.pop(vnr_id)
 
         # Sort based on revenue
         chunk.sort(key=calculate_revenue, reverse=True)
 
         # Phase 1: Node mapping (greedy by available CPU)
         for vnr in chunk:
-            vnr_node_mapping = {}  # Only for intra-VNR constraint checking
-            vnr_cpu_requirements = [vnr.nodes[v_node]['cpu_req'] for v_node in vnr.nodes()]
-            min_cpu_req = min(vnr_cpu_requirements)
-
-            # Filter substrate nodes: each node in S can host at least one virtual node
-            S = [node for node in substrate.nodes() if substrate.nodes[node]['cpu_available'] >= min_cpu_req]
-
-            if not S:  # If S is empty, defer this request
-                if not vnr.graph['retried']:
-                    failed_vnrs.append(vnr)
-                    vnr.graph['retried'] = True
-                continue  # Go to next VNR
-
-            substrate_nodes = sorted(S, key=get_node_rank, reverse=True)
-            node_mapping_successful = True
-
-            for v_node in vnr.nodes():
-                cpu_req = vnr.nodes[v_node]['cpu_req']
-                mapped = False
-
-                for s_node in substrate_nodes:
-                    # Check intra-VNR separation constraint
-                    if s_node in vnr_node_mapping.values():
-                        continue
-
-                    # Check CPU availability
-                    if substrate.nodes[s_node]['cpu_available'] >= cpu_req:
-                        node_mapping[(vnr.graph['vnr_id'], v_node)] = s_node
-                        vnr_node_mapping[v_node] = s_node
-                        substrate.nodes[s_node]['cpu_available'] -= cpu_req
-                        mapped = True
-                        break
+            with collect_phase(_stats_for(vnr_stats, vnr), 'node_mapping') as stats:
+                vnr_node_mapping = {}
+                used_s_nodes = set()  # Only for intra-VNR constraint checking
+                vnr_cpu_requirements = [vnr.nodes[v_node]['cpu_req'] for v_node in vnr.nodes()]
+                min_cpu_req = min(vnr_cpu_requirements)
+
+                # Filter substrate nodes: each node in S can host at least one virtual node
+                S = [node for node in substrate.nodes() if substrate.nodes[node]['cpu_available'] >= min_cpu_req]
 
-                if not mapped:
-                    node_mapping_successful = False
-                    # Deallocate already allocated CPU for this VNR
-                    for allocated_v_node in vnr_node_mapping:
-                        allocated_s_node = vnr_node_mapping[allocated_v_node]
-                        substrate.nodes[allocated_s_node]['cpu_available'] += vnr.nodes[allocated_v_node]['cpu_req']
-                        node_mapping.pop((vnr.graph['vnr_id'], allocated_v_node))
+                if not S:  # If S is empty, defer this request
                     if not vnr.graph['retried']:
                         failed_vnrs.append(vnr)
                         vnr.graph['retried'] = True
-                    break
+                    continue  # Go to next VNR
 
-            if node_mapping_successful:
-                successfully_mapped_vnrs.append(vnr)
+                substrate_nodes = sorted(S, key=get_node_rank, reverse=True)
+                node_mapping_successful = True
+                reservation = ledger.begin()
+
+                for v_node in vnr.nodes():
+                    cpu_req = vnr.nodes[v_node]['cpu_req']
+                    mapped = False
+
+                    for s_node in substrate_nodes:
+                        # Check intra-VNR separation constraint
+                        if s_node in used_s_nodes:
+                            continue
+
+                        # Check CPU availability
+                        if stats is not None:
+                            stats.count('candidates_tried')
+                        if substrate.nodes[s_node]['cpu_available'] >= cpu_req:
+                            vnr_node_mapping[v_node] = s_node
+                            used_s_nodes.add(s_node)
+                            reservation.reserve_cpu(s_node, cpu_req)
+                            mapped = True
+                            break
+
+                    if not mapped:
+                        node_mapping_successful = False
+                        # Deallocate already allocated CPU for this VNR
+                        reservation.rollback()
+                        if not vnr.graph['retried']:
+                            failed_vnrs.append(vnr)
+                            vnr.graph['retried'] = True
+                        break
+
+                if node_mapping_successful:
+                    successfully_mapped_vnrs.append(vnr)
+                    node_mapping[vnr.graph['vnr_id']] = vnr_node_mapping
+                    reservations[vnr.graph['vnr_id']] = reservation
 
         # Phase 2: Link mapping (k-shortest)
         successfully_mapped_vnrs.sort(key=calculate_revenue, reverse=True)
 
         for vnr in successfully_mapped_vnrs:
-            vnr_fully_embedded = True
-            for v_edge in vnr.edges():
-                v_src, v_dst = v_edge
-                s_src = node_mapping[(vnr.graph['vnr_id'], v_src)]
-                s_dst = node_mapping[(vnr.graph['vnr_id'], v_dst)]
-                bandwidth_req = vnr.edges[v_edge]['bandwidth_req']
-
-                path_found = False
-                for k in range(1, 4):  # keep k small
-                    try:
-                        # Get only k paths, not ALL paths (critical performance fix)
-                        paths = list(itertools.islice(nx.shortest_simple_paths(substrate, s_src, s_dst), k))
-                        for path in paths:
-                            # Check bandwidth
-                            can_allocate = True
-                            for j in range(len(path) - 1):
-                                edge = (path[j], path[j + 1])
-                                if substrate.edges[edge]['bandwidth_available'] < bandwidth_req:
-                                    can_allocate = False
-                                    break
-
-                            # Allocate bandwidth
-                            if can_allocate:
-                                path_found = True
-                                link_mapping[(vnr.graph['vnr_id'], v_edge)] = path
-                                for j in range(len(path) - 1):
-                                    edge = (path[j], path[j + 1])
-                                    substrate.edges[edge]['bandwidth_available'] -= bandwidth_req
-                                break
-                    except nx.NetworkXNoPath:
+            with collect_phase(_stats_for(vnr_stats, vnr), 'link_mapping'):
+                vnr_fully_embedded = True
+                reservation = reservations.pop(vnr.graph['vnr_id'])
+                vnr_node_mapping = node_mapping[vnr.graph['vnr_id']]
+                vnr_link_mapping = link_mapping[vnr.graph['vnr_id']] = {}
+                for v_edge in vnr.edges():
+                    v_src, v_dst = v_edge
+                    s_src = vnr_node_mapping[v_src]
+                    s_dst = vnr_node_mapping[v_dst]
+                    bandwidth_req = vnr.edges[v_edge]['bandwidth_req']
+
+                    # First of the k-shortest paths that has enough bandwidth on every link
+                    if path_candidates is None:
+                        path = shortest_feasible_path(substrate, s_src, s_dst, bandwidth_req, path_metric)
+                    else:
+                        path = first_feasible_candidate(substrate, s_src, s_dst, bandwidth_req, path_metric,
+                                                        path_candidates)
+                    path_found = path is not None
+
+                    # Allocate bandwidth
+                    if path_found:
+                        vnr_link_mapping[v_edge] = path
+                        reservation.reserve_path(path, bandwidth_req)
+
+                    if not path_found:
+                        vnr_fully_embedded = False
+                        # Deallocate the CPU and bandwidth already allocated for this VNR
+                        reservation.rollback()
+                        node_mapping.pop(vnr.graph['vnr_id'])
+                        link_mapping.pop(vnr.graph['vnr_id'])
+
+                        if not vnr.graph['retried']:
+                            failed_vnrs.append(vnr)
+                            vnr.graph['retried'] = True
                         break
 
-                    if path_found:  # don't try more k values
-                        break
+                if vnr_fully_embedded:
+                    reservation.commit()
+                    departure_time = current_time + vnr.graph['lifetime']
+                    active_embeddings[vnr.graph['vnr_id']] = (vnr, reservation)
+                    departures.schedule_departure(departure_time, vnr.graph['vnr_id'])
 
-                if not path_found:
-                    vnr_fully_embedded = False
-                    # Deallocate already allocated CPU for this VNR
-                    for v_node in vnr.nodes():
-                        s_node = node_mapping[(vnr.graph['vnr_id'], v_node)]
-                        substrate.nodes[s_node]['cpu_available'] += vnr.nodes[v_node]['cpu_req']
-                        node_mapping.pop((vnr.graph['vnr_id'], v_node))
-
-                    # Deallocate already allocated Bandwidth for this VNR
-                    for v_mapped_edge in vnr.edges():
-                        if (vnr.graph['vnr_id'], v_mapped_edge) in link_mapping:
-                            mapped_path = link_mapping[(vnr.graph['vnr_id'], v_mapped_edge)]
-                            link_mapping.pop((vnr.graph['vnr_id'], v_mapped_edge))
-                            for j in range(len(mapped_path) - 1):
-                                edge = (mapped_path[j], mapped_path[j + 1])
-                                substrate.edges[edge]['bandwidth_available'] += vnr.edges[v_mapped_edge]['bandwidth_req']
+                    # CRITICAL FIX: Store actual embedding time (not arrival time)
+                    # This is needed for correct utilization visualization
+                    vnr_metadata[vnr.graph['vnr_id']]['embedding_time'] = current_time
 
-                    if not vnr.graph['retried']:
-                        failed_vnrs.append(vnr)
-                        vnr.graph['retried'] = True
-                    break
-
-            if vnr_fully_embedded:
-                departure_time = current_time + vnr.graph['lifetime']
-                active_embeddings[vnr.graph['vnr_id']] = {
-                    'vnr': vnr,
-                    'departure_time': departure_time
-                }
-                successfully_embedded_vnrs.add(vnr.graph['vnr_id'])
-
-                # CRITICAL FIX: Store actual embedding time (not arrival time)
-                # This is needed for correct utilization visualization
-                vnr_metadata[vnr.graph['vnr_id']]['embedding_time'] = current_time
-
-                # Save to historical mappings for metrics calculation
-                for k, v in node_mapping.items():
-                    if k[0] == vnr.graph['vnr_id']:
-                        historical_node_mapping[k] = v
-                for k, v in link_mapping.items():
-                    if k[0] == vnr.graph['vnr_id']:
-                        historical_link_mapping[k] = v
+                    # Save to historical mappings for metrics calculation; the
+                    # buckets are never modified again, only dropped on departure
+                    historical_node_mapping[vnr.graph['vnr_id']] = vnr_node_mapping
+                    historical_link_mapping[vnr.graph['vnr_id']] = vnr_link_mapping
+
+        # Report the VNRs this chunk settled; deferred ones are reported by a later chunk
+        deferred = {vnr.graph['vnr_id'] for vnr in failed_vnrs}
+        for vnr in chunk:
+            vnr_id = vnr.graph['vnr_id']
+            if vnr_id not in deferred:
+                results.append(_result_record(vnr_id, vnr_metadata, historical_node_mapping,
+                                              historical_link_mapping, vnr_stats))
 
         # Add failed VNRs to next chunk (if there is one)
         if failed_vnrs:
@@ -242,30 +234,37 @@ def yu2008_algorithm(substrate, vnr_chunks, time_window=25):
             else:
                 vnr_chunks.append(failed_vnrs)
     
-    # Return standardized results format for visualization/metrics
-    results = []
-    for vnr_id in all_processed_vnrs:
-        if vnr_id in successfully_embedded_vnrs:
-            # Extract mappings for this VNR from historical storage
-            vnr_node_mapping = {k[1]: v for k, v in historical_node_mapping.items() if k[0] == vnr_id}
-            vnr_link_mapping = {k[1]: v for k, v in historical_link_mapping.items() if k[0] == vnr_id}
-
-            results.append({
-                'vnr_id': vnr_id,
-                'arrival_time': vnr_metadata[vnr_id]['arrival_time'],
-                'embedding_time': vnr_metadata[vnr_id].get('embedding_time', vnr_metadata[vnr_id]['arrival_time']),  # CRITICAL FIX
-                'success': True,
-                'node_mapping': vnr_node_mapping,
-                'link_mapping': vnr_link_mapping
-            })
-        else:
-            results.append({
-                'vnr_id': vnr_id,
-                'arrival_time': vnr_metadata[vnr_id]['arrival_time'],
-                'embedding_time': None,  # Failed VNRs have no embedding time
-                'success': False,
-                'node_mapping': None,
-                'link_mapping': None
-            })
-    
-    return results
\ No newline at end of file
+    return results
+
+
+def _result_record(vnr_id, vnr_metadata, historical_node_mapping, historical_link_mapping, vnr_stats):
+    # Standardized result record of a settled VNR for visualization/metrics
+    metadata = vnr_metadata[vnr_id]
+    if vnr_id in historical_node_mapping:
+        record = {
+            'vnr_id': vnr_id,
+            'arrival_time': metadata['arrival_time'],
+            'embedding_time': metadata.get('embedding_time', metadata['arrival_time']),  # CRITICAL FIX
+            'success': True,
+            'node_mapping': historical_node_mapping[vnr_id],
+            'link_mapping': historical_link_mapping[vnr_id]
+        }
+    else:
+        record = {
+            'vnr_id': vnr_id,
+            'arrival_time': metadata['arrival_time'],
+            'embedding_time': None,  # Failed VNRs have no embedding time
+            'success': False,
+            'node_mapping': None,
+            'link_mapping': None
+        }
+    if vnr_stats is not None:
+        record['stats'] = vnr_stats.setdefault(vnr_id, EmbeddingStats()).as_dict()
+    return record
+
+
+def _stats_for(vnr_stats, vnr):
+    # The VNR's EmbeddingStats when instrumenting, else None
+    if vnr_stats is None:
+        return None
+    return vnr_stats.setdefault(vnr.graph['vnr_id'], EmbeddingStats())
@@ -3,9 +3,14 @@ VNE Metrics Module
 Literature-compliant metrics calculations for Virtual Network Embedding
 """
 
+from ..networks.virtual_request import VirtualRequest
+
 
 def calculate_revenue(vnr):
     """Calculate VNR revenue."""
+    if isinstance(vnr, VirtualRequest):
+        return vnr.cpu.sum().item() + vnr.bandwidth.sum().item()
+
     cpu_revenue = sum(vnr.nodes[node]['cpu_req'] for node in vnr.nodes())
     bw_revenue = sum(vnr.edges[edge]['bandwidth_req'] for edge in vnr.edges())
     return cpu_revenue + bw_revenue
@@ -0,0 +1,262 @@
+"""
+VNE Utilization Timeline
+Substrate utilization over time from one sweep over embed/depart events
+"""
+
+import numpy as np
+
+from ..networks.vnr_registry import VNRRegistry
+
+# Percentiles reported by UtilizationTimeline.summary()
+SUMMARY_PERCENTILES = (50, 90, 95, 99)
+
+
+def utilization_timeline(substrate, results, vnrs):
+    """
+    Sweep the successful embeddings of `results` and return a UtilizationTimeline.
+
+    The single pass over embed/depart events yields both the peak snapshot
+    (peak_utilization) and the time-weighted averages, so callers need no
+    separate peak search.
+
+    An embedding occupies its resources from its `embedding_time` (Yu2008,
+    which retries) or `arrival_time` until that time plus the VNR lifetime.
+    `vnrs` is the request queue or a VNRRegistry; capacities are the
+    substrate's `cpu` and `bandwidth` attributes.
+    """
+    return UtilizationTimeline(substrate, results, vnrs)
+
+
+class UtilizationTimeline:
+    """
+    Node and edge utilization of a substrate across a whole simulation.
+
+    Events are sorted once (departures before arrivals at the same time)
+    and each one updates only the resources of its own embedding, so the
+    sweep is O(E log E) in the number of events. After all events at a
+    time are applied the state is recorded in the series:
+
+    - `times`, `active_count`, `cpu_used`, `bandwidth_used`
+    - `node_utilization` / `edge_utilization`: mean utilization over all
+      substrate nodes / edges
+
+    Per element, `node_average` / `edge_average` are time-weighted mean
+    utilizations over [times[0], times[-1]] and `node_peak` / `edge_peak`
+    the highest utilization reached. `peak_time` is the first time with the
+    most active VNRs; peak_utilization() gives the state at that time.
+    """
+
+    def __init__(self, substrate, results, vnrs):
+        vnrs = VNRRegistry.of(vnrs)
+        self.substrate = substrate
+        self.nodes = list(substrate.nodes())
+        self.edges = [(min(edge), max(edge)) for edge in substrate.edges()]
+        node_index = {node: i for i, node in enumerate(self.nodes)}
+        edge_index = {}
+        for i, (u, v) in enumerate(substrate.edges()):
+            edge_index[(u, v)] = edge_index[(v, u)] = i
+        self.node_capacity = np.array([attrs['cpu'] for _, attrs in substrate.nodes(data=True)], dtype=float)
+        self.edge_capacity = np.array([attrs['bandwidth'] for _, _, attrs in substrate.edges(data=True)], dtype=float)
+
+        self.vnr_ids = []
+        self._embeddings = []
+        events = []
+        for result in results:
+            if not result.get('success', False):
+                continue
+            vnr = vnrs[result['vnr_id']]
+            start = result.get('embedding_time', result['arrival_time'])
+            end = start + vnr.graph['lifetime']
+            if end <= start:
+                continue  # Occupies nothing for any length of time
+
+            k = len(self._embeddings)
+            self.vnr_ids.append(result['vnr_id'])
+            self._embeddings.append(_embedding_demand(vnr, result['node_mapping'], result['link_mapping'],
+                                                      node_index, edge_index))
+            events.append((start, 1, k))
+            events.append((end, 0, k))
+
+        # Departures (0) before arrivals (1) at the same time; ties keep result order
+        events.sort(key=lambda event: (event[0], event[1]))
+        self._events = events
+        self._sweep()
+
+    def _sweep(self):
+        node_inv = _inverse(self.node_capacity)
+        edge_inv = _inverse(self.edge_capacity)
+        node_count, edge_count = max(len(self.nodes), 1), max(len(self.edges), 1)
+
+        node_used = np.zeros(len(self.nodes))
+        edge_used = np.zeros(len(self.edges))
+        node_area = np.zeros(len(self.nodes))
+        edge_area = np.zeros(len(self.edges))
+        node_changed = np.zeros(len(self.nodes))  # time each element last changed
+        edge_changed = np.zeros(len(self.edges))
+        self.node_peak = np.zeros(len(self.nodes))
+        self.edge_peak = np.zeros(len(self.edges))
+
+        times, active_count, cpu_used, bandwidth_used, node_util, edge_util = [], [], [], [], [], []
+        active = cpu_total = bw_total = node_util_sum = edge_util_sum = 0
+        self.peak_time, self.peak_count, self._peak_event = 0, 0, 0
+
+        events = self._events
+        i = 0
+        while i < len(events):
+            time = events[i][0]
+            while i < len(events) and events[i][0] == time:
+                _, arriving, k = events[i]
+                nodes, cpu, edges, bandwidth = self._embeddings[k]
+                sign = 1 if arriving else -1
+
+                node_area[nodes] += node_used[nodes] * (time - node_changed[nodes])
+                node_changed[nodes] = time
+                node_used[nodes] += sign * cpu
+                edge_area[edges] += edge_used[edges] * (time - edge_changed[edges])
+                edge_changed[edges] = time
+                edge_used[edges] += sign * bandwidth
+
+                if arriving:
+                    # Arrivals come last at a time, so no later event at this time lowers these
+                    self.node_peak[nodes] = np.maximum(self.node_peak[nodes], node_used[nodes] * node_inv[nodes])
+                    self.edge_peak[edges] = np.maximum(self.edge_peak[edges], edge_used[edges] * edge_inv[edges])
+
+                active += sign
+                cpu_total += sign * cpu.sum()
+                bw_total += sign * bandwidth.sum()
+                node_util_sum += sign * (cpu * node_inv[nodes]).sum()
+                edge_util_sum += sign * (bandwidth * edge_inv[edges]).sum()
+                i += 1
+
+            if active == 0:
+                # Drop rounding residue so idle periods read exactly zero
+                cpu_total = bw_total = node_util_sum = edge_util_sum = 0
+            if active > self.peak_count:
+                self.peak_time, self.peak_count, self._peak_event = time, active, i
+
+            times.append(time)
+            active_count.append(active)
+            cpu_used.append(cpu_total)
+            bandwidth_used.append(bw_total)
+            node_util.append(node_util_sum / node_count)
+            edge_util.append(edge_util_sum / edge_count)
+
+        self.times = np.array(times, dtype=float)
+        self.active_count = np.array(active_count, dtype=np.int64)
+        self.cpu_used = np.array(cpu_used, dtype=float)
+        self.bandwidth_used = np.array(bandwidth_used, dtype=float)
+        self.node_utilization = np.array(node_util, dtype=float)
+        self.edge_utilization = np.array(edge_util, dtype=float)
+
+        # Close the per-element areas at the end of the horizon
+        end = self.times[-1] if len(self.times) else 0.0
+        node_area += node_used * (end - node_changed)
+        edge_area += edge_used * (end - edge_changed)
+        horizon = self.horizon
+        self.node_average = node_area * node_inv / horizon if horizon > 0 else np.zeros(len(self.nodes))
+        self.edge_average = edge_area * edge_inv / horizon if horizon > 0 else np.zeros(len(self.edges))
+
+    @property
+    def horizon(self):
+        """Length of time covered by the series."""
+        return float(self.times[-1] - self.times[0]) if len(self.times) else 0.0
+
+    @property
+    def durations(self):
+        """How long each recorded state lasts; the last one lasts 0."""
+        return np.diff(self.times, append=self.times[-1:])
+
+    def time_average(self, series):
+        """Time-weighted mean of one of the series."""
+        if self.horizon <= 0:
+            return 0.0
+        return float(np.dot(series, self.durations) / self.horizon)
+
+    def percentiles(self, series, q=SUMMARY_PERCENTILES):
+        """
+        Time-weighted percentiles of a series: the smallest value the series
+        stays at or below for at least q% of the horizon.
+        """
+        if self.horizon <= 0:
+            return {f'p{p}': 0.0 for p in q}
+
+        order = np.argsort(series, kind='stable')
+        weight = np.cumsum(self.durations[order]) / self.horizon
+        values = np.asarray(series)[order]
+        return {f'p{p}': float(values[min(np.searchsorted(weight, p / 100.0), len(values) - 1)])
+                for p in q}
+
+    def peak_vnr_ids(self):
+        """VNRs active at peak_time."""
+        active = {}
+        for _, arriving, k in self._events[:self._peak_event]:
+            if arriving:
+                active[k] = None
+            else:
+                active.pop(k, None)
+        return [self.vnr_ids[k] for k in active]
+
+    def peak_utilization(self):
+        """
+        (node_utilization, edge_utilization) dicts at peak_time, keyed by
+        substrate node and by (min, max) edge as in _calculate_utilization_from_embeddings.
+        """
+        node_used = np.zeros(len(self.nodes))
+        edge_used = np.zeros(len(self.edges))
+        for _, arriving, k in self._events[:self._peak_event]:
+            nodes, cpu, edges, bandwidth = self._embeddings[k]
+            sign = 1 if arriving else -1
+            node_used[nodes] += sign * cpu
+            edge_used[edges] += sign * bandwidth
+
+        node_utilization = node_used * _inverse(self.node_capacity)
+        edge_utilization = edge_used * _inverse(self.edge_capacity)
+        return (dict(zip(self.nodes, node_utilization.tolist())),
+                dict(zip(self.edges, edge_utilization.tolist())))
+
+    def summary(self):
+        """JSON-ready time-weighted averages, peaks and percentiles."""
+        series = {
+            'active_vnrs': self.active_count,
+            'node_utilization': self.node_utilization,
+            'edge_utilization': self.edge_utilization,
+            'cpu_used': self.cpu_used,
+            'bandwidth_used': self.bandwidth_used,
+        }
+        return {
+            'start_time': float(self.times[0]) if len(self.times) else 0.0,
+            'end_time': float(self.times[-1]) if len(self.times) else 0.0,
+            'time_average': {name: self.time_average(values) for name, values in series.items()},
+            'peak': {name: float(values.max()) if len(values) else 0.0 for name, values in series.items()},
+            'percentiles': {name: self.percentiles(values) for name, values in series.items()},
+            'node_average': {str(node): float(util) for node, util in zip(self.nodes, self.node_average)},
+            'node_peak': {str(node): float(util) for node, util in zip(self.nodes, self.node_peak)},
+            'edge_average': {f"{u}-{v}": float(util) for (u, v), util in zip(self.edges, self.edge_average) if util > 0},
+            'edge_peak': {f"{u}-{v}": float(util) for (u, v), util in zip(self.edges, self.edge_peak) if util > 0},
+        }
+
+
+def _embedding_demand(vnr, node_mapping, link_mapping, node_index, edge_index):
+    # (node indices, CPU, edge indices, bandwidth) of one embedding, one entry per substrate element
+    cpu = {}
+    for v_node, s_node in node_mapping.items():
+        i = node_index[s_node]
+        cpu[i] = cpu.get(i, 0) + vnr.nodes[v_node]['cpu_req']
+
+    bandwidth = {}
+    for v_edge, s_path in link_mapping.items():
+        bw_req = vnr.edges[v_edge]['bandwidth_req']
+        for hop in zip(s_path, s_path[1:]):
+            i = edge_index.get(hop)
+            if i is not None:
+                bandwidth[i] = bandwidth.get(i, 0) + bw_req
+
+    return (np.fromiter(cpu, dtype=np.intp, count=len(cpu)),
+            np.array(list(cpu.values()), dtype=float),
+            np.fromiter(bandwidth, dtype=np.intp, count=len(bandwidth)),
+            np.array(list(bandwidth.values()), dtype=float))
+
+
+def _inverse(capacity):
+    # 1 / capacity, 0 where a resource has no capacity
+    return np.divide(1.0, capacity, out=np.zeros_like(capacity), where=capacity > 0)
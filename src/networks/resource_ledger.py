@@ -0,0 +1,130 @@
+"""
+VNE Resource Ledger
+Transactional allocation of substrate resources with an undo log
+"""
+
+import numpy as np
+
+from .substrate_state import get_substrate_state
+
+
+class ResourceLedger:
+    """
+    Entry point for transactional changes to a substrate's residual resources.
+
+    begin() opens a Transaction. Every reservation made through it is applied
+    immediately, so later feasibility checks see it, and is recorded in the
+    transaction's undo log. rollback() reverts an abandoned transaction and
+    release() returns the resources of a committed one, both in O(changes).
+
+    Transactions are independent: changes are additive, so one can be rolled
+    back while others opened before or after it stay in place. With an
+    attached SubstrateState the residual arrays are changed directly,
+    otherwise the graph's `cpu_available` / `bandwidth_available` attributes.
+    """
+
+    def __init__(self, substrate):
+        self.substrate = substrate
+        self.state = get_substrate_state(substrate)
+
+    def begin(self):
+        """Open a transaction on this substrate."""
+        return Transaction(self)
+
+    def _node_slot(self, node):
+        # (container, key) holding the residual CPU of a node
+        if self.state is not None:
+            return self.state.cpu_available, self.state.node_index[node]
+        return self.substrate.nodes[node], 'cpu_available'
+
+    def _path_slot(self, path):
+        # (container, key) holding the residual bandwidth of every edge on a path
+        if self.state is not None:
+            return self.state.bandwidth_available, np.array(self.state.path_edges(path), dtype=np.intp)
+        adjacency = self.substrate.adj
+        return [adjacency[u][v] if v in adjacency[u] else adjacency[v][u] for u, v in zip(path, path[1:])], None
+
+
+class Transaction:
+    """
+    Resources reserved for one tentative embedding, see ResourceLedger.
+
+    A transaction is open until commit() or rollback(). Committing keeps the
+    undo log so that release() can return the resources later, e.g. when the
+    VNR departs.
+    """
+
+    OPEN = 'open'
+    COMMITTED = 'committed'
+    CLOSED = 'closed'
+
+    def __init__(self, ledger):
+        self._ledger = ledger
+        self._log = []  # (container, key, amount) per reservation, in order
+        self.status = self.OPEN
+
+    def __len__(self):
+        return len(self._log)
+
+    def reserve_cpu(self, node, amount):
+        """Take `amount` CPU from a substrate node."""
+        self._require(self.OPEN)
+        container, key = self._ledger._node_slot(node)
+        self._change(container, key, amount)
+        self._log.append((container, key, amount))
+
+    def reserve_path(self, path, amount):
+        """Take `amount` bandwidth from every edge of a substrate path."""
+        self._require(self.OPEN)
+        if len(path) < 2:
+            return
+        container, key = self._ledger._path_slot(path)
+        self._change(container, key, amount)
+        self._log.append((container, key, amount))
+
+    def allocate(self, node_mapping, link_mapping, vnr):
+        """Reserve the VNR's CPU and bandwidth demands along its mapping."""
+        for v_node, s_node in node_mapping.items():
+            self.reserve_cpu(s_node, vnr.nodes[v_node]['cpu_req'])
+        for v_edge, s_path in link_mapping.items():
+            self.reserve_path(s_path, vnr.edges[v_edge]['bandwidth_req'])
+
+    def commit(self):
+        """Keep the reservations; release() can still return them later."""
+        self._require(self.OPEN)
+        self.status = self.COMMITTED
+
+    def rollback(self):
+        """Revert every reservation of an open transaction."""
+        self._require(self.OPEN)
+        self._undo()
+
+    def release(self):
+        """Return the resources of a committed transaction."""
+        self._require(self.COMMITTED)
+        self._undo()
+
+    def _undo(self):
+        for container, key, amount in reversed(self._log):
+            self._change(container, key, -amount)
+        self._log.clear()
+        self.status = self.CLOSED
+
+    def _change(self, container, key, amount):
+        if key is None:
+            # Path on a plain graph: one attribute dict per edge
+            for attrs in container:
+                attrs['bandwidth_available'] -= amount
+            return
+        state = self._ledger.state
+        if state is None:
+            container[key] -= amount
+        elif container is state.bandwidth_available:
+            # Through the state, which keeps its per-node bandwidth sums current
+            state.add_bandwidth(key, -amount)
+        else:
+            state.add_cpu(key, -amount)
+
+    def _require(self, status):
+        if self.status != status:
+            raise RuntimeError(f"Transaction is {self.status}, expected {status}")
@@ -64,4 +64,15 @@ def create_italian_network():
     I.add_edge(9, 10, bandwidth=200, cost=4)
     
     return I
-    
\ No newline at end of file
+    
+
+def shared_network(pool, name, factory):
+    # Network `name` from `pool` (a dict shared by experiments running in one
+    # process), created with factory() on first use. Reusing the same graph
+    # object keeps its working copy and NodeRank/path caches warm. pool=None
+    # disables sharing and always creates a new network.
+    if pool is None:
+        return factory()
+    if name not in pool:
+        pool[name] = factory()
+    return pool[name]
@@ -0,0 +1,323 @@
+"""
+VNE Substrate State
+Array-backed residual resource state for substrate networks
+"""
+
+import copy
+import weakref
+from collections.abc import ItemsView, ValuesView
+
+import numpy as np
+
+# Source graph -> attached working copy, see working_substrate()
+_working_copies = weakref.WeakKeyDictionary()
+
+
+class SubstrateState:
+    """
+    Residual CPU and bandwidth of a substrate network held in NumPy arrays.
+
+    Nodes are addressed through `node_index` and edges through `edge_index`,
+    which maps both orientations of an undirected edge to the same canonical
+    slot. `version` is bumped on every resource change so that derived data
+    (e.g. NodeRank) can be cached against it. `epoch` only moves when the
+    residual state is replaced wholesale by reset() or restore(), telling
+    caches that warm-start from earlier results to start cold instead.
+
+    Use `SubstrateState.attach(substrate)` to back an existing networkx graph
+    with a state object. The graph's attribute dicts keep working for code
+    that reads or writes `cpu_available` / `bandwidth_available` directly.
+    """
+
+    def __init__(self, substrate):
+        self.nodes = list(substrate.nodes())
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+
+        # Canonical edge list as networkx yields it; both orientations share a slot
+        self.edges = list(substrate.edges())
+        self.edge_index = {}
+        for i, (u, v) in enumerate(self.edges):
+            self.edge_index[(u, v)] = i
+            self.edge_index[(v, u)] = i
+        # Node indices of each edge's two endpoints, shape (edges, 2)
+        self.edge_endpoints = np.array([(self.node_index[u], self.node_index[v]) for u, v in self.edges],
+                                       dtype=np.intp).reshape(-1, 2)
+
+        self.cpu = np.array([substrate.nodes[n]['cpu'] for n in self.nodes], dtype=float)
+        self.bandwidth = np.array([substrate.edges[e]['bandwidth'] for e in self.edges], dtype=float)
+        self.cpu_available = np.array(
+            [substrate.nodes[n].get('cpu_available', substrate.nodes[n]['cpu']) for n in self.nodes], dtype=float)
+        self.bandwidth_available = np.array(
+            [substrate.edges[e].get('bandwidth_available', substrate.edges[e]['bandwidth']) for e in self.edges],
+            dtype=float)
+
+        self.version = 0
+        self.epoch = 0
+
+        # Residual bandwidth summed per node, valid while _adjacent_version == version;
+        # add_bandwidth() keeps it current, any other change makes the next read recompute it
+        self._adjacent_bandwidth = None
+        self._adjacent_version = None
+
+    @classmethod
+    def attach(cls, substrate):
+        """Create a state for `substrate` and route its resource attributes through it."""
+        state = cls(substrate)
+        for i, node in enumerate(state.nodes):
+            substrate._node[node] = _NodeResourceAttrs(substrate._node[node], state, i)
+        for i, (u, v) in enumerate(state.edges):
+            attrs = _EdgeResourceAttrs(substrate._adj[u][v], state, i)
+            # Undirected graphs share one attribute dict between both orientations
+            substrate._adj[u][v] = attrs
+            substrate._adj[v][u] = attrs
+        return state
+
+    def reset(self):
+        """Restore every node and edge to full capacity."""
+        np.copyto(self.cpu_available, self.cpu)
+        np.copyto(self.bandwidth_available, self.bandwidth)
+        self.epoch += 1
+        self.version += 1
+
+    def snapshot(self):
+        """Copy of the residual CPU and bandwidth vectors, for restore()."""
+        return self.cpu_available.copy(), self.bandwidth_available.copy()
+
+    def restore(self, snapshot):
+        """Put back the residual resources saved by snapshot()."""
+        cpu_available, bandwidth_available = snapshot
+        np.copyto(self.cpu_available, cpu_available)
+        np.copyto(self.bandwidth_available, bandwidth_available)
+        self.epoch += 1
+        self.version += 1
+
+    def adjacent_bandwidth(self):
+        """
+        Residual bandwidth summed over the edges incident to each node.
+
+        The array is maintained by add_bandwidth() and must not be modified
+        by the caller; other resource changes cost one recomputation.
+        """
+        if self._adjacent_version != self.version:
+            node_count = len(self.nodes)
+            self._adjacent_bandwidth = (np.bincount(self.edge_endpoints[:, 0], self.bandwidth_available, node_count)
+                                        + np.bincount(self.edge_endpoints[:, 1], self.bandwidth_available,
+                                                      node_count))
+            self._adjacent_version = self.version
+        return self._adjacent_bandwidth
+
+    def add_cpu(self, node_ids, amounts):
+        """Add `amounts` (negative to reserve) to the residual CPU of nodes `node_ids`."""
+        in_sync = self._adjacent_version == self.version
+        np.add.at(self.cpu_available, node_ids, amounts)
+        self.version += 1
+        if in_sync:
+            self._adjacent_version = self.version
+
+    def add_bandwidth(self, edge_ids, amounts):
+        """Add `amounts` (negative to reserve) to the residual bandwidth of edges `edge_ids`."""
+        in_sync = self._adjacent_version == self.version
+        np.add.at(self.bandwidth_available, edge_ids, amounts)
+        self.version += 1
+        if in_sync:
+            endpoints = self.edge_endpoints[edge_ids]
+            np.add.at(self._adjacent_bandwidth, endpoints[:, 0], amounts)
+            np.add.at(self._adjacent_bandwidth, endpoints[:, 1], amounts)
+            self._adjacent_version = self.version
+
+    def path_edges(self, path):
+        """Return the edge indices traversed by a substrate path."""
+        edge_index = self.edge_index
+        return [edge_index[(path[i], path[i + 1])] for i in range(len(path) - 1)]
+
+    def allocate(self, node_mapping, link_mapping, vnr):
+        """Subtract the VNR's CPU and bandwidth demands along its mapping."""
+        self._apply(node_mapping, link_mapping, vnr, -1)
+
+    def deallocate(self, node_mapping, link_mapping, vnr):
+        """Return the VNR's CPU and bandwidth demands along its mapping."""
+        self._apply(node_mapping, link_mapping, vnr, 1)
+
+    def _apply(self, node_mapping, link_mapping, vnr, sign):
+        node_index = self.node_index
+        node_ids = [node_index[s_node] for s_node in node_mapping.values()]
+        cpu_reqs = [sign * vnr.nodes[v_node]['cpu_req'] for v_node in node_mapping]
+        self.add_cpu(np.array(node_ids, dtype=np.intp), cpu_reqs)
+
+        edge_ids = []
+        bw_reqs = []
+        for v_edge, s_path in link_mapping.items():
+            path_ids = self.path_edges(s_path)
+            edge_ids.extend(path_ids)
+            bw_reqs.extend([sign * vnr.edges[v_edge]['bandwidth_req']] * len(path_ids))
+        self.add_bandwidth(np.array(edge_ids, dtype=np.intp), bw_reqs)
+
+    def fits_link_mapping(self, link_mapping, vnr):
+        """Check that the summed bandwidth of all virtual links fits on every edge."""
+        reserved_bandwidth = {}
+        for v_edge, s_path in link_mapping.items():
+            bw_req = vnr.edges[v_edge]['bandwidth_req']
+            for edge_id in self.path_edges(s_path):
+                reserved_bandwidth[edge_id] = reserved_bandwidth.get(edge_id, 0) + bw_req
+
+        available = self.bandwidth_available
+        return all(reserved_bw <= available[edge_id] for edge_id, reserved_bw in reserved_bandwidth.items())
+
+
+def working_substrate(substrate):
+    """
+    Attached working copy of `substrate` with every resource at full capacity.
+
+    The copy is made on the first call for a source graph and reused after
+    that, so repeated runs only reset two arrays instead of copying the
+    graph. It shares nothing mutable with `substrate`, but the topology and
+    capacities of `substrate` must not change once it has been copied.
+
+    Every call for the same `substrate` returns the same object and resets
+    it, so a result is only valid until the next call for that substrate:
+    an earlier holder (a finished run whose residual resources are still
+    being read, a utilization pass) sees them wiped without warning. Calls
+    are not reentrant; a caller that must keep a residual state across
+    another call saves it with get_substrate_state(working).snapshot() and
+    puts it back with restore().
+    """
+    working = _working_copies.get(substrate)
+    if working is None:
+        working = substrate.copy()
+        SubstrateState.attach(working)
+        _working_copies[substrate] = working
+    get_substrate_state(working).reset()
+    return working
+
+
+def get_substrate_state(substrate):
+    """Return the SubstrateState attached to `substrate`, or None."""
+    for node in substrate.nodes():
+        attrs = substrate.nodes[node]
+        return attrs._state if isinstance(attrs, _NodeResourceAttrs) else None
+    return None
+
+
+class _ResourceAttrs(dict):
+    """
+    networkx attribute dict whose residual-resource entry lives in a SubstrateState.
+
+    Copies, deep copies and pickles produce plain dicts with the current value,
+    so `substrate.copy()` and `copy.deepcopy(substrate)` detach from the state.
+    The residual-resource entry cannot be removed (del, pop, popitem, clear
+    raise ValueError); other entries behave as in a plain dict. items() and
+    values() are live views reading the array, and equality and `|` compare
+    and merge the current values rather than the stored placeholder.
+    """
+
+    __slots__ = ('_state', '_array', '_index')
+    _key = None
+
+    def __init__(self, attrs, state, index):
+        super().__init__(attrs)
+        dict.__setitem__(self, self._key, None)
+        self._state = state
+        self._array = getattr(state, self._key)
+        self._index = index
+
+    def __getitem__(self, key):
+        if key == self._key:
+            return self._array.item(self._index)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key == self._key:
+            return self._array.item(self._index)
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key, value):
+        if key == self._key:
+            self._array[self._index] = value
+            self._state.version += 1
+        else:
+            dict.__setitem__(self, key, value)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key == self._key:
+            return self._array.item(self._index)
+        return dict.setdefault(self, key, default)
+
+    def __delitem__(self, key):
+        self._check_removable(key)
+        dict.__delitem__(self, key)
+
+    def pop(self, key, *default):
+        self._check_removable(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        if dict.__len__(self):
+            self._check_removable(next(reversed(dict.keys(self))))
+        return dict.popitem(self)
+
+    def clear(self):
+        self._check_removable(self._key)
+
+    def _check_removable(self, key):
+        # The entry is a slot of the state's array, which cannot be removed for one element
+        if key == self._key:
+            raise ValueError(f"'{key}' is backed by a SubstrateState array and cannot be removed")
+
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    def copy(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, _ResourceAttrs):
+            other = other.copy()
+        return dict.__eq__(self.copy(), other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __or__(self, other):
+        return dict.__or__(self.copy(), other)
+
+    def __ror__(self, other):
+        return dict.__or__(dict(other), self.copy()) if isinstance(other, dict) else NotImplemented
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.copy(), memo)
+
+    def __reduce_ex__(self, protocol):
+        return dict, (self.copy(),)
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
+class _NodeResourceAttrs(_ResourceAttrs):
+    __slots__ = ()
+    _key = 'cpu_available'
+
+
+class _EdgeResourceAttrs(_ResourceAttrs):
+    __slots__ = ()
+    _key = 'bandwidth_available'
@@ -0,0 +1,320 @@
+"""
+VNE Virtual Request
+Compact array-backed representation of a virtual network request
+"""
+
+from collections.abc import Mapping, MutableMapping
+
+import networkx as nx
+import numpy as np
+
+
+class VirtualRequest:
+    """
+    A VNR stored as a few small arrays instead of an nx.Graph.
+
+    Topology is kept in CSR form: the neighbours of node i are
+    `indices[indptr[i]:indptr[i + 1]]` and `edge_ids` holds the matching
+    edge of each entry. `edges` lists every undirected edge once as a pair
+    of node indices, `cpu` and `bandwidth` hold the requirements, and the
+    metadata lives in slots. Node labels are only stored when they are not
+    simply 0..n-1.
+
+    The read-only part of the networkx API that the algorithms, metrics
+    and simulation use is provided (nodes, edges, neighbors, graph), so a
+    VirtualRequest can be passed wherever an nx.Graph VNR is accepted.
+    """
+
+    __slots__ = ('labels', 'indptr', 'indices', 'edge_ids', 'edges_array', 'cpu', 'bandwidth',
+                 'vnr_id', 'arrival_time', 'lifetime', '_extra')
+
+    def __init__(self, cpu, edges, bandwidth, labels=None, vnr_id=None, arrival_time=None, lifetime=None,
+                 **graph_attrs):
+        """
+        `cpu[i]` is the CPU requirement of node i, `edges` a sequence of
+        (i, j) node index pairs with `bandwidth` requirements. `labels` names
+        the nodes (default 0..n-1); other keyword arguments become entries
+        of `graph`.
+        """
+        self.cpu = _requirement_array(cpu)
+        self.bandwidth = _requirement_array(bandwidth)
+        self.edges_array = np.array(edges, dtype=np.int32).reshape(-1, 2)
+        if len(self.edges_array) != len(self.bandwidth):
+            raise ValueError("Every edge needs exactly one bandwidth requirement")
+
+        node_count = len(self.cpu)
+        labels = None if labels is None else tuple(labels)
+        if labels is not None and len(labels) != node_count:
+            raise ValueError("Every node needs exactly one label")
+        self.labels = None if labels == tuple(range(node_count)) else labels
+
+        # Adjacency lists in edge order; a self-loop appears once
+        neighbors = [[] for _ in range(node_count)]
+        for edge_id, (u, v) in enumerate(self.edges_array.tolist()):
+            neighbors[u].append((v, edge_id))
+            if u != v:
+                neighbors[v].append((u, edge_id))
+        self._set_adjacency(neighbors)
+
+        self.vnr_id = vnr_id
+        self.arrival_time = arrival_time
+        self.lifetime = lifetime
+        self._extra = graph_attrs or None
+
+    def _set_adjacency(self, neighbors):
+        self.indptr = np.zeros(len(neighbors) + 1, dtype=np.int32)
+        self.indptr[1:] = np.cumsum([len(row) for row in neighbors])
+        entries = [entry for row in neighbors for entry in row]
+        self.indices = np.array([v for v, _ in entries], dtype=np.int32)
+        self.edge_ids = np.array([edge_id for _, edge_id in entries], dtype=np.int32)
+
+    @classmethod
+    def from_networkx(cls, vnr):
+        """Convert an nx.Graph VNR, keeping node, edge and neighbour order."""
+        labels = list(vnr.nodes())
+        index = {node: i for i, node in enumerate(labels)}
+
+        edge_list = list(vnr.edges())
+        edge_lookup = {}
+        for edge_id, (u, v) in enumerate(edge_list):
+            edge_lookup[(u, v)] = edge_id
+            edge_lookup[(v, u)] = edge_id
+
+        graph_attrs = dict(vnr.graph)
+        request = cls([vnr.nodes[node]['cpu_req'] for node in labels],
+                      [(index[u], index[v]) for u, v in edge_list],
+                      [vnr.edges[edge]['bandwidth_req'] for edge in edge_list],
+                      labels=labels,
+                      vnr_id=graph_attrs.pop('vnr_id', None),
+                      arrival_time=graph_attrs.pop('arrival_time', None),
+                      lifetime=graph_attrs.pop('lifetime', None),
+                      **graph_attrs)
+
+        # Follow networkx's neighbour order, which need not match edge order
+        request._set_adjacency([[(index[v], edge_lookup[(u, v)]) for v in vnr.neighbors(u)] for u in labels])
+        return request
+
+    def to_networkx(self):
+        """Build the equivalent nx.Graph VNR."""
+        vnr = nx.Graph()
+        vnr.graph.update(self.graph)
+        labels = self._labels()
+        for i, label in enumerate(labels):
+            vnr.add_node(label, cpu_req=self.cpu[i].item())
+        for (u, v), bw_req in zip(self.edges_array.tolist(), self.bandwidth.tolist()):
+            vnr.add_edge(labels[u], labels[v], bandwidth_req=bw_req)
+        return vnr
+
+    def __len__(self):
+        return len(self.cpu)
+
+    def __iter__(self):
+        return iter(self._labels())
+
+    def __contains__(self, node):
+        return self._node_index(node, None) is not None
+
+    def __repr__(self):
+        return f"VirtualRequest({self.vnr_id!r}, nodes={len(self.cpu)}, edges={len(self.bandwidth)})"
+
+    @property
+    def graph(self):
+        """Request metadata (vnr_id, arrival_time, lifetime, ...) as a dict-like view."""
+        return _RequestAttrs(self)
+
+    @property
+    def nodes(self):
+        """Node labels when called; `nodes[v]` gives the node's attributes."""
+        return _NodeView(self)
+
+    @property
+    def edges(self):
+        """Edges as label pairs when called; `edges[u, v]` gives the edge's attributes."""
+        return _EdgeView(self)
+
+    def neighbors(self, node):
+        i = self._node_index(node)
+        labels = self._labels()
+        return iter([labels[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]].tolist()])
+
+    def number_of_nodes(self):
+        return len(self.cpu)
+
+    def number_of_edges(self):
+        return len(self.bandwidth)
+
+    def _labels(self):
+        return range(len(self.cpu)) if self.labels is None else self.labels
+
+    def _node_index(self, node, missing=KeyError):
+        if self.labels is not None:
+            try:
+                return self.labels.index(node)
+            except ValueError:
+                pass
+        elif isinstance(node, (int, np.integer)) and not isinstance(node, bool) and 0 <= node < len(self.cpu):
+            return int(node)
+
+        if missing is KeyError:
+            raise KeyError(node)
+        return missing
+
+    def _edge_id(self, u, v):
+        i, j = self._node_index(u), self._node_index(v)
+        row = slice(self.indptr[i], self.indptr[i + 1])
+        matches = np.flatnonzero(self.indices[row] == j)
+        if not len(matches):
+            raise KeyError((u, v))
+        return int(self.edge_ids[row][matches[0]])
+
+
+def _requirement_array(values):
+    # Integer requirements stay integers so revenue and cost keep their type
+    array = np.asarray(list(values))
+    if array.dtype.kind not in 'iuf':
+        array = array.astype(float)
+    return array
+
+
+class _NodeView:
+    __slots__ = ('_request',)
+
+    def __init__(self, request):
+        self._request = request
+
+    def __call__(self, data=False):
+        labels = self._request._labels()
+        if not data:
+            return list(labels)
+        return [(label, _NodeAttrs(self._request, i)) for i, label in enumerate(labels)]
+
+    def __getitem__(self, node):
+        return _NodeAttrs(self._request, self._request._node_index(node))
+
+    def __iter__(self):
+        return iter(self._request._labels())
+
+    def __len__(self):
+        return len(self._request)
+
+    def __contains__(self, node):
+        return node in self._request
+
+
+class _EdgeView:
+    __slots__ = ('_request',)
+
+    def __init__(self, request):
+        self._request = request
+
+    def __call__(self, data=False):
+        request = self._request
+        labels = request._labels()
+        edges = [(labels[u], labels[v]) for u, v in request.edges_array.tolist()]
+        if not data:
+            return edges
+        return [(u, v, _EdgeAttrs(request, edge_id)) for edge_id, (u, v) in enumerate(edges)]
+
+    def __getitem__(self, edge):
+        u, v = edge
+        return _EdgeAttrs(self._request, self._request._edge_id(u, v))
+
+    def __iter__(self):
+        return iter(self())
+
+    def __len__(self):
+        return self._request.number_of_edges()
+
+    def __contains__(self, edge):
+        try:
+            self[edge]
+        except (KeyError, ValueError, TypeError):
+            return False
+        return True
+
+
+class _ArrayAttrs(Mapping):
+    # Single-key attribute mapping backed by one array element
+    __slots__ = ('_array', '_index')
+    _key = None
+
+    def __init__(self, array, index):
+        self._array = array
+        self._index = index
+
+    def __getitem__(self, key):
+        if key != self._key:
+            raise KeyError(key)
+        return self._array[self._index].item()
+
+    def __iter__(self):
+        yield self._key
+
+    def __len__(self):
+        return 1
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _NodeAttrs(_ArrayAttrs):
+    __slots__ = ()
+    _key = 'cpu_req'
+
+    def __init__(self, request, index):
+        super().__init__(request.cpu, index)
+
+
+class _EdgeAttrs(_ArrayAttrs):
+    __slots__ = ()
+    _key = 'bandwidth_req'
+
+    def __init__(self, request, index):
+        super().__init__(request.bandwidth, index)
+
+
+class _RequestAttrs(MutableMapping):
+    # vnr.graph: the metadata slots plus any extra entries, e.g. Yu2008's 'retried'
+    __slots__ = ('_request',)
+    _SLOTS = ('vnr_id', 'arrival_time', 'lifetime')
+
+    def __init__(self, request):
+        self._request = request
+
+    def __getitem__(self, key):
+        if key in self._SLOTS:
+            value = getattr(self._request, key)
+            if value is not None:
+                return value
+        elif self._request._extra and key in self._request._extra:
+            return self._request._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._SLOTS:
+            setattr(self._request, key, value)
+            return
+        if self._request._extra is None:
+            self._request._extra = {}
+        self._request._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._SLOTS and getattr(self._request, key) is not None:
+            setattr(self._request, key, None)
+        elif self._request._extra and key in self._request._extra:
+            del self._request._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in self._SLOTS:
+            if getattr(self._request, key) is not None:
+                yield key
+        if self._request._extra:
+            yield from self._request._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
@@ -3,10 +3,13 @@ VNE Network Generators
 Literature-compliant network generation for Virtual Network Embedding
 """
 
+import itertools
 import networkx as nx
 import random
 import math
 
+from .virtual_request import VirtualRequest
+
 _vnr_counter = 0
 
 def _get_unique_vnr_id():
@@ -63,14 +66,17 @@ def generate_substrate_network(nodes, topology="erdos_renyi", edge_prob=0.15, **
 
 def generate_vnr(substrate_nodes, nodes=None, topology="random", **kwargs):
     """Generate VNR with literature-compliant characteristics."""
+    # Random source: the random module unless a random.Random is passed as rng
+    rng = kwargs.get('rng', random)
+
     # VNR size: 2-20 nodes as per literature
     if nodes is None:
-        nodes = random.randint(2, min(6, len(substrate_nodes) // 2))
+        nodes = rng.randint(2, min(6, len(substrate_nodes) // 2))
     
     # Create VNR topology
     if topology == "random":
         edge_prob = kwargs.get('edge_prob', 0.5)
-        vnr = nx.erdos_renyi_graph(nodes, edge_prob)
+        vnr = nx.erdos_renyi_graph(nodes, edge_prob, seed=rng)
     elif topology == "star":
         vnr = nx.star_graph(nodes - 1)
     elif topology == "linear":
@@ -82,7 +88,7 @@ def generate_vnr(substrate_nodes, nodes=None, topology="random", **kwargs):
         if nodes > 1:
             # Create a tree by connecting random nodes
             for i in range(1, nodes):
-                parent = random.randint(0, i-1)
+                parent = rng.randint(0, i-1)
                 vnr.add_edge(parent, i)
     else:
         raise ValueError(f"Unsupported VNR topology: {topology}")
@@ -91,20 +97,20 @@ def generate_vnr(substrate_nodes, nodes=None, topology="random", **kwargs):
     if not nx.is_connected(vnr) and len(vnr.nodes()) > 1:
         components = list(nx.connected_components(vnr))
         for i in range(len(components) - 1):
-            u = random.choice(list(components[i]))
-            v = random.choice(list(components[i + 1]))
+            u = rng.choice(list(components[i]))
+            v = rng.choice(list(components[i + 1]))
             vnr.add_edge(u, v)
     
     # Add resource requirements (0-50 as typical in literature)
     for node in vnr.nodes():
-        vnr.nodes[node]['cpu_req'] = random.randint(10, 50)
+        vnr.nodes[node]['cpu_req'] = rng.randint(10, 50)
     
     for edge in vnr.edges():
-        vnr.edges[edge]['bandwidth_req'] = random.randint(5, 30)
+        vnr.edges[edge]['bandwidth_req'] = rng.randint(5, 30)
     
     # Add VNR metadata
-    arrival_time = kwargs.get('arrival_time', random.randint(0, 100))
-    lifetime = kwargs.get('lifetime', random.randint(20, 60))
+    arrival_time = kwargs.get('arrival_time', rng.randint(0, 100))
+    lifetime = kwargs.get('lifetime', rng.randint(20, 60))
     vnr_id = kwargs.get('vnr_id', _get_unique_vnr_id())
     
     vnr.graph.update({
@@ -134,6 +140,54 @@ def generate_vnr_batch(substrate_nodes, count, **kwargs):
     return vnrs
 
 
+def stream_vnrs(substrate_nodes, count=None, arrival_rate=1.0, mean_lifetime=40.0, interarrival=None,
+                lifetime=None, rng=None, start_time=0.0, compact=False, id_prefix='VNR_', id_start=1, **kwargs):
+    """
+    Lazily yield VNRs in arrival order, the standard VNE workload by default.
+
+    Arrivals form a Poisson process with `arrival_rate` requests per time
+    unit and lifetimes are exponential with mean `mean_lifetime`.
+    `interarrival` and `lifetime` replace either one with any distribution,
+    i.e. a callable drawing a value from a random source (see exponential,
+    uniform_int and constant). `count=None` streams without end. Remaining
+    keyword arguments (nodes, topology, edge_prob) go to generate_vnr.
+
+    VNR ids are `id_prefix` followed by a counter from `id_start`
+    (VNR_1, VNR_2, ...). Ids key registries and results, so streams that
+    are combined with each other or with other queues need a distinct
+    prefix or a non-overlapping id_start.
+
+    Each VNR is only built when requested, so vne_simulation can run
+    millions of requests without materialising the queue. `compact=True`
+    yields VirtualRequest objects instead of nx.Graph.
+    """
+    rng = random if rng is None else rng
+    interarrival = interarrival or exponential(1.0 / arrival_rate)
+    lifetime = lifetime or exponential(mean_lifetime)
+
+    arrival_time = start_time
+    for i in itertools.count() if count is None else range(count):
+        arrival_time += interarrival(rng)
+        vnr = generate_vnr(substrate_nodes, arrival_time=arrival_time, lifetime=lifetime(rng),
+                           vnr_id=f"{id_prefix}{id_start + i}", rng=rng, **kwargs)
+        yield VirtualRequest.from_networkx(vnr) if compact else vnr
+
+
+def exponential(mean):
+    """Exponential distribution with the given mean, for stream_vnrs."""
+    return lambda rng: rng.expovariate(1.0 / mean)
+
+
+def uniform_int(low, high):
+    """Uniform integer distribution on [low, high], for stream_vnrs."""
+    return lambda rng: rng.randint(low, high)
+
+
+def constant(value):
+    """Distribution that always returns `value`, for stream_vnrs."""
+    return lambda rng: value
+
+
 def create_example_substrate():
     """Create example substrate for testing."""
     G = nx.Graph()
@@ -0,0 +1,60 @@
+"""
+VNE Request Registry
+Index of virtual network requests by vnr_id
+"""
+
+
+class VNRRegistry:
+    """
+    VNRs indexed by their `vnr_id`.
+
+    Post-processing looks VNRs up once per result or event; a registry makes
+    each lookup a dict access instead of a scan over the request queue.
+    `offset(vnr_id)` gives the position of a request in registration order,
+    which columnar stores use as a row index. Iterating yields the VNRs in
+    that order.
+    """
+
+    def __init__(self, vnrs=()):
+        self._vnrs = []
+        self._offsets = {}
+        self.extend(vnrs)
+
+    @classmethod
+    def of(cls, vnrs):
+        """Return `vnrs` itself if it already is a registry, else index it."""
+        return vnrs if isinstance(vnrs, cls) else cls(vnrs)
+
+    def add(self, vnr):
+        vnr_id = vnr.graph['vnr_id']
+        if vnr_id in self._offsets:
+            raise ValueError(f"Duplicate vnr_id: {vnr_id}")
+        self._offsets[vnr_id] = len(self._vnrs)
+        self._vnrs.append(vnr)
+
+    def extend(self, vnrs):
+        for vnr in vnrs:
+            self.add(vnr)
+
+    def get(self, vnr_id, default=None):
+        offset = self._offsets.get(vnr_id)
+        return default if offset is None else self._vnrs[offset]
+
+    def offset(self, vnr_id):
+        """Position of a request in registration order; KeyError if unknown."""
+        return self._offsets[vnr_id]
+
+    def __getitem__(self, vnr_id):
+        return self._vnrs[self._offsets[vnr_id]]
+
+    def __contains__(self, vnr_id):
+        return vnr_id in self._offsets
+
+    def __len__(self):
+        return len(self._vnrs)
+
+    def __iter__(self):
+        return iter(self._vnrs)
+
+    def __repr__(self):
+        return f"VNRRegistry({len(self._vnrs)} requests)"
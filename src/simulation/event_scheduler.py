@@ -0,0 +1,60 @@
+"""
+VNE Event Scheduler
+Priority-queue event engine for discrete-event VNE simulation
+"""
+
+import heapq
+import itertools
+
+ARRIVAL = 'ARRIVAL'
+DEPARTURE = 'DEPARTURE'
+
+# Departures sort before arrivals at the same timestamp, so resources released
+# at time t are already available to a request arriving at time t.
+_EVENT_PRIORITY = {DEPARTURE: 0, ARRIVAL: 1}
+
+
+class EventScheduler:
+    """
+    Min-heap of timestamped events with deterministic tie-breaking.
+
+    Events are ordered by (time, type priority, insertion order), so two runs
+    over the same input always process events in the same order. Scheduling
+    and popping are both O(log n).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def schedule(self, time, event_type, payload=None):
+        """Add an event; payload is returned unchanged when the event is popped."""
+        heapq.heappush(self._heap, (time, _EVENT_PRIORITY[event_type], next(self._sequence), event_type, payload))
+
+    def schedule_arrival(self, time, vnr):
+        """Schedule the arrival of a VNR."""
+        self.schedule(time, ARRIVAL, vnr)
+
+    def schedule_departure(self, time, vnr_id):
+        """Schedule the departure of an embedded VNR."""
+        self.schedule(time, DEPARTURE, vnr_id)
+
+    def peek_time(self):
+        """Return the timestamp of the next event, or None if the queue is empty."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop(self):
+        """Remove and return the next event as (time, event_type, payload)."""
+        time, _, _, event_type, payload = heapq.heappop(self._heap)
+        return time, event_type, payload
+
+    def pop_due(self, current_time):
+        """Yield every event with time <= current_time, in scheduling order."""
+        while self._heap and self._heap[0][0] <= current_time:
+            yield self.pop()
@@ -0,0 +1,53 @@
+"""
+VNE Event Trace
+Structured event sinks for vne_simulation
+"""
+
+import json
+
+
+class JsonlEventWriter:
+    """
+    Event sink that writes one JSON object per simulation event to a file.
+
+    Pass an instance as `event_sink` to vne_simulation and close it (or use
+    it as a context manager) afterwards. JSON objects only take string keys,
+    so virtual-link keys in link mappings are written as "u-v", the same
+    format as the edge keys in results_summary.json.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w')
+
+    def __call__(self, event):
+        self._file.write(json.dumps(_jsonable(event)) + '\n')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_event_trace(path):
+    """Load the events of a JSONL trace as a list of dicts."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {_json_key(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _json_key(key):
+    if isinstance(key, tuple):
+        return '-'.join(str(part) for part in key)
+    return key
@@ -0,0 +1,102 @@
+"""
+VNE Instrumentation
+Per-phase wall time and counters of an embedding, collected only on request
+"""
+
+import contextlib
+import contextvars
+import time
+
+# EmbeddingStats receiving measurements in the current context; None means instrumentation is off
+_active_stats = contextvars.ContextVar('vne_embedding_stats', default=None)
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+class EmbeddingStats:
+    """
+    Wall time per phase and event counters of one embedding attempt.
+
+    Instrumented code asks current_stats() for the active object once per
+    call and records nothing when it is None, so a run without
+    collect_stats() only pays for that lookup. Phases may nest (a path
+    search inside 'link_mapping' also counts towards it). Counters used by
+    the algorithms:
+
+    - noderank_iterations: power iterations run (0 on a NodeRank cache hit)
+    - candidates_tried: substrate nodes checked as hosts for a virtual node
+    - backtracks: RW_BFS steps (or backjumps) back to a previous virtual node
+    - nogood_hits: RW_BFS backjump search positions failed from its nogood memo
+    - path_searches: shortest_feasible_path calls
+    - paths_enumerated: substrate paths computed (shortest, Yen k-shortest, constrained)
+    - bandwidth_checks: candidate paths checked against residual bandwidth
+    """
+
+    __slots__ = ('phases', 'counters')
+
+    def __init__(self):
+        self.phases = {}    # phase -> seconds
+        self.counters = {}  # counter -> count
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Add the wall time of the block to phase `name`."""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def merge(self, other):
+        for phase, seconds in other.phases.items():
+            self.add_time(phase, seconds)
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+
+    def as_dict(self):
+        return {'phases': dict(self.phases), 'counters': dict(self.counters)}
+
+    def __repr__(self):
+        return f"EmbeddingStats(phases={self.phases!r}, counters={self.counters!r})"
+
+
+def current_stats():
+    """The EmbeddingStats collecting in this context, or None when instrumentation is off."""
+    return _active_stats.get()
+
+
+@contextlib.contextmanager
+def collect_stats(stats=None):
+    """Send the measurements made inside the block to `stats` (a new EmbeddingStats by default)."""
+    stats = EmbeddingStats() if stats is None else stats
+    token = _active_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def timed(stats, phase):
+    """stats.phase(phase), or a shared no-op context when stats is None."""
+    return _NO_PHASE if stats is None else stats.phase(phase)
+
+
+def collect_phase(stats, phase):
+    """
+    collect_stats(stats) and stats.phase(phase) in one block, for code that
+    keeps one EmbeddingStats per VNR; a no-op context yielding None when
+    stats is None.
+    """
+    return _NO_PHASE if stats is None else _collect_phase(stats, phase)
+
+
+@contextlib.contextmanager
+def _collect_phase(stats, phase):
+    with collect_stats(stats), stats.phase(phase):
+        yield stats
@@ -0,0 +1,223 @@
+"""
+VNE Parallel Runner
+Process-pool execution of independent (scenario, algorithm, seed) experiment jobs
+"""
+
+import contextlib
+import multiprocessing
+import multiprocessing.connection
+import os
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..algorithms.yu_baseline import create_chunks
+from ..networks.substrate_state import working_substrate
+from .simulation import vne_simulation
+
+# Environment variable read when no worker count is given explicitly
+WORKERS_ENV = 'VNE_WORKERS'
+
+# Seconds a worker gets past its time budget to report partial results before it is killed
+KILL_GRACE_SECONDS = 10
+
+
+class JobTimeout(Exception):
+    """Raised inside a worker when its job exceeds the time budget."""
+
+
+class ExperimentJob:
+    """
+    One algorithm run on one scenario's substrate and VNR queue.
+
+    Jobs are pickled to worker processes, so `algorithm` must be a
+    module-level function. `seed` (if set) seeds `random` and `numpy.random`
+    in the process that runs the job, which keeps results independent of
+    which worker picks the job up. `timeout` is a time budget in seconds;
+    jobs with a budget always run in a worker process that can be killed.
+    `instrument` adds per-phase times and counters to every result record.
+    """
+
+    def __init__(self, scenario, alg_name, algorithm, substrate, vnr_queue, seed=None, time_window=25,
+                 timeout=None, instrument=False):
+        self.scenario = scenario
+        self.alg_name = alg_name
+        self.algorithm = algorithm
+        self.substrate = substrate
+        self.vnr_queue = vnr_queue
+        self.seed = seed
+        self.time_window = time_window
+        self.timeout = timeout
+        self.instrument = instrument
+
+    @property
+    def key(self):
+        return self.scenario, self.alg_name, self.seed
+
+
+def resolve_workers(workers=None):
+    """
+    Number of worker processes for algorithm runs.
+
+    `workers` wins over the VNE_WORKERS environment variable. 0 or 'auto'
+    means one per CPU. The default is 1, which runs jobs sequentially in
+    this process (see run_jobs).
+    """
+    if workers is None:
+        workers = os.environ.get(WORKERS_ENV, 1)
+    if workers in (0, '0', 'auto'):
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def run_algorithm(alg_name, algorithm, substrate, vnr_queue, time_window=25, results=None, verbosity='print',
+                  instrument=False):
+    """
+    Run one algorithm on a fully available working copy of the substrate and return its result records.
+
+    If `results` is given, simulation records are appended to it as they are
+    produced (Yu2008 appends each time-window chunk's records as the chunk
+    finishes, then sorts its records by arrival time). `verbosity`
+    is passed on to vne_simulation. With `instrument` every record carries a
+    'stats' dict of per-phase wall times and counters (EmbeddingStats.as_dict).
+    """
+    if alg_name == 'Yu2008':
+        # Yu2008 processes time-window chunks and needs the available-resource attributes up front
+        substrate_working = working_substrate(substrate)
+        chunks = create_chunks(vnr_queue, time_window=time_window)
+        if results is None:
+            results = []
+        start = len(results)
+        algorithm(substrate_working, chunks, time_window=time_window, instrument=instrument, results=results)
+
+        # Sort by arrival_time for proper timeline visualization
+        results[start:] = sorted(results[start:], key=lambda x: x['arrival_time'])
+        return results
+
+    return vne_simulation(substrate, vnr_queue, algorithm, results=results, verbosity=verbosity,
+                          instrument=instrument)
+
+
+def run_job(job, quiet=False):
+    """
+    Run a job and return {'status': 'SUCCESS', 'results': [...]}, or
+    {'status': 'FAILED', 'error': message} if the algorithm raised. A job
+    that runs out of its time budget returns {'status': 'TIMEOUT', 'error':
+    message, 'results': [...]} with the records produced before the deadline.
+    """
+    if job.seed is not None:
+        random.seed(job.seed)
+        np.random.seed(job.seed)
+
+    results = []
+    try:
+        with _time_budget(job.timeout):
+            run_algorithm(job.alg_name, job.algorithm, job.substrate, job.vnr_queue, job.time_window, results,
+                          verbosity='quiet' if quiet else 'print', instrument=job.instrument)
+    except JobTimeout:
+        return _timeout_outcome(job, results)
+    except Exception as e:
+        return {'status': 'FAILED', 'error': str(e)}
+
+    return {'status': 'SUCCESS', 'results': results}
+
+
+def run_jobs(jobs, workers=None):
+    """
+    Run jobs and return their outcomes in job order.
+
+    With one worker the jobs run in this process, one after another. With
+    more they are spread over a ProcessPoolExecutor; per-simulation output
+    is suppressed in the workers and outcomes are collected in submission
+    order, so the result does not depend on scheduling. If any job has a
+    time budget, every job runs in its own killable worker process instead.
+    """
+    jobs = list(jobs)
+    workers = min(resolve_workers(workers), len(jobs))
+    if any(job.timeout is not None for job in jobs):
+        return _run_killable(jobs, max(1, workers))
+    if workers <= 1:
+        return [run_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, job, True) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def _run_killable(jobs, workers):
+    # Up to `workers` jobs run at once, each in its own process reporting back
+    # through a pipe. A worker raises JobTimeout at its deadline and reports
+    # partial results; one still running KILL_GRACE_SECONDS later is terminated.
+    context = multiprocessing.get_context()
+    quiet = workers > 1
+    outcomes = [None] * len(jobs)
+    pending = list(enumerate(jobs))[::-1]
+    running = {}  # receiving connection -> (job index, process, kill deadline)
+
+    while pending or running:
+        while pending and len(running) < workers:
+            index, job = pending.pop()
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_job_process, args=(job, sender, quiet), daemon=True)
+            process.start()
+            sender.close()
+            deadline = None if job.timeout is None else time.monotonic() + job.timeout + KILL_GRACE_SECONDS
+            running[receiver] = (index, process, deadline)
+
+        deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+        wait_time = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+        for receiver in multiprocessing.connection.wait(list(running), wait_time):
+            index, process, _ = running.pop(receiver)
+            try:
+                outcome = receiver.recv()
+            except EOFError:
+                outcome = None
+            receiver.close()
+            process.join()
+            outcomes[index] = outcome or {'status': 'FAILED',
+                                          'error': f"Worker process exited with code {process.exitcode}"}
+
+        now = time.monotonic()
+        for receiver, (index, process, deadline) in list(running.items()):
+            if deadline is not None and now >= deadline:
+                process.terminate()
+                process.join()
+                receiver.close()
+                del running[receiver]
+                outcomes[index] = _timeout_outcome(jobs[index], [])
+
+    return outcomes
+
+
+def _job_process(job, connection, quiet):
+    connection.send(run_job(job, quiet))
+    connection.close()
+
+
+def _timeout_outcome(job, results):
+    return {'status': 'TIMEOUT', 'error': f"Exceeded time budget of {job.timeout:g}s", 'results': results}
+
+
+@contextlib.contextmanager
+def _time_budget(seconds):
+    # Raise JobTimeout in this thread after `seconds`; needs SIGALRM, so it is a
+    # no-op on platforms without it (the parent still kills the worker)
+    if seconds is None or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise JobTimeout()
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
@@ -0,0 +1,393 @@
+"""
+VNE Simulation Results
+Columnar storage, aggregation and export of per-VNR result records
+"""
+
+import math
+
+import numpy as np
+
+from ..metrics.metrics import calculate_cost, calculate_revenue
+from ..networks.vnr_registry import VNRRegistry
+
+# Record keys stored in columns; anything else is kept per row in `extras`
+_RECORD_KEYS = ('vnr_id', 'arrival_time', 'embedding_time', 'success', 'node_mapping', 'link_mapping',
+                'currently_active')
+
+# Optional record keys, only reproduced by record() if some appended record had them
+_OPTIONAL_KEYS = ('embedding_time', 'currently_active')
+
+
+class SimulationResults:
+    """
+    Per-VNR results in NumPy columns instead of a list of dicts.
+
+    `columns` maps column names to arrays. Row i has `vnr_index[i]` (into
+    `vnr_ids`), `arrival_time`, `embedding_time` (NaN if none), `success`,
+    `revenue`, `cost` and `active` (currently active VNRs, -1 if not
+    recorded). Mappings are flattened into offset-indexed arrays:
+
+    - node mapping of row i: `node_virtual[a:b]` -> `node_substrate[a:b]`
+      with a, b = node_offsets[i], node_offsets[i + 1]
+    - virtual links of row i: `link_source[c:d]`, `link_target[c:d]` with
+      c, d = link_offsets[i], link_offsets[i + 1]
+    - substrate path of link k: `path_nodes[path_offsets[k]:path_offsets[k + 1]]`
+
+    The store also has append/extend and reads back as a sequence of result
+    dicts, so it can be passed as `results` to vne_simulation or
+    run_algorithm. Appended rows are buffered and converted to arrays on the
+    first column access. Revenue and cost are filled in for successful rows
+    whose VNR is known, either from `vnrs` (a sequence or VNRRegistry) or
+    passed to append(); other rows get 0.
+    """
+
+    def __init__(self, vnrs=None):
+        self.vnr_ids = []
+        self._vnr_positions = {}
+        self._vnrs = VNRRegistry.of(() if vnrs is None else vnrs)
+        self._optional_keys = set()
+        self.extras = {}  # row -> {key: value} for record keys without a column
+        self._columns = None
+        self._pending = _RowBuffer()
+
+    @classmethod
+    def from_records(cls, records, vnrs=None):
+        """Build a store from result dicts, computing revenue and cost from `vnrs`."""
+        results = cls(vnrs)
+        results.extend(records)
+        return results
+
+    # -- building -------------------------------------------------------
+
+    def append(self, record, vnr=None):
+        """Add one result record (as produced by vne_simulation or yu2008_algorithm)."""
+        row = len(self)
+        vnr_id = record['vnr_id']
+        position = self._vnr_positions.get(vnr_id)
+        if position is None:
+            position = self._vnr_positions[vnr_id] = len(self.vnr_ids)
+            self.vnr_ids.append(vnr_id)
+
+        self._optional_keys.update(key for key in _OPTIONAL_KEYS if key in record)
+        extra = {key: value for key, value in record.items() if key not in _RECORD_KEYS}
+        if extra:
+            self.extras[row] = extra
+
+        revenue = cost = 0
+        vnr = vnr if vnr is not None else self._vnrs.get(vnr_id)
+        if record['success'] and vnr is not None:
+            revenue = calculate_revenue(vnr)
+            cost = calculate_cost(vnr, record['node_mapping'], record['link_mapping'])
+
+        self._pending.add(position, record, revenue, cost)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    # -- sequence of result dicts ---------------------------------------
+
+    def __len__(self):
+        committed = 0 if self._columns is None else len(self._columns['success'])
+        return committed + len(self._pending)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.record(i) for i in range(len(self))[row]]
+        return self.record(row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.record(row)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def record(self, row):
+        """Result dict of one row, in the shape vne_simulation produces."""
+        columns = self.columns
+        if row < 0:
+            row += len(self)
+        record = {'vnr_id': self.vnr_ids[columns['vnr_index'][row]],
+                  'arrival_time': columns['arrival_time'][row].item()}
+        if 'embedding_time' in self._optional_keys:
+            embedding_time = columns['embedding_time'][row].item()
+            record['embedding_time'] = None if math.isnan(embedding_time) else embedding_time
+        record['success'] = bool(columns['success'][row])
+        record['node_mapping'] = self.node_mapping(row)
+        record['link_mapping'] = self.link_mapping(row)
+        if 'currently_active' in self._optional_keys:
+            active = columns['active'][row].item()
+            record['currently_active'] = None if active < 0 else active
+        record.update(self.extras.get(row, {}))
+        return record
+
+    def node_mapping(self, row):
+        """{virtual node: substrate node} of a row, or None if it had none."""
+        columns = self.columns
+        if not columns['has_node_mapping'][row]:
+            return None
+        start, end = columns['node_offsets'][row], columns['node_offsets'][row + 1]
+        return dict(zip(columns['node_virtual'][start:end].tolist(), columns['node_substrate'][start:end].tolist()))
+
+    def link_mapping(self, row):
+        """{virtual link: substrate path} of a row, or None if it had none."""
+        columns = self.columns
+        if not columns['has_link_mapping'][row]:
+            return None
+        start, end = columns['link_offsets'][row], columns['link_offsets'][row + 1]
+        path_offsets = columns['path_offsets']
+        path_nodes = columns['path_nodes']
+        v_edges = zip(columns['link_source'][start:end].tolist(), columns['link_target'][start:end].tolist())
+        return {v_edge: path_nodes[path_offsets[link]:path_offsets[link + 1]].tolist()
+                for link, v_edge in zip(range(start, end), v_edges)}
+
+    # -- columns --------------------------------------------------------
+
+    @property
+    def columns(self):
+        """All columns as a dict of arrays, converting any buffered rows first."""
+        if self._columns is None or len(self._pending):
+            self._columns = self._pending.merge_into(self._columns)
+            self._pending = _RowBuffer()
+        return self._columns
+
+    # -- aggregation ----------------------------------------------------
+
+    def successful_requests(self):
+        return int(np.count_nonzero(self.columns['success']))
+
+    def acceptance_ratio(self):
+        return self.successful_requests() / len(self) if len(self) else 0.0
+
+    def total_revenue(self):
+        # Revenue of failed rows is 0, so this is the revenue of accepted VNRs
+        return self.columns['revenue'].sum().item()
+
+    def total_cost(self):
+        return self.columns['cost'].sum().item()
+
+    def revenue_cost_ratio(self):
+        total_cost = self.total_cost()
+        return self.total_revenue() / total_cost if total_cost > 0 else 0
+
+    def cumulative_acceptance(self):
+        """Acceptance ratio after each row, in row order."""
+        success = self.columns['success']
+        return np.cumsum(success) / np.arange(1, len(success) + 1)
+
+    def metrics(self):
+        """Totals and ratios, unrounded."""
+        return {
+            'total_requests': len(self),
+            'successful_requests': self.successful_requests(),
+            'acceptance_ratio': self.acceptance_ratio(),
+            'total_revenue': self.total_revenue(),
+            'total_cost': self.total_cost(),
+            'revenue_cost_ratio': self.revenue_cost_ratio()
+        }
+
+    def metrics_summary(self):
+        """Same values and rounding as metrics.calculate_metrics_summary."""
+        if not len(self):
+            return {
+                'total_requests': 0,
+                'successful_requests': 0,
+                'acceptance_ratio': 0.0,
+                'blocking_probability': 0.0,
+                'total_revenue': 0.0,
+                'total_cost': 0.0,
+                'revenue_cost_ratio': 0.0
+            }
+
+        acceptance_ratio = self.acceptance_ratio()
+        total_cost = self.total_cost()
+        return {
+            'total_requests': len(self),
+            'successful_requests': self.successful_requests(),
+            'acceptance_ratio': acceptance_ratio,
+            'blocking_probability': round(1.0 - acceptance_ratio, 3),
+            'total_revenue': self.total_revenue(),
+            'total_cost': total_cost,
+            'revenue_cost_ratio': round(self.total_revenue() / total_cost, 3) if total_cost > 0 else 0.0
+        }
+
+    # -- export ---------------------------------------------------------
+
+    def save(self, path):
+        """Write every column to a NumPy .npz file; load() reads it back."""
+        columns = self.columns
+        np.savez_compressed(path, vnr_ids=np.array(self.vnr_ids, dtype=object),
+                            optional_keys=np.array(sorted(self._optional_keys), dtype=object), **columns)
+
+    @classmethod
+    def load(cls, path):
+        """Read a store written by save(); per-row extras are not saved."""
+        with np.load(path, allow_pickle=True) as data:
+            results = cls()
+            results.vnr_ids = data['vnr_ids'].tolist()
+            results._vnr_positions = {vnr_id: i for i, vnr_id in enumerate(results.vnr_ids)}
+            results._optional_keys = set(data['optional_keys'].tolist())
+            results._columns = {name: data[name] for name in data.files if name not in ('vnr_ids', 'optional_keys')}
+        return results
+
+    def to_arrow(self):
+        """
+        pyarrow.Table with one row per VNR.
+
+        Mappings become list columns built directly on the offset arrays:
+        node_mapping is list<struct<virtual, substrate>> and link_mapping is
+        list<struct<source, target, path: list>>. Requires pyarrow.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Arrow/Parquet export requires pyarrow (pip install pyarrow)") from e
+
+        columns = self.columns
+        embedding_time = columns['embedding_time']
+        active = columns['active']
+
+        node_mapping = pa.ListArray.from_arrays(
+            pa.array(columns['node_offsets'].astype(np.int32)),
+            pa.StructArray.from_arrays([pa.array(columns['node_virtual']), pa.array(columns['node_substrate'])],
+                                       names=['virtual', 'substrate']),
+            mask=pa.array(~columns['has_node_mapping']))
+        paths = pa.ListArray.from_arrays(pa.array(columns['path_offsets'].astype(np.int32)),
+                                         pa.array(columns['path_nodes']))
+        link_mapping = pa.ListArray.from_arrays(
+            pa.array(columns['link_offsets'].astype(np.int32)),
+            pa.StructArray.from_arrays([pa.array(columns['link_source']), pa.array(columns['link_target']), paths],
+                                       names=['source', 'target', 'path']),
+            mask=pa.array(~columns['has_link_mapping']))
+
+        return pa.table({
+            'vnr_id': pa.array([self.vnr_ids[i] for i in columns['vnr_index'].tolist()]),
+            'arrival_time': pa.array(columns['arrival_time']),
+            'embedding_time': pa.array(embedding_time, mask=np.isnan(embedding_time)),
+            'success': pa.array(columns['success']),
+            'revenue': pa.array(columns['revenue']),
+            'cost': pa.array(columns['cost']),
+            'currently_active': pa.array(active, mask=active < 0),
+            'node_mapping': node_mapping,
+            'link_mapping': link_mapping,
+        })
+
+    def to_parquet(self, path):
+        """Write to_arrow() as a Parquet file. Requires pyarrow."""
+        table = self.to_arrow()
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+
+
+class _RowBuffer:
+    # Rows appended since the last conversion, held in Python lists
+
+    def __init__(self):
+        self.vnr_index = []
+        self.arrival_time = []
+        self.embedding_time = []
+        self.success = []
+        self.revenue = []
+        self.cost = []
+        self.active = []
+        self.has_node_mapping = []
+        self.has_link_mapping = []
+        self.node_counts = []
+        self.node_virtual = []
+        self.node_substrate = []
+        self.link_counts = []
+        self.link_source = []
+        self.link_target = []
+        self.path_lengths = []
+        self.path_nodes = []
+
+    def __len__(self):
+        return len(self.success)
+
+    def add(self, position, record, revenue, cost):
+        self.vnr_index.append(position)
+        self.arrival_time.append(record['arrival_time'])
+        embedding_time = record.get('embedding_time')
+        self.embedding_time.append(math.nan if embedding_time is None else embedding_time)
+        self.success.append(bool(record['success']))
+        self.revenue.append(revenue)
+        self.cost.append(cost)
+        active = record.get('currently_active')
+        self.active.append(-1 if active is None else active)
+
+        node_mapping = record.get('node_mapping')
+        self.has_node_mapping.append(node_mapping is not None)
+        node_mapping = node_mapping or {}
+        self.node_counts.append(len(node_mapping))
+        self.node_virtual.extend(node_mapping.keys())
+        self.node_substrate.extend(node_mapping.values())
+
+        link_mapping = record.get('link_mapping')
+        self.has_link_mapping.append(link_mapping is not None)
+        link_mapping = link_mapping or {}
+        self.link_counts.append(len(link_mapping))
+        for (source, target), path in link_mapping.items():
+            self.link_source.append(source)
+            self.link_target.append(target)
+            self.path_lengths.append(len(path))
+            self.path_nodes.extend(path)
+
+    def merge_into(self, columns):
+        new = {
+            'vnr_index': np.array(self.vnr_index, dtype=np.int64),
+            'arrival_time': _value_array(self.arrival_time),
+            'embedding_time': np.array(self.embedding_time, dtype=float),
+            'success': np.array(self.success, dtype=bool),
+            'revenue': _value_array(self.revenue),
+            'cost': _value_array(self.cost),
+            'active': np.array(self.active, dtype=np.int64),
+            'has_node_mapping': np.array(self.has_node_mapping, dtype=bool),
+            'has_link_mapping': np.array(self.has_link_mapping, dtype=bool),
+            'node_offsets': _offsets(self.node_counts),
+            'node_virtual': _value_array(self.node_virtual),
+            'node_substrate': _value_array(self.node_substrate),
+            'link_offsets': _offsets(self.link_counts),
+            'link_source': _value_array(self.link_source),
+            'link_target': _value_array(self.link_target),
+            'path_offsets': _offsets(self.path_lengths),
+            'path_nodes': _value_array(self.path_nodes),
+        }
+        if columns is None:
+            return new
+
+        merged = {}
+        for name, values in new.items():
+            if name.endswith('_offsets'):
+                # Shift the new offsets past the existing entries and drop the duplicated 0
+                merged[name] = np.concatenate([columns[name], values[1:] + columns[name][-1]])
+            else:
+                merged[name] = _concatenate(columns[name], values)
+        return merged
+
+
+def _offsets(counts):
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def _value_array(values):
+    # Numbers keep an integer dtype when they are all integers; labels of other
+    # types (strings, mixed) fall back to an object array
+    if not values:
+        return np.array([], dtype=np.int64)
+    if all(isinstance(value, (bool, int, float, np.number)) for value in values):
+        return np.asarray(values)
+    # Element-wise, so tuple labels (e.g. grid coordinates) are not unpacked into a 2-D array
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _concatenate(existing, new):
+    if not len(new):
+        return existing
+    if not len(existing):
+        return new
+    if existing.dtype.kind in 'biuf' and new.dtype.kind in 'biuf':
+        return np.concatenate([existing, new])
+    return np.concatenate([existing.astype(object), new.astype(object)])
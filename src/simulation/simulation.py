@@ -1,10 +1,26 @@
+import logging
+from collections.abc import Sequence
+
 import networkx as nx
+from .event_scheduler import EventScheduler, ARRIVAL, DEPARTURE
+from .instrumentation import EmbeddingStats, collect_phase, timed
+from ..networks.resource_ledger import ResourceLedger
+from ..networks.substrate_state import get_substrate_state, working_substrate
+
+logger = logging.getLogger(__name__)
+
+# vne_simulation verbosity: progress messages to stdout, to `logger` at DEBUG, or nowhere
+VERBOSITY_LEVELS = ('print', 'log', 'quiet')
 
 
 def validate_link_mapping(substrate, link_mapping, vnr):
     """
     Validate that link mapping won't cause bandwidth over-allocation.
     """
+    state = get_substrate_state(substrate)
+    if state is not None:
+        return state.fits_link_mapping(link_mapping, vnr)
+
     # Track cumulative bandwidth reserved on each substrate edge for this VNR
     reserved_bandwidth = {}
 
@@ -37,6 +53,11 @@ def validate_link_mapping(substrate, link_mapping, vnr):
 
 
 def allocate_resources(substrate, node_mapping, link_mapping, vnr):
+    state = get_substrate_state(substrate)
+    if state is not None:
+        state.allocate(node_mapping, link_mapping, vnr)
+        return
+
     # Allocate CPU
     for v_node, s_node in node_mapping.items():
         cpu_req = vnr.nodes[v_node]['cpu_req']
@@ -54,6 +75,11 @@ def allocate_resources(substrate, node_mapping, link_mapping, vnr):
 
 
 def deallocate_resources(substrate, node_mapping, link_mapping, vnr):
+    state = get_substrate_state(substrate)
+    if state is not None:
+        state.deallocate(node_mapping, link_mapping, vnr)
+        return
+
     # Deallocate CPU
     for v_node, s_node in node_mapping.items():
         cpu_req = vnr.nodes[v_node]['cpu_req']
@@ -70,73 +96,97 @@ def deallocate_resources(substrate, node_mapping, link_mapping, vnr):
                 substrate.edges[(s_path[i + 1], s_path[i])]['bandwidth_available'] += bw_req
 
 
-def vne_simulation(substrate, vnr_queue, algorithm_func):
-    # Initialize substrate with available resources
-    substrate_working = substrate.copy()
-    for node in substrate_working.nodes():
-        substrate_working.nodes[node]['cpu_available'] = substrate_working.nodes[node]['cpu']
-    for edge in substrate_working.edges():
-        substrate_working.edges[edge]['bandwidth_available'] = substrate_working.edges[edge]['bandwidth']
-
-    # Create combined event queue
-    events = []
-
-    # Add all arrival events
-    for vnr in vnr_queue:
-        events.append({
-            'time': vnr.graph['arrival_time'],
-            'type': 'ARRIVAL',
-            'vnr': vnr
-        })
-
-    # Sort events chronologically
-    events.sort(key=lambda x: x['time'])
+def vne_simulation(substrate, vnr_queue, algorithm_func, results=None, verbosity='print', event_sink=None,
+                   instrument=False):
+    # results: optional list that receives each result record as soon as it is
+    # produced, so a caller keeps the partial results of an interrupted run.
+    # verbosity: 'print' (stdout), 'log' (logger.debug) or 'quiet'.
+    # event_sink: optional callable receiving one dict per simulation event
+    # (ARRIVAL, EMBEDDED, REJECTED, DEPARTURE); see event_trace.JsonlEventWriter
+    # vnr_queue may be a list or any iterable in arrival order, such as
+    # vne_generators.stream_vnrs; only the next arrival is held at a time
+    # instrument: add each arrival's phase times and counters (see
+    # instrumentation.EmbeddingStats) to its result record as 'stats'
+    report = _progress_reporter(verbosity)
+
+    # Initialize substrate with available resources (array-backed, see SubstrateState);
+    # the working copy is kept per substrate, so later runs only reset its arrays
+    substrate_working = working_substrate(substrate)
+    ledger = ResourceLedger(substrate_working)
+
+    # Create combined event queue (departures are scheduled as embeddings succeed,
+    # each arrival as the previous one is processed)
+    scheduler = EventScheduler()
+    arrivals = _arrivals_in_order(vnr_queue)
+    vnr = next(arrivals, None)
+    if vnr is not None:
+        scheduler.schedule_arrival(vnr.graph['arrival_time'], vnr)
 
     # Simulation state
-    active_embeddings = {}  # vnr_id -> (node_mapping, link_mapping, vnr)
-    results = []
+    active_embeddings = {}  # vnr_id -> committed Transaction holding the VNR's resources
+    if results is None:
+        results = []
 
-    print("VNE Simulation")
-    print("-" * 60)
+    if report:
+        report("VNE Simulation")
+        report("-" * 60)
 
     # Process events one by one
-    for event in events:
-        current_time = event['time']
-
-        if event['type'] == 'ARRIVAL':
-            vnr = event['vnr']
-            print(f"Time {current_time:>3}: {vnr.graph['vnr_id']} ARRIVES")
+    while scheduler:
+        current_time, event_type, payload = scheduler.pop()
+
+        if event_type == ARRIVAL:
+            vnr = payload
+            next_vnr = next(arrivals, None)
+            if next_vnr is not None:
+                scheduler.schedule_arrival(next_vnr.graph['arrival_time'], next_vnr)
+            if report:
+                report(f"Time {current_time:>3}: {vnr.graph['vnr_id']} ARRIVES")
+            if event_sink is not None:
+                event_sink({'time': current_time, 'event': 'ARRIVAL', 'vnr_id': vnr.graph['vnr_id']})
 
             # Try embedding
-            node_mapping, link_mapping, success = algorithm_func(substrate_working, vnr)
+            stats = EmbeddingStats() if instrument else None
+            with collect_phase(stats, 'embed'):
+                node_mapping, link_mapping, success = algorithm_func(substrate_working, vnr)
+            rejected_by = 'algorithm'
 
             if success:
                 # Validate link mapping before allocation
                 # This prevents bandwidth over-allocation when multiple VNR edges share substrate edges
-                if not validate_link_mapping(substrate_working, link_mapping, vnr):
+                with timed(stats, 'validation'):
+                    valid = validate_link_mapping(substrate_working, link_mapping, vnr)
+                if not valid:
                     success = False
-                    print(f"         VALIDATION FAILED - link mapping would over-allocate bandwidth")
+                    rejected_by = 'validation'
+                    if report:
+                        report(f"         VALIDATION FAILED - link mapping would over-allocate bandwidth")
                 else:
                     # Validation passed - allocate resources and schedule departure
-                    allocate_resources(substrate_working, node_mapping, link_mapping, vnr)
-                    active_embeddings[vnr.graph['vnr_id']] = (node_mapping, link_mapping, vnr)
+                    with timed(stats, 'allocation'):
+                        reservation = ledger.begin()
+                        reservation.allocate(node_mapping, link_mapping, vnr)
+                        reservation.commit()
+                    active_embeddings[vnr.graph['vnr_id']] = reservation
 
                     # Add departure event to queue
                     departure_time = current_time + vnr.graph['lifetime']
-                    events.append({
-                        'time': departure_time,
-                        'type': 'DEPARTURE',
-                        'vnr_id': vnr.graph['vnr_id']
-                    })
+                    scheduler.schedule_departure(departure_time, vnr.graph['vnr_id'])
 
-                    # Re-sort events since we added a departure
-                    events.sort(key=lambda x: x['time'])
-
-                    print(f"         SUCCESS - will depart at time {departure_time}")
+                    if report:
+                        report(f"         SUCCESS - will depart at time {departure_time}")
+                    if event_sink is not None:
+                        event_sink({'time': current_time, 'event': 'EMBEDDED', 'vnr_id': vnr.graph['vnr_id'],
+                                    'departure_time': departure_time, 'node_mapping': node_mapping,
+                                    'link_mapping': link_mapping})
 
             # Print FAILED for both algorithm failures and validation failures
             if not success:
-                print(f"         FAILED")
+                if report:
+                    report(f"         FAILED")
+                if event_sink is not None:
+                    event_sink({'time': current_time, 'event': 'REJECTED', 'vnr_id': vnr.graph['vnr_id'],
+                                'reason': rejected_by})
 
             results.append({
                 'vnr_id': vnr.graph['vnr_id'],
@@ -146,18 +196,50 @@ def vne_simulation(substrate, vnr_queue, algorithm_func):
                 'link_mapping': link_mapping,
                 'currently_active': len(active_embeddings)
             })
+            if stats is not None:
+                results[-1]['stats'] = stats.as_dict()
 
-        elif event['type'] == 'DEPARTURE':
-            vnr_id = event['vnr_id']
+        elif event_type == DEPARTURE:
+            vnr_id = payload
             if vnr_id in active_embeddings:
-                node_mapping, link_mapping, vnr = active_embeddings[vnr_id]
-
                 # Deallocate resources
-                deallocate_resources(substrate_working, node_mapping, link_mapping, vnr)
-                del active_embeddings[vnr_id]
+                active_embeddings.pop(vnr_id).release()
 
-                print(f"Time {current_time:>3}: {vnr_id} DEPARTS")
+                if report:
+                    report(f"Time {current_time:>3}: {vnr_id} DEPARTS")
+                if event_sink is not None:
+                    event_sink({'time': current_time, 'event': 'DEPARTURE', 'vnr_id': vnr_id})
 
-    print("-" * 60)
-    print("Simulation completed")
+    if report:
+        report("-" * 60)
+        report("Simulation completed")
     return results
+
+
+def _arrivals_in_order(vnr_queue):
+    # Lists are sorted up front (stable, so simultaneous arrivals keep queue
+    # order); other iterables are consumed lazily and must already be sorted
+    if isinstance(vnr_queue, Sequence):
+        yield from sorted(vnr_queue, key=lambda vnr: vnr.graph['arrival_time'])
+        return
+
+    last_time = None
+    for vnr in vnr_queue:
+        arrival_time = vnr.graph['arrival_time']
+        if last_time is not None and arrival_time < last_time:
+            raise ValueError(f"VNR stream is not in arrival order: {vnr.graph['vnr_id']} arrives at "
+                             f"{arrival_time} after {last_time}")
+        last_time = arrival_time
+        yield vnr
+
+
+def _progress_reporter(verbosity):
+    # Function used for progress messages, or None when nothing would be shown,
+    # so quiet runs skip message formatting entirely
+    if verbosity not in VERBOSITY_LEVELS:
+        raise ValueError(f"Unsupported verbosity: {verbosity}")
+    if verbosity == 'print':
+        return print
+    if verbosity == 'log' and logger.isEnabledFor(logging.DEBUG):
+        return logger.debug
+    return None